@@ -0,0 +1,95 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Builds many docs repos in one process, sharing a render pool and a render cache.
+
+Each repo is built the way `build-all` builds it, with its own `docd.toml`
+loaded through `load_config`, one repo after the other. The render workers
+start once and stay warm for every site. Rendered pages are cached by their
+source and renderer, so a source that turns up in several sites is only
+rendered once. A site that fails is reported and the rest still build.
+"""
+
+# Python
+from pathlib import Path
+from dataclasses import dataclass
+import time
+# Local
+from docd.renderpool import RenderPool, RenderCache
+from docd.profiler import format_bytes
+
+
+@dataclass
+class SiteResult:
+    repo: Path
+    seconds: float = 0.0
+    # Stage name => "ran" or "skipped"
+    stages: dict = None
+    # Page counts from the publisher, None if the pages stage was skipped
+    pages: dict = None
+    error: str = None
+
+
+def read_repo_list(repos=(), list_file=None):
+    """
+    The repo directories given directly, then those listed in `list_file`
+    one per line, where blank lines and lines starting with `#` are skipped.
+    """
+    repo_dirs = [ Path(e) for e in repos ]
+    if list_file is not None:
+        for line in Path(list_file).read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                repo_dirs.append(Path(line))
+    return repo_dirs
+
+
+def run_batch(repo_dirs, incremental=False, jobs=1, cache_bytes=256*1024*1024):
+    """
+    Build each repo in turn over one render pool and render cache. Returns
+    the SiteResult of each repo and the cache.
+    """
+    # Imported here since the cli imports this module on demand
+    from docd.cli import DocdRunContext, set_repo_paths, load_config, build_all
+
+    results = []
+    cache = RenderCache(max_bytes=cache_bytes)
+    with RenderPool(jobs) as pool:
+        for repo_dir in repo_dirs:
+            result = SiteResult(repo_dir)
+            print(f"== Building {repo_dir}")
+            t0 = time.perf_counter()
+            try:
+                ctx = set_repo_paths(DocdRunContext(),repo_dir)
+                config = load_config(ctx.DOCS_CONFIG_FILEPATH)
+                scheduler,result.pages = build_all(ctx,config,incremental=incremental,
+                                                   render_pool=pool,render_cache=cache)
+                result.stages = { name:e.status for name,e in scheduler.results.items() }
+            except Exception as e:
+                result.error = str(e) or repr(e)
+                print(f"ERROR building {repo_dir}: {result.error}")
+            result.seconds = time.perf_counter()-t0
+            results.append(result)
+    return results,cache
+
+
+def summary_lines(results, cache, seconds):
+    rows = [ ("repo","time","rendered","cached","unchanged","pruned","stages","status") ]
+    for e in results:
+        pages = e.pages
+        counts = ("-",)*4 if pages is None else (pages["rendered"],pages["cached"],pages["unchanged"],pages["pruned"])
+        if e.stages is None:
+            stages = "-"
+        else:
+            n_ran = sum( 1 for status in e.stages.values() if status == "ran" )
+            stages = f"{n_ran} ran, {len(e.stages)-n_ran} skipped"
+        status = "ok" if e.error is None else "FAILED"
+        rows.append((str(e.repo),f"{e.seconds:.2f}s",*map(str,counts),stages,status))
+    widths = [ max( len(row[i]) for row in rows ) for i in range(len(rows[0])) ]
+    lines = [ "  ".join( v.ljust(w) for v,w in zip(row,widths) ).rstrip() for row in rows ]
+
+    n_failed = sum( 1 for e in results if e.error is not None )
+    lines.append(f"Batch: {len(results)} sites in {seconds:.2f}s, {n_failed} failed")
+    lines.append(f"Render cache: {cache.hits} hits, {cache.misses} misses, {format_bytes(cache.n_bytes)} held")
+    return lines
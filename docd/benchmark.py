@@ -0,0 +1,456 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Times each build stage on a generated docs repo, and compares the times to a baseline.
+
+The generated repo is reproducible: the same spec and seed always give the
+same files. Each stage is run `repeat` times and the fastest run is kept,
+which is the least noisy number on a busy machine. Request latencies are the
+median over a sample of pages.
+
+The `startup_*` stages time the commands run from hooks from interpreter
+start to exit. They are held to an absolute budget as well as the baseline,
+and fail if they load any of the heavy rendering, search or server packages.
+"""
+
+# Python
+from pathlib import Path
+from dataclasses import dataclass, asdict, fields
+import os
+import sys
+import json
+import time
+import random
+import subprocess
+import shutil
+import asyncio
+import tempfile
+import platform
+import statistics
+
+
+# Bump when stages are added, removed or measure something different
+BENCHMARK_VERSION = 3
+
+# Lightweight commands whose startup is timed, in the order they run
+STARTUP_COMMANDS = {
+    "startup_help": ("--help",),
+    "startup_filter_check": ("filter-check","--files-only"),
+    "startup_build_clean": ("build-clean",)
+}
+CLI_ENTRY = "from docd.cli import run_cli; run_cli(False)"
+
+# A phrase planted in some pages for filter-check to find
+FILTER_PHRASE = "project-nightjar"
+
+WORDS = (
+    "docs build page index search render source tree cache layout table node shard "
+    "python markdown module config server request latency token stem query branch merge "
+    "release deploy media static shell window worker thread process queue batch stage "
+    "value result error report check filter phrase line file directory path depth order"
+).split()
+
+CODE_LANGUAGES = ( (".py","python"), (".js","javascript"), (".sh","bash") )
+
+
+#-- Synthetic Repos -----------------------------------------------------------#
+
+@dataclass
+class SyntheticRepoSpec:
+    pages: int = 500            # number of source files, markdown and code
+    depth: int = 3              # directory levels below docs/
+    fanout: int = 4             # subdirectories in each directory
+    code_fraction: float = 0.25 # fraction of the sources that are code
+    page_bytes: int = 4000      # rough size of each source
+    media_files: int = 20
+    media_bytes: int = 65536
+    seed: int = 0
+
+
+def _words(rng, n):
+    return " ".join( rng.choice(WORDS) for _ in range(n) )
+
+
+def _make_markdown(rng, n, size):
+    parts = [ f"# Page {n}: {_words(rng,4)}\n" ]
+    while sum( len(e) for e in parts ) < size:
+        kind = rng.random()
+        if kind < 0.5:
+            parts.append(_words(rng,rng.randint(20,80)).capitalize()+".\n")
+        elif kind < 0.65:
+            parts.append(f"## {_words(rng,3).title()}\n")
+        elif kind < 0.8:
+            parts.append("\n".join( f"* {_words(rng,rng.randint(3,10))}" for _ in range(rng.randint(2,6)) )+"\n")
+        elif kind < 0.95:
+            body = "\n".join( f"    {rng.choice(WORDS)}_{i} = {rng.randint(0,999)}" for i in range(rng.randint(2,8)) )
+            parts.append(f"```python\ndef {rng.choice(WORDS)}_{n}():\n{body}\n```\n")
+        else:
+            parts.append(f"| {rng.choice(WORDS)} | {rng.choice(WORDS)} |\n|---|---|\n| {rng.randint(0,99)} | {rng.randint(0,99)} |\n")
+    if rng.random() < 0.05:
+        parts.append(f"Mentions {FILTER_PHRASE} once.\n")
+    return "\n".join(parts)
+
+
+def _make_code(rng, n, language, size):
+    lines = []
+    while sum( len(e) for e in lines ) < size:
+        name = f"{rng.choice(WORDS)}_{len(lines)}"
+        if language == "python":
+            lines.append(f"def {name}(value):\n    # {_words(rng,6)}\n    return value + {rng.randint(0,99)}\n")
+        elif language == "javascript":
+            lines.append(f"function {name}(value){{\n    // {_words(rng,6)}\n    return value + {rng.randint(0,99)};\n}}\n")
+        else:
+            lines.append(f"{name}(){{\n    # {_words(rng,6)}\n    echo \"{_words(rng,3)}\"\n}}\n")
+    return "\n".join(lines)
+
+
+def generate_synthetic_repo(directory, spec):
+    """
+    Write a docs repo with a matching docd.toml into `directory`, which must not exist yet.
+    """
+    directory = Path(directory)
+    docs = directory/"docs"
+    docs.mkdir(parents=True)
+    rng = random.Random(spec.seed)
+
+    # Lay out the directories breadth first
+    directories = [ Path(".") ]
+    level = [ Path(".") ]
+    for depth in range(spec.depth):
+        level = [ parent/f"section-{depth}-{i:02d}" for parent in level for i in range(spec.fanout) ]
+        directories += level
+    for relpath in directories:
+        (docs/relpath).mkdir(parents=True,exist_ok=True)
+
+    # Spread the sources over them
+    for n in range(spec.pages):
+        parent = docs/rng.choice(directories)
+        size = max(200,int(rng.gauss(spec.page_bytes,spec.page_bytes/4)))
+        if rng.random() < spec.code_fraction:
+            suffix,language = rng.choice(CODE_LANGUAGES)
+            (parent/f"module-{n:05d}{suffix}").write_text(_make_code(rng,n,language,size))
+        else:
+            (parent/f"page-{n:05d}.md").write_text(_make_markdown(rng,n,size))
+
+    # Media is never read as a page, so its content doesn't matter
+    media = docs/"_media"
+    media.mkdir()
+    for n in range(spec.media_files):
+        (media/f"image-{n:04d}.bin").write_bytes(rng.randbytes(spec.media_bytes))
+
+    (directory/"docd.toml").write_text("\n".join([
+        "[source]",
+        f"max_depth = {spec.depth+1}",
+        "",
+        "[site]",
+        'name = "Benchmark Docs"',
+        'title = "Benchmark Docs"',
+        'footer = "Generated by docd benchmark"',
+        'author = "docd"',
+        "",
+        "[check]",
+        f"filter_phrases = '''\n{FILTER_PHRASE}\nrelease\n'''",
+        ""
+    ]))
+
+
+#-- Stages --------------------------------------------------------------------#
+
+class BenchmarkRun:
+    """
+    Runs the stages against one generated repo, keeping the times of every run.
+    """
+
+    def __init__(self, repo_dir, jobs=1, repeat=3, requests=50):
+        # Imported here so generating a repo doesn't need the build dependencies
+        from docd.cli import DocdRunContext, load_config
+
+        self.repo_dir = Path(repo_dir)
+        self.jobs = jobs
+        self.repeat = repeat
+        self.requests = requests
+
+        self.ctx = DocdRunContext()
+        self.ctx.IN_DOCD_SOURCE_REPO = True
+        self.ctx.DOCS_REPO_DIRPATH = self.repo_dir
+        self.ctx.DOCS_CONFIG_FILEPATH = self.repo_dir/"docd.toml"
+        self.ctx.DOCS_DOCS_DIRPATH = self.repo_dir/"docs/"
+        self.ctx.DOCS_DIST_DIRPATH = self.repo_dir/"_dist/"
+        self.config = load_config(self.ctx.DOCS_CONFIG_FILEPATH)
+
+        # stage name => list of seconds
+        self.stages = {}
+        # startup stage name => heavy packages it loaded
+        self.startup_heavy = {}
+
+    def _record(self, name, seconds):
+        self.stages.setdefault(name,[]).append(seconds)
+
+    def _time(self, name, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        result = fn(*args,**kwargs)
+        self._record(name,time.perf_counter()-t0)
+        return result
+
+    def _clean_dist(self):
+        if self.ctx.DOCS_DIST_DIRPATH.is_dir():
+            shutil.rmtree(self.ctx.DOCS_DIST_DIRPATH)
+
+    def _publisher(self, pool=None):
+        from docd.publisher import Publisher
+        pub = Publisher(self.ctx,self.config,render_pool=pool)
+        pub.build_dest_directory_structure()
+        return pub
+
+    def run(self):
+        from docd.renderpool import RenderPool
+        with RenderPool(self.jobs) as pool:
+            for _ in range(self.repeat):
+                self._clean_dist()
+                self._run_build_stages(pool)
+                self._run_filter_check(pool)
+                self._run_spa_shell()
+                asyncio.run(self._run_devserver_requests())
+                self._run_startup()
+        self._clean_dist()
+        return self.stages
+
+    def _run_build_stages(self, pool):
+        from docd.utils.sync import sync_directory
+        pub = self._publisher(pool)
+
+        # Walking the tree into nodes
+        self._time("walk",pub._build_set_of_doc_nodes)
+        files = [ e for e in pub.doc_nodes if e.kind == "file" ]
+        sources = { e.uri:(pub.SOURCE_ROOT/e.source_path).read_bytes() for e in files }
+
+        # Rendering alone, with the output thrown away
+        jobs = [ (e.uri,sources[e.uri],pub.FILE_MAP.get(Path(e.source_path).suffix,""),pub.code_page_limits) for e in files ]
+        def render():
+            for batch in pool.render(jobs):
+                pass
+        self._time("render",render)
+
+        # Writing the raw text copies the way the page build does
+        def raw_copy():
+            for uri,data in sources.items():
+                dest = pub.DEST_PAGES_TXT_DIR/f"{uri}.txt"
+                dest.parent.mkdir(parents=True,exist_ok=True)
+                with dest.open("wb") as f:
+                    f.write(data)
+        self._time("raw_copy",raw_copy)
+
+        # Media into an empty directory
+        media_dest = pub.DEST_MEDIA_DIR
+        shutil.rmtree(media_dest)
+        self._time("media_sync",sync_directory,pub.SOURCE_ROOT/"_media",media_dest,delete=True)
+
+        # The whole page build, from scratch and then with nothing changed
+        self._time("build_pages_full",pub.build_docs,incremental=False)
+        self._time("build_pages_unchanged",pub.build_docs,incremental=True)
+
+        # The search index, from scratch and then from the analysis cache
+        if pub.CACHE_SEARCH_ANALYSIS_FILE.is_file():
+            pub.CACHE_SEARCH_ANALYSIS_FILE.unlink()
+        self._time("search_index",pub.build_search_index)
+        self._time("search_index_cached",pub.build_search_index)
+
+        # The whole of `build-all`, from scratch
+        from docd.cli import build_all
+        self._clean_dist()
+        self._time("build_all",build_all,self.ctx,self.config,render_pool=pool)
+
+    def _run_filter_check(self, pool):
+        from docd.filtercheck import scan_directory
+        phrases = list(filter(len,self.config.check.filter_phrases.splitlines()))
+        self._time("filter_check",scan_directory,self.ctx.DOCS_DOCS_DIRPATH,phrases,pool=pool)
+
+    def _run_spa_shell(self, n=1000):
+        from docd.spa import render_spa_html
+        site = self.config.site
+        values = {
+            "__ROOT_URI__": site.root_uri,
+            "__TITLE__":    site.title,
+            "__AUTHOR__":   site.author,
+            "__NAME__" :    site.name,
+            "__FOOTER__":   site.footer,
+            "__HOME_URL__": site.home_addr,
+            "__CSS_FILE__": "/_resources/static/index.css",
+            "__JS_FILE__":  "/_resources/static/index.js"
+        }
+        t0 = time.perf_counter()
+        for _ in range(n):
+            render_spa_html(values)
+        self._record("spa_shell",(time.perf_counter()-t0)/n)
+
+    def _run_startup(self):
+        from docd.importtime import run_with_import_times, heavy_packages
+        # Run the cli from this checkout, whether or not docd is installed
+        env = dict(os.environ,PYTHONPATH=os.pathsep.join(filter(None,(
+            str(Path(__file__).resolve().parent.parent),os.environ.get("PYTHONPATH")))))
+        for name,command in STARTUP_COMMANDS.items():
+            argv = [ "-c",CLI_ENTRY,"-R",str(self.repo_dir),*command ]
+            self.ctx.DOCS_DIST_DIRPATH.mkdir(exist_ok=True)
+            # Once to see what it imports, which also warms the filter-check cache
+            code,records,other = run_with_import_times(argv,env=env,stdout=subprocess.DEVNULL)
+            if code != 0:
+                raise Exception(f"{name} failed with exit code {code}: {other.strip()}")
+            self.startup_heavy[name] = heavy_packages(records)
+            self.ctx.DOCS_DIST_DIRPATH.mkdir(exist_ok=True)
+            self._time(name,subprocess.run,[sys.executable,*argv],
+                stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL,env=env,check=True)
+
+    async def _run_devserver_requests(self):
+        import tornado.httpserver
+        import tornado.httpclient
+        import tornado.testing
+        from docd.devserver import DocdDevServer
+
+        # A fresh server each run, so the first requests find nothing cached
+        static_dir = Path(__file__).parent/"spa-framework-dist/dist/static"
+        server = DocdDevServer(
+            SPA_TEMPLATE= None,
+            FILE_PATHS= dict(_resources=self.ctx.DOCS_DIST_DIRPATH/"_resources",static=static_dir),
+            ROOT_URI= "",
+            PUBLISHER= self._publisher()
+        )
+        sock,port = tornado.testing.bind_unused_port()
+        http_server = tornado.httpserver.HTTPServer(server)
+        http_server.add_sockets([sock])
+        client = tornado.httpclient.AsyncHTTPClient()
+        base = f"http://127.0.0.1:{port}"
+
+        async def fetch(path):
+            t0 = time.perf_counter()
+            await client.fetch(base+path)
+            return time.perf_counter()-t0
+
+        try:
+            self._record("devserver_page_database",await fetch("/_resources/pages-database.json"))
+            publisher = server.page_renderer.publisher
+            uris = [ e.uri for e in publisher.doc_nodes if e.kind == "file" ]
+            sample = uris[::max(1,len(uris)//self.requests)][:self.requests]
+            cold = [ await fetch(f"/_resources/pages-html/{uri}.html") for uri in sample ]
+            warm = [ await fetch(f"/_resources/pages-html/{uri}.html") for uri in sample ]
+            self._record("devserver_page_cold",statistics.median(cold))
+            self._record("devserver_page_warm",statistics.median(warm))
+        finally:
+            http_server.stop()
+            client.close()
+
+
+#-- Results -------------------------------------------------------------------#
+
+def make_results(spec, stages, jobs, startup_heavy=None):
+    return {
+        "docd_benchmark_version": BENCHMARK_VERSION,
+        "spec": asdict(spec),
+        "jobs": jobs,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stages": { name:{ "seconds":min(runs), "runs":runs } for name,runs in stages.items() },
+        "startup_heavy": {} if startup_heavy is None else startup_heavy
+    }
+
+
+def check_startup_budget(results, budget):
+    """
+    The startup stages slower than `budget` seconds, or that loaded a heavy
+    package, as a list of messages.
+    """
+    failures = []
+    for name,stage in results["stages"].items():
+        if name.startswith("startup_") and budget > 0 and stage["seconds"] > budget:
+            failures.append(f"{name} took {stage['seconds']*1000:.1f} ms, over the {budget*1000:.0f} ms budget")
+    for name,heavy in results["startup_heavy"].items():
+        if len(heavy) > 0:
+            failures.append(f"{name} loaded {', '.join(heavy)}")
+    return failures
+
+
+def compare_results(results, baseline, threshold=0.10, min_seconds=0.001):
+    """
+    Compare results to a baseline, returning (rows, regressions). A stage has
+    regressed if it is slower by more than `threshold` as a fraction of the
+    baseline, and by more than `min_seconds`, which keeps tiny stages from
+    failing on noise.
+    """
+    rows = []
+    regressions = []
+    for name,stage in results["stages"].items():
+        base = baseline.get("stages",{}).get(name)
+        if base is None:
+            rows.append((name,None,stage["seconds"],None))
+            continue
+        ratio = stage["seconds"]/base["seconds"] if base["seconds"] > 0 else None
+        rows.append((name,base["seconds"],stage["seconds"],ratio))
+        if ratio is not None and ratio > 1+threshold and stage["seconds"]-base["seconds"] > min_seconds:
+            regressions.append(name)
+    return rows,regressions
+
+
+def _format_seconds(seconds):
+    return "-" if seconds is None else f"{seconds*1000:10.2f} ms"
+
+
+def print_results(results, rows=None):
+    if rows is None:
+        rows = [ (name,None,stage["seconds"],None) for name,stage in results["stages"].items() ]
+    width = max( len(e[0]) for e in rows )
+    for name,base,seconds,ratio in rows:
+        change = "" if ratio is None else f"  {(ratio-1)*100:+7.1f}%"
+        baseline = "" if base is None else f"  (baseline {_format_seconds(base)})"
+        print(f"{name:<{width}}  {_format_seconds(seconds)}{baseline}{change}")
+
+
+def run_benchmark(spec, jobs=1, repeat=3, requests=50, directory=None, output=None, baseline=None, threshold=0.10,
+        startup_budget=0.25):
+    """
+    Generate a repo, time every stage on it and optionally compare to a baseline.
+    Returns the process exit code, which is 1 if any stage regressed or a
+    lightweight command blew its startup budget.
+    """
+    keep = directory is not None
+    workdir = Path(tempfile.mkdtemp(prefix="docd-bench-")) if directory is None else Path(directory)
+    repo_dir = workdir/"repo" if not keep else workdir
+    try:
+        if not (repo_dir/"docd.toml").is_file():
+            t0 = time.perf_counter()
+            generate_synthetic_repo(repo_dir,spec)
+            print(f"Generated {spec.pages} sources in {time.perf_counter()-t0:.2f}s at {repo_dir}")
+        bench = BenchmarkRun(repo_dir,jobs=jobs,repeat=repeat,requests=requests)
+        stages = bench.run()
+    finally:
+        if not keep:
+            shutil.rmtree(workdir,ignore_errors=True)
+
+    results = make_results(spec,stages,jobs,startup_heavy=bench.startup_heavy)
+    if output is not None:
+        Path(output).write_text(json.dumps(results,indent=4))
+
+    over_budget = check_startup_budget(results,startup_budget)
+    for message in over_budget:
+        print(f"Over the startup budget: {message}")
+
+    if baseline is None:
+        print_results(results)
+        return 1 if len(over_budget) > 0 else 0
+
+    baseline = json.loads(Path(baseline).read_text())
+    if baseline.get("docd_benchmark_version") != BENCHMARK_VERSION:
+        print("WARNING: the baseline is from a different benchmark version")
+    if baseline.get("spec") != results["spec"] or baseline.get("jobs") != jobs:
+        print("WARNING: the baseline was run with a different spec or jobs")
+    rows,regressions = compare_results(results,baseline,threshold=threshold)
+    print_results(results,rows)
+    if len(regressions) > 0:
+        print(f"Regressed by more than {threshold*100:.0f}%: {', '.join(regressions)}")
+        return 1
+    return 1 if len(over_budget) > 0 else 0
+
+
+def spec_from_args(args):
+    # Any spec field given on the command line overrides the default
+    values = { f.name:getattr(args,f.name) for f in fields(SyntheticRepoSpec) if getattr(args,f.name,None) is not None }
+    return SyntheticRepoSpec(**values)
@@ -3,15 +3,34 @@
 
 import argparse
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import cache
 import shutil
 import toml
 import json
-from docd.utils.proc import proc, local_rsync
+from docd.utils.proc import proc
 from docd.utils.obj import DictObj
-from docd.utils.filetools import clear_directory, find_one_matching_file
-from docd.spa import render_spa_html
-from docd.publisher import Publisher
+from docd.utils.filetools import clear_directory, find_one_matching_file, atomic_open
+from docd.pagedb import PAGE_DATABASE_FORMATS
+from docd.textextract import SEARCH_CODE_MODES
+from docd.codepage import DEFAULT_CODE_PAGE_LIMITS
+from docd.profiler import BuildProfiler, NullProfiler
+# The publisher, spa and object store are imported by the commands that use
+# them, since the build stack loads markdown, pygments and lunr. Commands run
+# from hooks like `build-clean`, `filter-check` and `push-to-site` skip all of it.
+
+
+#-- Common Paths -------------------------------------------------------------------#
+
+HERE = Path(__file__).parent
+
+# spa-src/ paths
+SPA_SRC_DIR = (HERE/"../spa-src").resolve()
+SPA_SRC_STATIC_DIST_STATIC_DIR = SPA_SRC_DIR/"dist/static"
+# spa-framework-dist/ paths
+SPA_FRAMEWORK_DIST_DIR = (HERE/"spa-framework-dist/dist").resolve()
+SPA_FRAMEWORK_DIST_STATIC_DIR = SPA_FRAMEWORK_DIST_DIR/"static"
+SPA_FRAMEWORK_DIST_RESOURCES_JSON_FILE = SPA_FRAMEWORK_DIST_DIR/"static-resources.json"
 
 
 @dataclass
@@ -36,8 +55,23 @@ def load_config(config_fpath):
         config.source.max_depth = 100
     if not isinstance(config.source.max_depth,int):
         raise Exception("config.config.max_depth must be an integer")
+    if "media_hardlinks" not in config.source:
+        config.source.media_hardlinks = False
+    if "raw_hardlinks" not in config.source:
+        config.source.raw_hardlinks = False
+    if "skip" not in config.source:
+        config.source.skip = []
+    if not all( isinstance(e,str) for e in config.source.skip ):
+        raise Exception("config.source.skip must be a list of glob patterns")
+    # Size limits for pages rendered from code, see docd/codepage.py
+    for k,v in DEFAULT_CODE_PAGE_LIMITS._asdict().items():
+        k = f"code_{k}"
+        if k not in config.source:
+            setattr(config.source,k,v)
+        if not isinstance(config.source.get(k),int) or config.source.get(k) < 0:
+            raise Exception(f"config.source.{k} must be a whole number of bytes, or 0 for no limit")
     if "file_types" not in config.source:
-        config.file_types = {
+        config.source.file_types = {
             ".md":"markdown",
             ".py":"python",
             ".txt":"",
@@ -64,14 +98,34 @@ def load_config(config_fpath):
     else:
         assert config.site.root_uri.startswith("/")
         assert not config.site.root_uri.endswith("/")
+    # Check on the page database layout
+    if "page_database" not in config.site:
+        config.site.page_database = "single"
+    if config.site.page_database not in PAGE_DATABASE_FORMATS:
+        raise Exception(f"docd.toml `site.page_database` must be one of {', '.join(PAGE_DATABASE_FORMATS)}")
+    # Check on the object store, see docd/objectstore.py
+    if "object_store" not in config.site:
+        config.site.object_store = False
+    if not isinstance(config.site.object_store,bool):
+        raise Exception("docd.toml `site.object_store` must be true or false")
+
+    # Check on how code is searched
+    if "search" not in config:
+        config.search = DictObj({})
+    if "code" not in config.search:
+        config.search.code = "downweight"
+    if config.search.code not in SEARCH_CODE_MODES:
+        raise Exception(f"docd.toml `search.code` must be one of {', '.join(SEARCH_CODE_MODES)}")
 
     # Check on 'remote' attributes
     if "remote" not in config:
         config.remote = None
     else:
-        for k in ( "remote.user","remote.addr","remote.path" ):
-            if config.get_path(k) is None:
-                raise Exception(f"docd.toml missing `{k}`")
+        # Without `user` and `addr` the path is on this machine
+        if config.get_path("remote.path") is None:
+            raise Exception("docd.toml missing `remote.path`")
+        if ( config.get_path("remote.user") is None ) != ( config.get_path("remote.addr") is None ):
+            raise Exception("docd.toml needs both `remote.user` and `remote.addr`, or neither")
 
     # Check on 'check' attributes
     if "check" not in config:
@@ -82,6 +136,173 @@ def load_config(config_fpath):
     return config
 
 
+#-- Builds --------------------------------------------------------------------------#
+
+def set_repo_paths(ctx, repo_dir):
+    # Point the context at a docs repo
+    repo_dir = Path(repo_dir)
+    ctx.DOCS_REPO_DIRPATH = repo_dir
+    if not ctx.DOCS_REPO_DIRPATH.is_dir():
+        raise Exception(f"Not a directory: {repo_dir}")
+    ctx.DOCS_CONFIG_FILEPATH = repo_dir/"docd.toml"
+    if not ctx.DOCS_CONFIG_FILEPATH.is_file():
+        raise Exception(f"No docd.toml in {repo_dir}")
+    ctx.DOCS_DOCS_DIRPATH = repo_dir/"docs/"
+    if not ctx.DOCS_DOCS_DIRPATH.is_dir():
+        raise Exception(f"No docs/ directory in {repo_dir}")
+    ctx.DOCS_DIST_DIRPATH = repo_dir/"_dist/"
+    return ctx
+
+
+def compress_dist(dist_dir, profiler=None):
+    from docd.compress import precompress_directory
+    profiler = NullProfiler() if profiler is None else profiler
+    with profiler.stage("compress"):
+        n_compressed,n_current,n_removed = precompress_directory(dist_dir/"_resources")
+    print(f"Compress: {n_compressed} written, {n_current} current, {n_removed} stale removed")
+
+
+def build_spa_shell(config, dist_dir, profiler=None, store=None):
+    from docd.spa import render_spa_html
+    from docd.utils.sync import sync_directory
+    from docd.objectstore import ObjectStore, OBJECTS_DIRNAME
+    from docd.compress import COMPRESSED_SUFFIXES
+    profiler = NullProfiler() if profiler is None else profiler
+    if store is None and config.site.object_store:
+        store = ObjectStore(dist_dir/OBJECTS_DIRNAME)
+    with profiler.stage("spa"):
+        # Load the static info
+        static_info = json.loads(SPA_FRAMEWORK_DIST_RESOURCES_JSON_FILE.read_text())
+
+        # Make the spa html
+        spa_html = render_spa_html({
+            "__ROOT_URI__": config.site.root_uri,
+            "__TITLE__":    config.site.title,
+            "__AUTHOR__":   config.site.author,
+            "__NAME__" :    config.site.name,
+            "__FOOTER__":   config.site.footer,
+            "__HOME_URL__": config.site.home_addr,
+            "__CSS_FILE__": f"{config.site.root_uri}/_resources/static/{static_info['css_file_name']}",
+            "__JS_FILE__":  f"{config.site.root_uri}/_resources/static/{static_info['js_file_name']}"
+        })
+
+        # Write it to file
+        _DIST_SPA_FILE = dist_dir/"index.html"
+        with atomic_open(_DIST_SPA_FILE) as f:
+            f.write(spa_html)
+
+        # Sync over the static assets
+        _STATIC_DIR = dist_dir/"_resources/static"
+        _STATIC_DIR.mkdir(exist_ok=True,parents=True)
+        sync_directory(SPA_FRAMEWORK_DIST_STATIC_DIR,_STATIC_DIR,delete=True,store=store,keep_suffixes=COMPRESSED_SUFFIXES)
+
+        # Mark that this is managed by docd. Touching an existing marker would
+        # change the live one through a staging hardlink.
+        marker = dist_dir/".managed-by-docd"
+        if not marker.exists():
+            marker.touch()
+
+
+def build_all(ctx, config, incremental=False, jobs=1, profiler=None, render_pool=None, render_cache=None):
+    """
+    Build a whole site as a graph of stages, into a staging copy of _dist.
+    A `render_pool` and `render_cache` may be shared with other builds.
+    Returns the StageScheduler and the page counts, which are None if the
+    pages stage was skipped.
+    """
+    from docd.scheduler import Stage, StageScheduler, staged_directory, tree_fingerprint, file_fingerprint
+    from docd.walker import SkipPatterns
+    from docd.compress import available_encodings
+    from docd.utils.markdown2html import renderer_fingerprint
+    from docd.searchindex import SEARCH_INDEX_VERSION
+    from docd.pagedb import SHARDED_DATABASE_VERSION
+    from docd.objectstore import OBJECTS_DIRNAME
+    from docd.publisher import Publisher
+    profiler = NullProfiler() if profiler is None else profiler
+
+    # Build into a copy of _dist that only replaces it once everything succeeded.
+    # Even a full build starts from the live objects, so unchanged outputs keep
+    # their inodes and mtimes, and the store stage drops the ones left unused.
+    seed = (OBJECTS_DIRNAME,) if config.site.object_store else ()
+    with staged_directory(ctx.DOCS_DIST_DIRPATH,keep=incremental,seed=seed) as staging:
+        pub = Publisher(replace(ctx,DOCS_DIST_DIRPATH=staging),config,jobs=jobs,profiler=profiler,
+                        render_pool=render_pool,render_cache=render_cache)
+        pub.build_dest_directory_structure()
+
+        # What each stage reads from outside the build. Each is only taken when a
+        # stage could be skipped or once it ran, and then kept for the other stages.
+        # The sources are fingerprinted from the pages stage's walk when there was one.
+        config_key = file_fingerprint(ctx.DOCS_CONFIG_FILEPATH)
+
+        @cache
+        def docs_key():
+            fingerprint = pub.walk_fingerprint
+            if fingerprint is None:
+                fingerprint = tree_fingerprint(ctx.DOCS_DOCS_DIRPATH,skip=pub.skip_patterns,max_depth=pub.max_directory_depth)
+            return [ fingerprint, config_key, renderer_fingerprint(), SEARCH_INDEX_VERSION, SHARDED_DATABASE_VERSION ]
+
+        @cache
+        def media_key():
+            return [ tree_fingerprint(ctx.DOCS_DOCS_DIRPATH/"_media",skip=SkipPatterns(())), config_key ]
+
+        @cache
+        def spa_key():
+            return [ tree_fingerprint(SPA_FRAMEWORK_DIST_DIR,skip=SkipPatterns(())), config_key ]
+
+        # The search stage reuses the pages stage's walk, when there was one.
+        # Either only reads the sources whose stat moved since the last build.
+        # The page database is written once, by the search stage, since it
+        # points at the search index.
+        walked = []
+        def pages():
+            pub.build_docs(incremental=incremental,media=False,database=False)
+            walked.append(True)
+
+        def search():
+            pub.build_search_index(walk=not walked)
+
+        # These have no walk of their own to take the key from, so take it before reading
+        def media():
+            media_key()
+            pub.sync_media()
+
+        def spa():
+            spa_key()
+            build_spa_shell(config,staging,profiler=profiler,store=pub.store)
+
+        stages = [
+            Stage("media",media,
+                outputs = ("_resources/media",),
+                key = media_key),
+            Stage("pages",pages,
+                outputs = ("_resources/pages-html","_resources/pages-txt",".docd-cache/build-manifest.json"),
+                key = docs_key),
+            Stage("search",search,
+                inputs = ("_resources/pages-html",".docd-cache/build-manifest.json"),
+                outputs = ("_resources/search/serialized-index.json",".docd-cache/search-analysis.json",
+                           "_resources/pages-database.json"),
+                key = docs_key),
+            Stage("spa",spa,
+                outputs = ("index.html","_resources/static"),
+                key = spa_key),
+            Stage("compress",lambda: compress_dist(staging,profiler=profiler),
+                inputs = ("_resources",),
+                key = lambda: [ e[0] for e in available_encodings() ])
+        ]
+        # Objects can only be collected once every stage adding to the store is done
+        if pub.store is not None:
+            stages.append(Stage("store",pub.collect_store_garbage,
+                inputs = ("_resources",),
+                outputs = (OBJECTS_DIRNAME,)))
+        scheduler = StageScheduler(stages,staging,stamp_file=staging/".docd-cache"/"build-stages.json")
+        try:
+            scheduler.run()
+        finally:
+            pub.close()
+            print("\n".join(scheduler.report_lines()))
+    return scheduler,pub.page_counts
+
+
 def run_cli(IN_DOCD_SOURCE_REPO):
     __VERSION__ = "0.1.1"
 
@@ -91,35 +312,82 @@ def run_cli(IN_DOCD_SOURCE_REPO):
     parser = argparse.ArgumentParser(description="docd: For building awesome docs.")
     parser.add_argument("--version", action="version", version=f"%(prog)s {__VERSION__}")
     parser.add_argument("-R","--repo-directory",help="Root document repo directory. Defaults to cwd.",default=None)
+    parser.add_argument("--debug-imports",action="store_true",help="Rerun the command under `python -X importtime` and summarize its imports")
 
     # Create subparsers
     subparsers = parser.add_subparsers(help="sub-command help",dest="main_command")
     A = subparsers.add_parser
 
+    # Every build command can be profiled
+    def add_profile_arguments(a):
+        a.add_argument("--profile",action="store_true",help="Report where the build spent its time")
+        a.add_argument("--profile-top",type=int,default=10,help="Number of slowest pages to report")
+        a.add_argument("--profile-trace",default=None,help="Where to write the Chrome trace, defaults to _dist/.docd-cache/build-trace.json")
+
     # Main build commands
-    A("build-all", help="Build the entire system")
-    A("build-clean", help="Clean out the docd site")
-    A("build-pages", help="Build the rendered pages")
-    A("build-search", help="Build the search index")
-    A("build-spa", help="Build the dist spa")
+    a = A("build-all", help="Build the entire system")
+    a.add_argument("--incremental",action="store_true",help="Keep _dist and only rebuild changed pages")
+    a.add_argument("-j","--jobs",type=int,default=1,help="Worker processes for rendering, 0 for all cores")
+    add_profile_arguments(a)
+    a = A("build-clean", help="Clean out the docd site")
+    add_profile_arguments(a)
+    a = A("build-pages", help="Build the rendered pages")
+    a.add_argument("--full",action="store_true",help="Rebuild every page, ignoring the build manifest")
+    a.add_argument("-j","--jobs",type=int,default=1,help="Worker processes for rendering, 0 for all cores")
+    add_profile_arguments(a)
+    a = A("build-compress", help="Precompress the built resources with gzip/brotli")
+    add_profile_arguments(a)
+    a = A("build-search", help="Build the search index")
+    a.add_argument("-j","--jobs",type=int,default=1,help="Worker processes for analyzing documents, 0 for all cores")
+    a.add_argument("--verify",action="store_true",help="Check the index matches a plain serial build")
+    add_profile_arguments(a)
+    a = A("build-spa", help="Build the dist spa")
+    add_profile_arguments(a)
+    a = A("build-batch", help="Build many docs repos sharing one render pool and cache")
+    a.add_argument("repos",nargs="*",help="Docs repo directories, each with its own docd.toml")
+    a.add_argument("--from-file",help="File listing more repo directories, one per line")
+    a.add_argument("--incremental",action="store_true",help="Keep each _dist and only rebuild changed pages")
+    a.add_argument("-j","--jobs",type=int,default=1,help="Worker processes for rendering, 0 for all cores")
+    a.add_argument("--cache-mb",type=int,default=256,help="Rendered html to keep for sharing between sites")
 
     # Filter Check
     a = A("filter-check", help="Check docs for filter phrases")
     a.add_argument("-l","--files-only",action="store_true")
     a.add_argument("--case-sensitive",action="store_true")
+    a.add_argument("-j","--jobs",type=int,default=1,help="Worker processes for scanning files, 0 for all cores")
 
     # Dev Server
     a = A("devserver", help="Run the new server")
     a.add_argument("--port",default=8100)
     a.add_argument("--address",default="localhost")
+    a.add_argument("--prebuilt",action="store_true",help="Serve the last built pages instead of rendering from source")
 
     # Older
     a = A("push-to-site", help="Push docs to a remote site")
     a.add_argument("--force",action="store_true")
+    a.add_argument("--mode",choices=("rsync","release"),default="rsync",help="Sync in place, or send changes as a new release and switch to it")
+    a.add_argument("--keep",type=int,default=3,help="Releases to keep in release mode")
 
     # Developer Tools
     a = A("developer", help="Docd developer tools")
     a.add_argument("devcmd",choices=("clear-spa-framework","build-spa-framework"))
+    a = A("benchmark", help="Time each build stage on a generated docs repo")
+    a.add_argument("--pages",type=int,help="Number of sources to generate")
+    a.add_argument("--depth",type=int,help="Directory levels to generate")
+    a.add_argument("--fanout",type=int,help="Subdirectories in each directory")
+    a.add_argument("--code-fraction",type=float,help="Fraction of sources that are code")
+    a.add_argument("--page-bytes",type=int,help="Rough size of each source")
+    a.add_argument("--media-files",type=int,help="Number of _media files")
+    a.add_argument("--media-bytes",type=int,help="Size of each _media file")
+    a.add_argument("--seed",type=int,help="Seed for the generated content")
+    a.add_argument("-j","--jobs",type=int,default=1,help="Worker processes, 0 for all cores")
+    a.add_argument("--repeat",type=int,default=3,help="Runs of each stage, the fastest is kept")
+    a.add_argument("--requests",type=int,default=50,help="Pages to request from the devserver")
+    a.add_argument("--directory",help="Generate the repo here and keep it, or reuse it if already there")
+    a.add_argument("-o","--output",help="Write the results as JSON")
+    a.add_argument("--baseline",help="Results JSON to compare against")
+    a.add_argument("--threshold",type=float,default=0.10,help="Allowed slowdown against the baseline, as a fraction")
+    a.add_argument("--startup-budget",type=float,default=0.25,help="Seconds the lightweight commands may take from start to exit, 0 for no limit")
 
     #-- Process args -----------------------------------------------------------#
 
@@ -129,24 +397,21 @@ def run_cli(IN_DOCD_SOURCE_REPO):
         parser.print_help()
         exit(1)
 
-    #-- Generate Context -----------------------------------------------------------#
+    # Run the command again in an interpreter that times its imports
+    if args.debug_imports:
+        import sys
+        from docd.importtime import run_with_import_times, import_report_lines
+        code,records,other = run_with_import_times([ e for e in sys.argv if e != "--debug-imports" ])
+        sys.stderr.write(other)
+        print("\n".join(import_report_lines(records)))
+        exit(code)
 
-    HERE = Path(__file__).parent
+    #-- Generate Context -----------------------------------------------------------#
 
     # Make Context Object
     ctx = DocdRunContext()
     ctx.IN_DOCD_SOURCE_REPO = IN_DOCD_SOURCE_REPO
 
-    #-- Common Paths -------------------------------------------------------------------#
-
-    # spa-src/ paths
-    SPA_SRC_DIR = (HERE/"../spa-src").resolve()
-    SPA_SRC_STATIC_DIST_STATIC_DIR = SPA_SRC_DIR/"dist/static"
-    # spa-framework-dist/ paths
-    SPA_FRAMEWORK_DIST_DIR = (HERE/"spa-framework-dist/dist").resolve()
-    SPA_FRAMEWORK_DIST_STATIC_DIR = SPA_FRAMEWORK_DIST_DIR/"static"
-    SPA_FRAMEWORK_DIST_RESOURCES_JSON_FILE = SPA_FRAMEWORK_DIST_DIR/"static-resources.json"
-
     #-- Execute the Commands -----------------------------------------------------------#
 
     if "developer" == args.main_command:
@@ -184,81 +449,90 @@ def run_cli(IN_DOCD_SOURCE_REPO):
                 },indent=4))
 
 
+    elif "build-batch" == args.main_command:
+        import time
+        from docd.batch import read_repo_list, run_batch, summary_lines
+        repo_dirs = read_repo_list(args.repos,args.from_file)
+        if len(repo_dirs) == 0:
+            print("ERROR: No repos given.")
+            exit(1)
+        t0 = time.perf_counter()
+        results,cache = run_batch(repo_dirs,incremental=args.incremental,jobs=args.jobs,cache_bytes=args.cache_mb*1024*1024)
+        print("\n".join(summary_lines(results,cache,time.perf_counter()-t0)))
+        exit(1 if any( e.error is not None for e in results ) else 0)
+
+    elif "benchmark" == args.main_command:
+        from docd.benchmark import run_benchmark, spec_from_args
+        exit(run_benchmark(spec_from_args(args),
+            jobs=args.jobs,
+            repeat=args.repeat,
+            requests=args.requests,
+            directory=args.directory,
+            output=args.output,
+            baseline=args.baseline,
+            threshold=args.threshold,
+            startup_budget=args.startup_budget
+        ))
+
     else:
         # Determine the doc repo paths
         _repo = Path(args.repo_directory) if args.repo_directory is not None else Path.cwd()
-        ctx.DOCS_REPO_DIRPATH = _repo
-        assert ctx.DOCS_REPO_DIRPATH.is_dir()
-        ctx.DOCS_CONFIG_FILEPATH = _repo/"docd.toml"
-        assert ctx.DOCS_CONFIG_FILEPATH.is_file()
-        ctx.DOCS_DOCS_DIRPATH = _repo/"docs/"
-        assert ctx.DOCS_DOCS_DIRPATH.is_dir()
-        ctx.DOCS_DIST_DIRPATH = _repo/"_dist/"
+        set_repo_paths(ctx,_repo)
 
         # Load the config
         config = load_config(ctx.DOCS_CONFIG_FILEPATH)
 
+        # Time the build stages if asked to
+        profiler = BuildProfiler() if getattr(args,"profile",False) else NullProfiler()
+
         # Our build methods
 
         def build_clean():
             assert ctx.DOCS_DIST_DIRPATH.is_dir()
-            clear_directory(ctx.DOCS_DIST_DIRPATH)
+            with profiler.stage("clean"):
+                clear_directory(ctx.DOCS_DIST_DIRPATH)
 
-        def build_pages():
-            pub = Publisher(ctx,config)
+        def build_pages(incremental=True, jobs=1):
+            from docd.publisher import Publisher
+            pub = Publisher(ctx,config,jobs=jobs,profiler=profiler)
             pub.build_dest_directory_structure()
-            pub.build_docs()
-
-        def build_search():
-            pub = Publisher(ctx,config)
+            try:
+                pub.build_docs(incremental=incremental)
+                pub.collect_store_garbage()
+            finally:
+                pub.close()
+
+        def build_search(jobs=1, verify=False):
+            from docd.publisher import Publisher
+            pub = Publisher(ctx,config,jobs=jobs,profiler=profiler)
             pub.build_dest_directory_structure()
-            pub.build_search_index()
-
-        def build_spa():
-            # Load the static info
-            static_info = json.loads(SPA_FRAMEWORK_DIST_RESOURCES_JSON_FILE.read_text())
-
-            # Make the spa html
-            spa_html = render_spa_html({
-                "__ROOT_URI__": config.site.root_uri,
-                "__TITLE__":    config.site.title,
-                "__AUTHOR__":   config.site.author,
-                "__NAME__" :    config.site.name,
-                "__FOOTER__":   config.site.footer,
-                "__HOME_URL__": config.site.home_addr,
-                "__CSS_FILE__": f"{config.site.root_uri}/_resources/static/{static_info['css_file_name']}",
-                "__JS_FILE__":  f"{config.site.root_uri}/_resources/static/{static_info['js_file_name']}"
-            })
-
-            # Write it to file
-            _DIST_SPA_FILE = ctx.DOCS_DIST_DIRPATH/"index.html"
-            with _DIST_SPA_FILE.open("w") as f:
-                f.write(spa_html)
-
-            # Sync over the static assets
-            _STATIC_DIR = ctx.DOCS_DIST_DIRPATH/"_resources/static"
-            _STATIC_DIR.mkdir(exist_ok=True,parents=True)
-            local_rsync(SPA_FRAMEWORK_DIST_STATIC_DIR,_STATIC_DIR,delete=True)
-
-            # Touch that this is managed by docd
-            (ctx.DOCS_DIST_DIRPATH/".managed-by-docd").touch(exist_ok=True)
+            try:
+                pub.build_search_index(verify=verify)
+            finally:
+                pub.close()
+
+        def build_compress(dist_dir=ctx.DOCS_DIST_DIRPATH):
+            compress_dist(dist_dir,profiler=profiler)
+
+        def build_spa(dist_dir=ctx.DOCS_DIST_DIRPATH):
+            build_spa_shell(config,dist_dir,profiler=profiler)
 
         # Execute the command
         match args.main_command:
             case "build-all":
-                build_clean()
-                build_pages()
-                build_search()
-                build_spa()
+                build_all(ctx,config,incremental=args.incremental,jobs=args.jobs,profiler=profiler)
 
             case "build-clean":
                 build_clean()
 
             case "build-pages":
-                build_pages()
+                build_pages(incremental=not args.full,jobs=args.jobs)
+
+            case "build-compress":
+                build_compress()
 
             case "build-search":
-                build_search()
+                build_search(jobs=args.jobs,verify=args.verify)
 
             case "build-spa":
                 build_spa()
@@ -270,6 +544,8 @@ def run_cli(IN_DOCD_SOURCE_REPO):
 
                 import asyncio
                 from docd.devserver import DocdDevServer
+                from docd.spa import render_spa_html
+                from docd.publisher import Publisher
 
                 # Make a rendered spa template
                 # Leave off the css and js as those will be dynamically added
@@ -288,13 +564,18 @@ def run_cli(IN_DOCD_SOURCE_REPO):
                     static = SPA_SRC_STATIC_DIST_STATIC_DIR
                 )
 
+                # Render pages from their sources on request, unless asked not to
+                publisher = None if args.prebuilt else Publisher(ctx,config)
+
                 async def run_server():
                     server = DocdDevServer(
                         SPA_TEMPLATE= rendered_spa_html,
                         FILE_PATHS= FILE_PATHS,
-                        ROOT_URI= config.site.root_uri
+                        ROOT_URI= config.site.root_uri,
+                        PUBLISHER= publisher
                     )
                     server.listen(args.port,address=args.address)
+                    server.start_watcher()
                     print(f"Running at {args.address}:{args.port}")
                     await asyncio.Event().wait()
 
@@ -304,41 +585,52 @@ def run_cli(IN_DOCD_SOURCE_REPO):
                 from docd.filtercheck import run_filter_check
                 run_filter_check(ctx,config,
                     files_only=args.files_only,
-                    case_sensitive=args.case_sensitive
+                    case_sensitive=args.case_sensitive,
+                    jobs=args.jobs
                 )
 
             case "push-to-site":
+                from docd.deploy import DeployTarget, deploy_release
+
                 # Pull out info
                 remote = config.remote
                 if remote is None:
                     raise Exception("No remote is defined.")
-                user = remote.user
-                addr = remote.addr
-                remote_path = remote.path
+                target = DeployTarget.from_config(remote)
 
                 # Check if managed by docd
-                check_path = Path(remote_path)/".managed-by-docd"
-                cmd = f"ssh {user}@{addr} ls {check_path}"
-                c,o,e = proc(cmd)
-                if not args.force and c != 0:
+                if not args.force and not target.is_managed():
                     print("This path doesn't seem to be managed by docd. Use `--force` to force sync. Careful!!!")
                     exit(1)
 
-                # Assemble paths
-                src = f"{ctx.DOCS_DIST_DIRPATH}/."
-                dst = remote_path
-                if dst.endswith("/."):
-                    pass
-                elif dst.endswith("/"):
-                    dst += "."
+                # Either send only what changed as a new release and switch to it, or rsync in place
+                if args.mode == "release":
+                    deploy_release(ctx.DOCS_DIST_DIRPATH,target,keep=args.keep,
+                        cache_file=ctx.DOCS_DIST_DIRPATH/".docd-cache"/"deploy-hashes.json")
                 else:
-                    dst += "/."
-                assert src.endswith("/.") and not src.endswith("//.")
-                assert dst.endswith("/.") and not dst.endswith("//.")
-
-                # Make the rsync command and run it
-                cmd = f"rsync -avz --delete {src} {user}@{addr}:{dst}"
-                c,o,e = proc(cmd)
-                print(c,o,e)
-
-
+                    # Assemble paths
+                    src = f"{ctx.DOCS_DIST_DIRPATH}/."
+                    dst = target.rsync_dest
+                    if dst.endswith("/."):
+                        pass
+                    elif dst.endswith("/"):
+                        dst += "."
+                    else:
+                        dst += "/."
+                    assert src.endswith("/.") and not src.endswith("//.")
+                    assert dst.endswith("/.") and not dst.endswith("//.")
+
+                    # Make the rsync command and run it
+                    cmd = f"rsync -avz --delete --exclude=.docd-cache --exclude=.objects {src} {dst}"
+                    c,o,e = proc(cmd)
+                    print(c,o,e)
+
+        # Report where a profiled build spent its time
+        if profiler.enabled:
+            trace_file = args.profile_trace
+            if trace_file is None:
+                trace_file = ctx.DOCS_DIST_DIRPATH/".docd-cache"/"build-trace.json"
+            profiler.write_chrome_trace(trace_file)
+            print("Profile:")
+            print("\n".join(profiler.report_lines(top=args.profile_top)))
+            print(f"Trace written to {trace_file}, open it in https://ui.perfetto.dev")
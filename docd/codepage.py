@@ -0,0 +1,100 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Size limits for pages rendered from non-markdown sources, and the pieces to apply them.
+
+Generated code can run to megabytes, which takes seconds to highlight and
+gives html the SPA struggles to show. Sources over `page_bytes` are split at
+line breaks into parts of about that size, each written to its own file with
+links between them. Sources over `highlight_max_bytes` are shown as plain
+escaped text, and sources over `max_bytes` only get a note pointing at the
+raw view. A limit of 0 turns it off.
+"""
+
+# Python
+from collections import namedtuple
+from html import escape
+
+
+# Keep in step with the `source.code_*` defaults in `load_config`
+CodePageLimits = namedtuple("CodePageLimits",("page_bytes","highlight_max_bytes","max_bytes"))
+DEFAULT_CODE_PAGE_LIMITS = CodePageLimits(
+    page_bytes = 256*1024,
+    highlight_max_bytes = 2*1024*1024,
+    max_bytes = 16*1024*1024
+)
+
+
+def _over(size, limit):
+    return limit > 0 and size > limit
+
+
+def split_source(text, page_bytes):
+    """
+    Split text at line breaks into parts of about `page_bytes` each. A single
+    line longer than that is kept whole.
+    """
+    if page_bytes <= 0:
+        return [text]
+    parts = []
+    start = 0
+    while len(text)-start > page_bytes:
+        # Break after the last line that fits, or after a line too long to fit
+        end = text.rfind("\n",start,start+page_bytes)
+        if end < 0:
+            end = text.find("\n",start+page_bytes)
+            if end < 0:
+                break
+        parts.append(text[start:end+1])
+        start = end+1
+    parts.append(text[start:])
+    return parts
+
+
+def code_page_plan(size, limits):
+    # How to show a source of `size` bytes: "highlight", "plain" or "too_large"
+    if _over(size,limits.max_bytes):
+        return "too_large"
+    if _over(size,limits.highlight_max_bytes):
+        return "plain"
+    return "highlight"
+
+
+def plain_code_html(text):
+    # The same structure as highlighted code, without the tokens
+    return f'<div class="codehilite"><pre><span></span><code>{escape(text,quote=False)}</code></pre></div>'
+
+
+def too_large_html(size):
+    return (f'<p class="docd-notice">This file is too large to show here ({size/(1024*1024):.1f} MB). '
+            f'Switch to the raw view to read it.</p>')
+
+
+def part_navigation_html(n, n_parts, part_url):
+    """
+    The links between the parts of a split page, where `part_url(k)` is the url
+    of part k counting from 1. Links carry `data-docd-part` so the SPA can load
+    them in place.
+    """
+    def link(k, label):
+        return f'<a href="{escape(part_url(k))}" data-docd-part="{k}">{label}</a>'
+    items = [ f"Part {n} of {n_parts}" ]
+    if n > 1:
+        items.append(link(1,"first"))
+        items.append(link(n-1,"previous"))
+    if n < n_parts:
+        items.append(link(n+1,"next"))
+        items.append(link(n_parts,"last"))
+    return f'<nav class="docd-parts">{" | ".join(items)}</nav>'
+
+
+def with_part_navigation(parts, part_url):
+    # Each part with the links at its top and bottom, unless there is only one part
+    if len(parts) < 2:
+        return list(parts)
+    pages = []
+    for i,part in enumerate(parts):
+        nav = part_navigation_html(i+1,len(parts),part_url)
+        pages.append(f"{nav}\n{part}\n{nav}")
+    return pages
@@ -0,0 +1,91 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Writes precompressed .gz (and .br if brotli is available) copies of build artifacts.
+
+Each compressed copy is given the mtime of its source, which is how we tell if
+it is current and can be skipped on the next run.
+"""
+
+# Python
+from pathlib import Path
+import os
+import gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Only text-like artifacts are worth compressing
+COMPRESSIBLE_SUFFIXES = (".html",".txt",".json",".js",".css",".svg",".xml",".map")
+# What the compressed copies are named with, whether or not we can produce them
+COMPRESSED_SUFFIXES = (".gz",".br")
+
+def _gzip(data):
+    # mtime=0 keeps the output reproducible
+    return gzip.compress(data,compresslevel=9,mtime=0)
+
+def _brotli(data):
+    return brotli.compress(data,quality=11)
+
+def available_encodings():
+    # (suffix,compress function) pairs we can produce
+    encodings = [ (".gz",_gzip) ]
+    if brotli is not None:
+        encodings.append((".br",_brotli))
+    return encodings
+
+def remove_compressed_copies(filepath):
+    # Before a file is replaced, so a stale copy is never served in its place
+    for suffix in COMPRESSED_SUFFIXES:
+        try:
+            os.unlink(f"{filepath}{suffix}")
+        except FileNotFoundError:
+            pass
+
+def precompress_directory(directory, min_size=0):
+    """
+    Precompress every compressible file under `directory`, skipping files whose
+    compressed copies are already current and removing copies whose source is gone.
+    Returns (number compressed, number current, number removed).
+    """
+    directory = Path(directory)
+    encodings = available_encodings()
+
+    n_compressed = n_current = n_removed = 0
+    for dirpath,dirnames,filenames in os.walk(directory):
+        dirpath = Path(dirpath)
+        names = set(filenames)
+        for name in filenames:
+            filepath = dirpath/name
+
+            # Remove compressed copies left behind by a removed source
+            if name.endswith(COMPRESSED_SUFFIXES) and name[:-3].endswith(COMPRESSIBLE_SUFFIXES):
+                if name[:-3] not in names:
+                    filepath.unlink()
+                    n_removed += 1
+                continue
+
+            if not name.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            st = filepath.stat()
+            if st.st_size < min_size:
+                continue
+
+            data = None
+            for suffix,compress in encodings:
+                dest = dirpath/(name+suffix)
+                if dest.is_file() and dest.stat().st_mtime_ns == st.st_mtime_ns:
+                    n_current += 1
+                    continue
+                if data is None:
+                    data = filepath.read_bytes()
+                tmp = dest.with_name(dest.name+".tmp")
+                tmp.write_bytes(compress(data))
+                os.utime(tmp,ns=(st.st_atime_ns,st.st_mtime_ns))
+                os.replace(tmp,dest)
+                n_compressed += 1
+
+    return n_compressed,n_current,n_removed
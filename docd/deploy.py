@@ -0,0 +1,252 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Deploys `_dist` as releases that are switched in atomically.
+
+The target path becomes a symlink into a sibling releases directory:
+
+    .../html/docs -> .../html/.docs-releases/<release id>/
+
+Each release carries a `.docd-manifest.json` of its files and their hashes. A
+new release is seeded with hardlinks to the current one, only new or changed
+files are sent, and then the symlink is swapped with a rename so readers only
+ever see a whole release. The same shell steps run locally for a local path
+target, or over ssh for a remote one.
+"""
+
+# Python
+from pathlib import Path
+from datetime import datetime, timezone
+import os
+import io
+import json
+import shlex
+import tarfile
+import hashlib
+import posixpath
+import subprocess
+# Local
+from docd.utils.filetools import file_sha256
+
+
+# Bump when the manifest layout changes
+DEPLOY_MANIFEST_VERSION = 1
+DEPLOY_MANIFEST_NAME = ".docd-manifest.json"
+
+# Parts of _dist that are never deployed
+DEPLOY_EXCLUDE = (".docd-cache",".objects")
+
+q = shlex.quote
+
+
+#-- Target --------------------------------------------------------------------#
+
+class DeployTarget:
+
+    def __init__(self, path, user=None, addr=None):
+        path = path.rstrip("/")
+        if path.endswith("/."):
+            path = path[:-2]
+        self.path = path
+        self.user = user or None
+        self.addr = addr or None
+        parent,name = posixpath.split(self.path)
+        self.releases_dir = posixpath.join(parent,f".{name}-releases")
+
+    @classmethod
+    def from_config(cls, remote):
+        # Without an `addr` the path is on this machine
+        return cls(remote.path,user=remote.get("user"),addr=remote.get("addr"))
+
+    @property
+    def is_local(self):
+        return self.addr is None
+
+    @property
+    def host(self):
+        return self.addr if self.user is None else f"{self.user}@{self.addr}"
+
+    @property
+    def rsync_dest(self):
+        return self.path if self.is_local else f"{self.host}:{self.path}"
+
+    def _command(self, script):
+        if self.is_local:
+            return ["sh","-c",script]
+        return ["ssh",self.host,script]
+
+    def run(self, script, input=None):
+        r = subprocess.run(self._command(script),input=input,capture_output=True)
+        return r.returncode,r.stdout,r.stderr.decode("utf-8",errors="replace")
+
+    def check(self, script, input=None):
+        c,o,e = self.run(script,input=input)
+        if c != 0:
+            raise Exception(f"Deploy step failed on {self.rsync_dest}: {e.strip()}")
+        return o
+
+    def is_managed(self):
+        c,_,_ = self.run(f"test -e {q(self.path)}/.managed-by-docd")
+        return c == 0
+
+    def read_manifest(self):
+        c,o,_ = self.run(f"cat {q(self.path)}/{DEPLOY_MANIFEST_NAME}")
+        if c != 0:
+            return None
+        try:
+            manifest = json.loads(o)
+        except ValueError:
+            return None
+        if manifest.get("version") != DEPLOY_MANIFEST_VERSION:
+            return None
+        return manifest
+
+
+#-- Local Manifest ------------------------------------------------------------#
+
+def build_local_manifest(dist_dir, cache_file=None):
+    """
+    Describe every deployable file under `dist_dir` by its sha256, reusing
+    hashes from `cache_file` for files whose size and mtime haven't moved.
+    """
+    dist_dir = Path(dist_dir)
+    cache = {}
+    if cache_file is not None and Path(cache_file).is_file():
+        try:
+            cache = json.loads(Path(cache_file).read_text())
+        except ValueError:
+            cache = {}
+
+    files = {}
+    new_cache = {}
+    for dirpath,dirnames,filenames in os.walk(dist_dir):
+        if Path(dirpath) == dist_dir:
+            dirnames[:] = [ e for e in dirnames if e not in DEPLOY_EXCLUDE ]
+        dirnames.sort()
+        # Symlinked directories are sent as links
+        names = sorted(filenames) + [ e for e in dirnames if os.path.islink(os.path.join(dirpath,e)) ]
+        for name in names:
+            filepath = os.path.join(dirpath,name)
+            relpath = Path(filepath).relative_to(dist_dir).as_posix()
+            if relpath == DEPLOY_MANIFEST_NAME:
+                continue
+            if os.path.islink(filepath):
+                files[relpath] = { "link": os.readlink(filepath) }
+                continue
+            st = os.stat(filepath)
+            cached = cache.get(relpath)
+            if cached is not None and cached[:2] == [st.st_size,st.st_mtime_ns]:
+                sha256 = cached[2]
+            else:
+                sha256 = file_sha256(filepath)
+            new_cache[relpath] = [st.st_size,st.st_mtime_ns,sha256]
+            files[relpath] = { "sha256": sha256, "size": st.st_size }
+
+    if cache_file is not None:
+        Path(cache_file).parent.mkdir(parents=True,exist_ok=True)
+        Path(cache_file).write_text(json.dumps(new_cache,indent=None))
+
+    raw = json.dumps(files,sort_keys=True).encode("utf-8")
+    return {
+        "version": DEPLOY_MANIFEST_VERSION,
+        "release": None,
+        "content_hash": hashlib.sha256(raw).hexdigest()[:16],
+        "files": files
+    }
+
+
+#-- Deploy --------------------------------------------------------------------#
+
+def _make_release_id(manifest):
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return f"{stamp}-{manifest['content_hash']}"
+
+
+def _send_files(target, dist_dir, release_dir, relpaths, manifest):
+    # Stream a tar of the files into the release, with the manifest last
+    compress = not target.is_local
+    mode = "w|gz" if compress else "w|"
+    flags = "-xzf" if compress else "-xf"
+    proc = subprocess.Popen(target._command(f"tar {flags} - -C {q(release_dir)}"),
+        stdin=subprocess.PIPE,stdout=subprocess.DEVNULL,stderr=subprocess.PIPE)
+    try:
+        with tarfile.open(fileobj=proc.stdin,mode=mode) as tar:
+            for relpath in relpaths:
+                tar.add(Path(dist_dir)/relpath,arcname=relpath,recursive=False)
+            data = json.dumps(manifest,indent=None).encode("utf-8")
+            info = tarfile.TarInfo(DEPLOY_MANIFEST_NAME)
+            info.size = len(data)
+            info.mtime = int(datetime.now(timezone.utc).timestamp())
+            info.mode = 0o644
+            tar.addfile(info,io.BytesIO(data))
+    finally:
+        proc.stdin.close()
+        stderr = proc.stderr.read().decode("utf-8",errors="replace")
+        proc.wait()
+    if proc.returncode != 0:
+        raise Exception(f"Sending files to {target.rsync_dest} failed: {stderr.strip()}")
+
+
+def deploy_release(dist_dir, target, keep=3, cache_file=None):
+    """
+    Deploy `dist_dir` to `target` as a new release, sending only the files
+    that differ from the current release, then switch to it and prune all
+    but the newest `keep` releases.
+    """
+    manifest = build_local_manifest(dist_dir,cache_file=cache_file)
+    current = target.read_manifest()
+    current_files = {} if current is None else current["files"]
+
+    # Diff against what's live
+    changed = [ k for k,v in manifest["files"].items() if current_files.get(k) != v ]
+    removed = [ k for k in current_files if k not in manifest["files"] ]
+    n_bytes = sum( manifest["files"][k].get("size",0) for k in changed )
+    print(f"Deploy: {len(changed)} new or changed ({n_bytes} bytes), {len(removed)} removed, "
+          f"{len(manifest['files'])-len(changed)} unchanged")
+    if current is not None and len(changed) == 0 and len(removed) == 0:
+        print(f"Release {current['release']} is already current")
+        # A lower `keep` still applies
+        _prune_releases(target,current["release"],keep)
+        return current["release"]
+
+    release_id = _make_release_id(manifest)
+    manifest["release"] = release_id
+    release_dir = posixpath.join(target.releases_dir,release_id)
+
+    # Seed the release with hardlinks to the current one, minus what we replace
+    script = f"set -e; mkdir -p {q(release_dir)}; "
+    if current is not None and current.get("release"):
+        current_dir = posixpath.join(target.releases_dir,current["release"])
+        script += f"if [ -d {q(current_dir)} ]; then cp -al {q(current_dir)}/. {q(release_dir)}/; fi; "
+    script += f"cd {q(release_dir)}; xargs -0 rm -f -- ; find . -mindepth 1 -type d -empty -delete"
+    stale = "\0".join( changed + removed + [DEPLOY_MANIFEST_NAME] ) + "\0"
+    target.check(script,input=stale.encode("utf-8"))
+
+    # Send what changed
+    _send_files(target,dist_dir,release_dir,changed,manifest)
+
+    # Swap the symlink with a rename. The first time, the path may still be a
+    # plain directory, which we keep as the oldest release.
+    path = q(target.path)
+    tmp_link = q(target.path+".docd-tmp")
+    target.check(
+        f"set -e; "
+        f"if [ -e {path} ] && [ ! -L {path} ]; then mv {path} {q(posixpath.join(target.releases_dir,'00000000T000000-initial'))}; fi; "
+        f"ln -sfn {q(release_dir)} {tmp_link}; "
+        f"mv -T {tmp_link} {path}"
+    )
+    print(f"Activated release {release_id}")
+
+    _prune_releases(target,release_id,keep)
+    return release_id
+
+
+def _prune_releases(target, release_id, keep):
+    # Remove the oldest releases, never the live one, until `keep` are left
+    listing = target.check(f"ls -1 {q(target.releases_dir)}").decode("utf-8").split()
+    releases = sorted( e for e in listing if e != release_id )
+    prune = releases[:max(0,len(releases)-(keep-1))]
+    if len(prune) > 0:
+        target.check("rm -rf -- " + " ".join( q(posixpath.join(target.releases_dir,e)) for e in prune ))
+    print(f"Pruned {len(prune)} old release(s)")
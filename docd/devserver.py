@@ -6,28 +6,383 @@ Simple http file server.
 """
 
 from pathlib import Path
+import os
 import json
+import hashlib
 import asyncio
+import mimetypes
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import tornado
+import tornado.websocket
 # Local
 from docd.spa import render_spa_html
-from docd.utils.filetools import find_one_matching_file
+from docd.utils.filetools import find_one_matching_file, decode_text
+from docd.renderpool import render_source_parts
+from docd.walker import walk_source_tree
+from docd.searchindex import SearchAnalysisCache, build_search_index
+from docd.watcher import make_watcher
 
 
-class MainHandler(tornado.web.RequestHandler):
+def make_etag(content):
+    # A strong validator for the exact bytes we send
+    if isinstance(content,str):
+        content = content.encode("utf-8")
+    return f'"{hashlib.sha1(content).hexdigest()}"'
+
+
+class CachedContentMixin:
+    """
+    Writes content whose ETag was computed when it was cached, answering
+    conditional requests with a 304 before writing anything.
+    """
+
+    def write_with_etag(self, content, etag):
+        self.set_header("Etag",etag)
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        self.write(content)
+
+
+class MainHandler(CachedContentMixin, tornado.web.RequestHandler):
     def get(self, path):
-        pkg = self.application.fetch_static_paths()
-        html = render_spa_html(pkg,template_text=self.application.SPA_TEMPLATE)
-        self.write(html)
+        html,etag = self.application.get_spa_shell()
+        self.write_with_etag(html,etag)
+
+
+class LiveReloadHandler(tornado.websocket.WebSocketHandler):
+    """
+    Open SPA tabs connect here to be told what changed.
+    """
+
+    def open(self):
+        self.application.live_reload_clients.add(self)
+
+    def on_close(self):
+        self.application.live_reload_clients.discard(self)
+
+
+class RenderedPageHandler(CachedContentMixin, tornado.web.RequestHandler):
+    """
+    Renders pages-html/ and pages-txt/ requests straight from the source file.
+    """
+
+    def initialize(self, kind):
+        self.kind = kind
+
+    async def get(self, uri):
+        page = await self.application.page_renderer.get_page(uri,self.kind)
+        if page is None:
+            raise tornado.web.HTTPError(404)
+        if self.kind == "html":
+            self.set_header("Content-Type","text/html; charset=UTF-8")
+        else:
+            self.set_header("Content-Type","text/plain; charset=UTF-8")
+        self.write_with_etag(*page)
+
+
+class PagePartHandler(CachedContentMixin, tornado.web.RequestHandler):
+    """
+    Renders the later parts of a code page that was split for size.
+    """
+
+    async def get(self, uri, n):
+        page = await self.application.page_renderer.get_page(uri,"html",int(n))
+        if page is None:
+            raise tornado.web.HTTPError(404)
+        self.set_header("Content-Type","text/html; charset=UTF-8")
+        self.write_with_etag(*page)
+
+
+class PageDatabaseHandler(CachedContentMixin, tornado.web.RequestHandler):
+    async def get(self):
+        content,etag = await self.application.page_renderer.get_page_database()
+        self.set_header("Content-Type","application/json")
+        self.write_with_etag(content,etag)
+
+
+class PageDatabaseShardHandler(CachedContentMixin, tornado.web.RequestHandler):
+    async def get(self, shard_hash):
+        shard = await self.application.page_renderer.get_page_database_shard(shard_hash)
+        if shard is None:
+            raise tornado.web.HTTPError(404)
+        self.set_header("Content-Type","application/json")
+        self.write_with_etag(*shard)
+
+
+class DevPageRenderer:
+    """
+    Renders pages on demand for the devserver, off the event loop, keeping
+    recent results and their ETags in an LRU cache keyed by source path and mtime.
+    """
+
+    def __init__(self, publisher, executor=None, max_entries=256):
+        self.publisher = publisher
+        self.executor = ThreadPoolExecutor(max_workers=2) if executor is None else executor
+        self.max_entries = max_entries
+
+        # (source path, mtime_ns, kind) => [(content, etag) for each part]
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # The walked tree and the signature of its directories when walked
+        self._lock = threading.Lock()
+        self._tree_signature = None
+        self._nodes_by_uri = {}
+        self._page_database = None
+        self._page_database_shards = {}
+
+        # The pages as of the last change we handled
+        self._known_uris = None
+
+        # Search documents by uri and their analysis, loaded on the first change
+        self._search_documents = None
+        self._search_cache = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor,fn,*args)
+
+    #-- Page Database -----------------------------------------------------#
+
+    def _current_tree_signature(self):
+        # Adding, removing or renaming entries changes their directory's mtime
+        publisher = self.publisher
+        entries = walk_source_tree(publisher.SOURCE_ROOT,max_depth=publisher.max_directory_depth,
+            skip=publisher.skip_patterns,include_files=False)
+        return tuple( (e.relpath,e.stat.st_mtime_ns) for e in entries )
+
+    def _refresh_tree(self):
+        with self._lock:
+            signature = self._current_tree_signature()
+            if signature != self._tree_signature:
+                self.publisher._build_set_of_doc_nodes()
+                self._nodes_by_uri = { e.uri:e for e in self.publisher.doc_nodes if e.kind == "file" }
+                self._page_database = None
+                self._tree_signature = signature
+
+    def _load_page_database(self):
+        self._refresh_tree()
+        with self._lock:
+            if self._page_database is None:
+                chunks,shards = self.publisher.page_database_content()
+                content = "".join(chunks)
+                self._page_database = (content,make_etag(content))
+                self._page_database_shards = { k:(v,make_etag(v)) for k,v in shards.items() }
+            return self._page_database
+
+    async def get_page_database(self):
+        return await self._run(self._load_page_database)
+
+    def _load_page_database_shard(self, shard_hash):
+        # Shards are named by content, so an unknown one may be from a newer tree
+        self._load_page_database()
+        return self._page_database_shards.get(shard_hash)
+
+    async def get_page_database_shard(self, shard_hash):
+        return await self._run(self._load_page_database_shard,shard_hash)
+
+    #-- Pages -------------------------------------------------------------#
+
+    def _lookup(self, uri):
+        node = self._nodes_by_uri.get(uri)
+        if node is None:
+            # Maybe it's new, so check the tree again
+            self._refresh_tree()
+            node = self._nodes_by_uri.get(uri)
+        return node
+
+    def _load_page(self, uri, kind, n=1):
+        # Part n of a page, counting from 1
+        parts = self._load_page_parts(uri,kind)
+        if parts is None or not 1 <= n <= len(parts):
+            return None
+        return parts[n-1]
+
+    def _load_page_parts(self, uri, kind):
+        node = self._lookup(uri)
+        if node is None:
+            return None
+        source = self.publisher.SOURCE_ROOT/node.source_path
+        try:
+            mtime_ns = source.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        # Serve from the cache if the source hasn't changed
+        key = (str(source),mtime_ns,kind)
+        with self._cache_lock:
+            parts = self._cache.get(key)
+            if parts is not None:
+                self._cache.move_to_end(key)
+                return parts
+
+        # Otherwise render and cache it
+        data = source.read_bytes()
+        if kind == "html":
+            publisher = self.publisher
+            language = publisher.FILE_MAP.get(source.suffix,"")
+            contents = render_source_parts(decode_text(data),language,publisher.code_page_limits)
+            contents = publisher._link_page_parts(uri,contents,None)
+        else:
+            contents = [data]
+        parts = [ (e,make_etag(e)) for e in contents ]
+        with self._cache_lock:
+            self._cache[key] = parts
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return parts
+
+    async def get_page(self, uri, kind, n=1):
+        return await self._run(self._load_page,uri,kind,n)
+
+    #-- Changes -----------------------------------------------------------#
+
+    def start_tracking_changes(self):
+        # Note the current pages so we can tell what a change added or removed
+        self._refresh_tree()
+        self._known_uris = set(self._nodes_by_uri)
+
+    def _apply_changes(self, paths):
+        """
+        Bring everything up to date with a set of changed paths, rendering the
+        changed pages and updating the search index for just those documents.
+        Returns the uris of pages that were changed, added or removed.
+        """
+        self._refresh_tree()
+        nodes_by_uri = self._nodes_by_uri
+        old_uris = set(nodes_by_uri) if self._known_uris is None else self._known_uris
+        self._known_uris = set(nodes_by_uri)
+
+        # Match the paths to pages
+        paths = { os.path.abspath(e) for e in paths }
+        source_root = self.publisher.SOURCE_ROOT
+        changed = { uri for uri,node in nodes_by_uri.items()
+                    if os.path.abspath(source_root/node.source_path) in paths }
+        changed.update( e for e in nodes_by_uri if e not in old_uris )
+        removed = old_uris - set(nodes_by_uri)
+        if len(changed) == 0 and len(removed) == 0:
+            return []
+
+        # Render the changed pages now so reloading tabs don't wait on them
+        for uri in sorted(changed):
+            try:
+                self._load_page(uri,"html")
+            except Exception as e:
+                print(f"ERROR rendering {uri}: {e}")
+
+        self._update_search_index(changed)
+        with self._lock:
+            self._page_database = None
+        return sorted(changed|removed)
+
+    def _update_search_index(self, changed):
+        publisher = self.publisher
+        nodes_by_uri = self._nodes_by_uri
+
+        # Read every document the first time, and only changed ones after that
+        if self._search_documents is None:
+            self._search_cache = SearchAnalysisCache.load(publisher.CACHE_SEARCH_ANALYSIS_FILE)
+            self._search_documents = {}
+            changed = nodes_by_uri
+        documents = {}
+        for uri,node in nodes_by_uri.items():
+            doc = self._search_documents.get(uri)
+            if doc is None or uri in changed:
+                try:
+                    data = (publisher.SOURCE_ROOT/node.source_path).read_bytes()
+                except FileNotFoundError:
+                    continue
+                doc = publisher._make_search_document(node,data)
+            documents[uri] = doc
+        self._search_documents = documents
+
+        # Only the changed documents are analyzed again
+        serialized_index,n_analyzed = build_search_index(list(documents.values()),self._search_cache)
+        publisher.DEST_SEARCH_DIR.mkdir(parents=True,exist_ok=True)
+        publisher._write_search_index(serialized_index)
+        self._search_cache.save()
+
+    async def apply_changes(self, paths):
+        return await self._run(self._apply_changes,paths)
+
+
+class PrecompressedStaticFileHandler(tornado.web.StaticFileHandler):
+    """
+    Serves the precompressed .br or .gz copy of a file when the client accepts it.
+    """
+
+    ENCODINGS = ( ("br",".br"), ("gzip",".gz") )
+
+    # abspath => ((mtime_ns, size), version), so we only hash files that changed
+    _content_versions = {}
+
+    def parse_url_path(self, url_path):
+        path = super().parse_url_path(url_path)
+        self._content_encoding = None
+        self._original_path = path
+        accepted = self._accepted_encodings()
+        for encoding,suffix in self.ENCODINGS:
+            if encoding in accepted and os.path.isfile(os.path.join(self.root,path+suffix)):
+                self._content_encoding = encoding
+                return path+suffix
+        return path
+
+    def _accepted_encodings(self):
+        accepted = set()
+        for part in self.request.headers.get("Accept-Encoding","").split(","):
+            name,_,params = part.strip().partition(";")
+            if params.replace(" ","") in ("q=0","q=0.0","q=0.00","q=0.000"):
+                continue
+            accepted.add(name.strip().lower())
+        return accepted
+
+    @classmethod
+    def get_content_version(cls, abspath):
+        # The ETag is a hash of the whole file, which tornado would redo for every request
+        st = os.stat(abspath)
+        stamp = (st.st_mtime_ns,st.st_size)
+        cached = cls._content_versions.get(abspath)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        version = super().get_content_version(abspath)
+        cls._content_versions[abspath] = (stamp,version)
+        return version
+
+    def get_content_type(self):
+        if self._content_encoding is None:
+            return super().get_content_type()
+        # Type the response as the original file
+        mime_type,_ = mimetypes.guess_type(self._original_path)
+        return "application/octet-stream" if mime_type is None else mime_type
+
+    def set_extra_headers(self, path):
+        self.set_header("Vary","Accept-Encoding")
+        if self._content_encoding is not None:
+            self.set_header("Content-Encoding",self._content_encoding)
 
 
 class DocdDevServer(tornado.web.Application):
 
-    def __init__(self, SPA_TEMPLATE=None, FILE_PATHS=None, ROOT_URI=None):
+    def __init__(self, SPA_TEMPLATE=None, FILE_PATHS=None, ROOT_URI=None, PUBLISHER=None):
         self.SPA_TEMPLATE  = SPA_TEMPLATE
         self.FILE_PATHS = FILE_PATHS
         self.ROOT_URI = ROOT_URI
 
+        # With a publisher we render pages from source instead of serving the last build
+        self.page_renderer = None if PUBLISHER is None else DevPageRenderer(PUBLISHER)
+
+        # Live reload
+        self.LIVE_RELOAD_URI = f"{self.ROOT_URI}/_docd/live-reload"
+        self.live_reload_clients = set()
+        self._watcher = None
+        self._change_lock = None
+
+        # The rendered SPA shell, with the static directory mtime it was rendered for
+        self._spa_shell = None
+        self._spa_shell_stamp = None
+
         self._handlers = []
         self._settings = {}
 
@@ -35,11 +390,23 @@ class DocdDevServer(tornado.web.Application):
         super().__init__(self._handlers,**self._settings)
 
     def initialize(self):
+        # On demand page handlers
+        if self.page_renderer is not None:
+            self._handlers += [
+                (rf"^{self.ROOT_URI}/_resources/pages-database.json", PageDatabaseHandler),
+                (rf"^{self.ROOT_URI}/_resources/pages-database/([0-9a-f]+)\.json", PageDatabaseShardHandler),
+                (rf"^{self.ROOT_URI}/_resources/pages-html/(.*)\.html", RenderedPageHandler, {"kind": "html"}),
+                (rf"^{self.ROOT_URI}/_resources/pages-html-parts/(.*)/([0-9]+)\.html", PagePartHandler),
+                (rf"^{self.ROOT_URI}/_resources/pages-txt/(.*)\.txt", RenderedPageHandler, {"kind": "txt"}),
+            ]
+
         # Handlers
         self._handlers += [
+            # Live reload notifications
+            (rf"^{self.LIVE_RELOAD_URI}", LiveReloadHandler),
             # File Handlers
-            (rf"^{self.ROOT_URI}/_resources/static/(.*)", tornado.web.StaticFileHandler, {"path": self.FILE_PATHS["static"]}),
-            (rf"^{self.ROOT_URI}/_resources/(.*)", tornado.web.StaticFileHandler, {"path": self.FILE_PATHS["_resources"]}),
+            (rf"^{self.ROOT_URI}/_resources/static/(.*)", PrecompressedStaticFileHandler, {"path": self.FILE_PATHS["static"]}),
+            (rf"^{self.ROOT_URI}/_resources/(.*)", PrecompressedStaticFileHandler, {"path": self.FILE_PATHS["_resources"]}),
             # Catch the rest of it as an SPA
             (fr"^{self.ROOT_URI}/(.*)", MainHandler),
         ]
@@ -50,6 +417,19 @@ class DocdDevServer(tornado.web.Application):
             autoreload= True
         )
 
+    def get_spa_shell(self):
+        # Rendering needs directory globs, so only redo it when the bundle changes
+        stamp = os.stat(self.FILE_PATHS["static"]).st_mtime_ns
+        if self._spa_shell is None or stamp != self._spa_shell_stamp:
+            pkg = self.fetch_static_paths()
+            html = render_spa_html(pkg,template_text=self.SPA_TEMPLATE)
+            # Tell the SPA where to listen for changes
+            live_reload = f'<script type="text/javascript">window.$LIVE_RELOAD_URI = "{self.LIVE_RELOAD_URI}";</script>'
+            html = html.replace("</head>",f"    {live_reload}\n</head>",1)
+            self._spa_shell = (html,make_etag(html))
+            self._spa_shell_stamp = stamp
+        return self._spa_shell
+
     def fetch_static_paths(self):
         # Find the paths
         JS_FILE = find_one_matching_file(self.FILE_PATHS["static"],"*.js")
@@ -60,3 +440,47 @@ class DocdDevServer(tornado.web.Application):
             "__JS_FILE__":  f"{self.ROOT_URI}/_resources/static/{JS_FILE.name}",
             "__CSS_FILE__": f"{self.ROOT_URI}/_resources/static/{CSS_FILE.name}",
         }
+
+    #-- Watching for Changes ----------------------------------------------#
+
+    def start_watcher(self):
+        # Must be called with the event loop running
+        roots = [ self.FILE_PATHS["static"] ]
+        skip = None
+        if self.page_renderer is not None:
+            roots.append(self.page_renderer.publisher.SOURCE_ROOT)
+            skip = self.page_renderer.publisher.skip_patterns
+            self.page_renderer.start_tracking_changes()
+        self._change_lock = asyncio.Lock()
+        self._watcher = make_watcher(roots,self._on_changes,skip=skip)
+        self._watcher.start()
+        print(f"Watching for changes with {type(self._watcher).__name__}")
+
+    async def _on_changes(self, paths):
+        # Handle one batch at a time
+        async with self._change_lock:
+            static_dir = os.path.abspath(self.FILE_PATHS["static"])
+            if any( os.path.abspath(e).startswith(static_dir+os.sep) for e in paths ):
+                # A new bundle means the tabs need a new shell
+                print("Static bundle changed, reloading")
+                self._spa_shell = None
+                self._broadcast({"type": "reload"})
+                return
+            if self.page_renderer is None:
+                return
+            try:
+                uris = await self.page_renderer.apply_changes(paths)
+            except Exception as e:
+                print(f"ERROR updating after changes: {e}")
+                return
+            if len(uris) > 0:
+                print(f"Updated {len(uris)} page(s): {', '.join(uris)}")
+                self._broadcast({"type": "pages", "uris": uris})
+
+    def _broadcast(self, message):
+        message = json.dumps(message)
+        for client in list(self.live_reload_clients):
+            try:
+                client.write_message(message)
+            except tornado.websocket.WebSocketClosedError:
+                self.live_reload_clients.discard(client)
@@ -3,50 +3,286 @@
 
 """
 A tool to check a directory for files containing phrases
+
+All the phrases are compiled into one trie shaped regex, so each file is read
+and scanned once no matter how many phrases there are. Only the lines that hit
+are then checked phrase by phrase for the report. Scan results are cached per
+file, keyed by content hash, for as long as the phrases stay the same.
+
+Like grep, a file with a NUL byte near its start is binary, and only reports
+whether it matches. Binary files, which can be large media, are read in chunks
+rather than all at once.
 """
 
 # Python
 from pathlib import Path
+from functools import partial
+import os
+import re
+import json
+import hashlib
 # Local
-from docd.utils.proc import proc
+from docd.renderpool import RenderPool
+from docd.utils.filetools import atomic_open, file_sha256
+
+
+# Bump when the scan results change for the same phrases
+FILTER_CHECK_VERSION = 2
+
+# How much of a file decides if it is binary, and the size binary files are read in
+SCAN_CHUNK_BYTES = 1024*1024
+
+# grep's default colors
+COLOR_FILE = "\033[35m\033[K"
+COLOR_LINE_NUMBER = "\033[32m\033[K"
+COLOR_SEPARATOR = "\033[36m\033[K"
+COLOR_MATCH = "\033[01;31m\033[K"
+COLOR_END = "\033[m\033[K"
+
+
+#-- Matching ------------------------------------------------------------------#
+
+def make_trie_pattern(phrases):
+    # Share common prefixes so the regex engine doesn't try every phrase at every position
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch,{})
+        node[""] = None
+
+    def emit(node):
+        is_end = "" in node
+        alternatives = [ re.escape(ch)+emit(child) for ch,child in sorted(node.items()) if ch != "" ]
+        if len(alternatives) == 0:
+            return ""
+        if len(alternatives) == 1 and not is_end:
+            return alternatives[0]
+        group = "(?:"+"|".join(alternatives)+")"
+        return group+"?" if is_end else group
+
+    return emit(trie)
+
+
+def _flags(case_sensitive):
+    return 0 if case_sensitive else re.IGNORECASE
+
+
+# Each worker process keeps the matchers it has compiled
+_MATCHERS = {}
+
+def _get_matcher(phrases, case_sensitive):
+    key = (phrases,case_sensitive)
+    matcher = _MATCHERS.get(key)
+    if matcher is None:
+        matcher = _MATCHERS[key] = re.compile(make_trie_pattern(phrases),_flags(case_sensitive))
+    return matcher
+
+
+def scan_text(matcher, text):
+    """
+    Return [line number, line] for every line with at least one match.
+    """
+    hits = []
+    pos = 0
+    pos_line_number = 1
+    while True:
+        m = matcher.search(text,pos)
+        if m is None:
+            break
+        start = text.rfind("\n",0,m.start()) + 1
+        end = text.find("\n",m.start())
+        if end < 0:
+            end = len(text)
+        line_number = pos_line_number + text.count("\n",pos,start)
+        hits.append([line_number,text[start:end]])
+        # Carry on from the next line
+        pos = end + 1
+        pos_line_number = line_number + 1
+        if pos > len(text):
+            break
+    return hits
+
+
+def _scan_binary(matcher, f, hasher, chunk, overlap):
+    # Each distinct match, as a line 0, so the report can tell which phrases hit
+    found = {}
+    tail = b""
+    while len(chunk) > 0:
+        for m in matcher.finditer((tail+chunk).decode("utf-8",errors="replace")):
+            found.setdefault(m.group(0),[0,m.group(0)])
+        # Keep enough of the end for a phrase that runs into the next chunk
+        tail = (tail+chunk)[-overlap:] if overlap > 0 else b""
+        chunk = f.read(SCAN_CHUNK_BYTES)
+        hasher.update(chunk)
+    return list(found.values())
+
+
+def _scan_file(matcher, filepath, cached_sha256, overlap):
+    # Only a file with an earlier result is hashed before it is scanned
+    if cached_sha256 is not None and file_sha256(filepath) == cached_sha256:
+        return cached_sha256,None,None
+    hasher = hashlib.sha256()
+    with open(filepath,"rb") as f:
+        head = f.read(SCAN_CHUNK_BYTES)
+        hasher.update(head)
+        if b"\0" in head:
+            hits = _scan_binary(matcher,f,hasher,head,overlap)
+            return hasher.hexdigest(),True,hits
+        # Text is scanned whole, for its line numbers
+        rest = f.read()
+    hasher.update(rest)
+    return hasher.hexdigest(),False,scan_text(matcher,(head+rest).decode("utf-8",errors="replace"))
+
+
+def _scan_batch(phrases, case_sensitive, batch):
+    # Returns (sha256,binary,hits) per file, or hits of None if the cached result still holds
+    matcher = _get_matcher(phrases,case_sensitive)
+    overlap = max(( len(p.encode("utf-8")) for p in phrases ),default=1) - 1
+    return [ _scan_file(matcher,filepath,cached_sha256,overlap) for filepath,cached_sha256 in batch ]
+
+
+#-- Cache ---------------------------------------------------------------------#
+
+class FilterCheckCache:
 
+    def __init__(self, filepath, key, entries=None):
+        self.filepath = Path(filepath)
+        self.key = key
+        # Entries are keyed by relative path
+        self.entries = {} if entries is None else entries
 
-def run_filter_check(ctx, config, case_sensitive=False, files_only=False):
+    @classmethod
+    def load(cls, filepath, key):
+        filepath = Path(filepath)
+        if not filepath.is_file():
+            return cls(filepath,key)
+        try:
+            obj = json.loads(filepath.read_text())
+        except ValueError:
+            print(f"Ignoring unreadable filter check cache: {filepath}")
+            return cls(filepath,key)
+        # Results for other phrases are no use to us
+        if obj.get("version") != FILTER_CHECK_VERSION or obj.get("key") != key:
+            return cls(filepath,key)
+        return cls(filepath,key,entries=obj.get("files",{}))
+
+    def save(self):
+        self.filepath.parent.mkdir(parents=True,exist_ok=True)
+        with atomic_open(self.filepath) as f:
+            json.dump({
+                "version": FILTER_CHECK_VERSION,
+                "key": self.key,
+                "files": self.entries
+            },f,indent=None)
+
+
+def _cache_key(phrases, case_sensitive):
+    raw = json.dumps([list(phrases),case_sensitive]).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+#-- Scanning ------------------------------------------------------------------#
+
+def _list_files(root_dir):
+    # Like `grep --recursive`, symbolic links are not followed
+    files = []
+    for dirpath,dirnames,filenames in os.walk(root_dir):
+        dirnames.sort()
+        for name in sorted(filenames):
+            filepath = os.path.join(dirpath,name)
+            if not os.path.islink(filepath):
+                files.append(filepath)
+    return files
+
+
+def scan_directory(root_dir, phrases, case_sensitive=False, cache=None, pool=None):
+    """
+    Scan every file under `root_dir`, returning {relative path: entry} for the
+    files with hits, where an entry holds `binary` and its hit `lines`.
+    """
+    root_dir = Path(root_dir)
+    phrases = tuple(phrases)
+    entries = {}
+    todo = []
+    for filepath in _list_files(root_dir):
+        relpath = Path(filepath).relative_to(root_dir).as_posix()
+        st = os.stat(filepath)
+        old = None if cache is None else cache.entries.get(relpath)
+        if old is not None and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            entries[relpath] = old
+        else:
+            todo.append((filepath,relpath,st,old))
+
+    # Scan what might have changed, serially or over the pool
+    scan = partial(_scan_batch,phrases,case_sensitive)
+    items = [ (filepath,None if old is None else old["sha256"]) for filepath,_,_,old in todo ]
+    if pool is None:
+        batches = [ scan(items) ]
+    else:
+        batches = pool.map_batches(scan,items)
+    results = [ result for batch in batches for result in batch ]
+    for (filepath,relpath,st,old),(sha256,binary,hits) in zip(todo,results):
+        if hits is None:
+            binary,hits = old["binary"],old["lines"]
+        entries[relpath] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": sha256,
+            "binary": binary,
+            "lines": hits
+        }
+
+    if cache is not None:
+        cache.entries = entries
+    return { k:v for k,v in entries.items() if len(v["lines"]) > 0 }
+
+
+#-- Reporting -----------------------------------------------------------------#
+
+def _highlight(phrase_matcher, line):
+    return phrase_matcher.sub(lambda m: f"{COLOR_MATCH}{m.group(0)}{COLOR_END}",line)
+
+
+def run_filter_check(ctx, config, case_sensitive=False, files_only=False, jobs=1):
     ROOT_DIR = ctx.DOCS_DOCS_DIRPATH
     PHRASES = list(filter(len,config.check.filter_phrases.splitlines()))
+    CACHE_FILE = ctx.DOCS_DIST_DIRPATH/".docd-cache"/"filter-check.json"
+
+    # Scan every file once for all the phrases. Results are only cached where
+    # there is already a _dist to keep them in.
+    cache = None
+    if ctx.DOCS_DIST_DIRPATH.is_dir():
+        cache = FilterCheckCache.load(CACHE_FILE,_cache_key(PHRASES,case_sensitive))
+    with RenderPool(jobs=jobs,warm=False) as pool:
+        matched = scan_directory(ROOT_DIR,PHRASES,case_sensitive=case_sensitive,cache=cache,pool=pool)
+    if cache is not None:
+        cache.save()
 
-    # Review the files
+    # Review the files, phrase by phrase
     no_matches = []
     for phrase in PHRASES:
-        # Setup the grep flags
-        flags = []
-        if not case_sensitive:
-            flags.append("--ignore-case")
-        if files_only:
-            flags.append("--color=never")
-            flags.append("--files-with-matches")
-        else:
-            flags.append("--color=always")
-            flags.append("--line-number")
-
-        # Execute the command
-        cmd = f"grep {' '.join(flags)} --recursive {phrase} {ROOT_DIR}"
-        c,o,e = proc(cmd)
+        phrase_matcher = re.compile(re.escape(phrase),_flags(case_sensitive))
+        output = []
+        for relpath,entry in matched.items():
+            lines = [ (n,line) for n,line in entry["lines"] if phrase_matcher.search(line) ]
+            if len(lines) == 0:
+                continue
+            if files_only:
+                output.append(f"* {relpath}")
+            elif entry["binary"]:
+                output.append(f"Binary file /{relpath} matches")
+            else:
+                sep = f"{COLOR_SEPARATOR}:{COLOR_END}"
+                for n,line in lines:
+                    output.append(f"{COLOR_FILE}/{relpath}{COLOR_END}{sep}{COLOR_LINE_NUMBER}{n}{COLOR_END}{sep}{_highlight(phrase_matcher,line)}")
 
         # Process the output
-        if c == 1:
+        if len(output) == 0:
             no_matches.append(phrase)
-        elif c == 0:
+        else:
             print(phrase)
-            if files_only:
-                for line in o.splitlines():
-                    print(f"* {Path(line).relative_to(ROOT_DIR)}")
-            else:
-                o = o.replace(str(ROOT_DIR),"")
-                print(o)
+            print("\n".join(output))
             print()
-        else:
-            raise Exception("Unknown error code")
 
     print(f"No matches:\n{no_matches}")
-
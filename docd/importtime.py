@@ -0,0 +1,75 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Reports what a docd command spends on imports, using `python -X importtime`.
+
+`--debug-imports` runs the command again in a child interpreter with
+`-X importtime`. The child's own output passes straight through. The import
+lines it writes to stderr are summarized afterwards: the total, the slowest
+top level imports, and which of the heavy rendering, search and server
+packages got loaded. The benchmark uses the same summary to check that the
+lightweight commands stay within their startup budget.
+"""
+
+# Python
+from collections import namedtuple
+import sys
+import subprocess
+
+
+# Packages only the commands that build or serve should need
+HEAVY_PACKAGES = ("markdown","pygments","lunr","tornado")
+
+ImportRecord = namedtuple("ImportRecord",("module","self_us","cumulative_us","depth"))
+
+IMPORTTIME_PREFIX = "import time:"
+
+
+def parse_importtime(text):
+    """
+    Split stderr from `-X importtime` into (import records, other lines).
+    Records are in the order python wrote them, innermost imports first.
+    """
+    records = []
+    other = []
+    for line in text.splitlines(keepends=True):
+        if not line.startswith(IMPORTTIME_PREFIX):
+            other.append(line)
+            continue
+        fields = line[len(IMPORTTIME_PREFIX):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line
+            continue
+        name = fields[2].rstrip("\n")
+        # One space after the bar, and two more for each level of nesting
+        depth = (len(name)-len(name.lstrip())-1)//2
+        records.append(ImportRecord(name.strip(),int(fields[0]),int(fields[1]),depth))
+    return records,"".join(other)
+
+
+def heavy_packages(records):
+    loaded = { e.module.split(".",1)[0] for e in records }
+    return [ e for e in HEAVY_PACKAGES if e in loaded ]
+
+
+def run_with_import_times(argv, env=None, stdout=None):
+    """
+    Run `python -X importtime <argv>`, returning (exit code, import records,
+    the rest of its stderr) once it finishes. Its stdout goes to ours unless
+    `stdout` says otherwise.
+    """
+    proc = subprocess.run([sys.executable,"-X","importtime",*argv],stdout=stdout,stderr=subprocess.PIPE,text=True,env=env)
+    records,other = parse_importtime(proc.stderr)
+    return proc.returncode,records,other
+
+
+def import_report_lines(records, top=10):
+    total_us = sum( e.self_us for e in records )
+    lines = [ f"Imports: {len(records)} modules in {total_us/1000:.1f} ms" ]
+    top_level = sorted(( e for e in records if e.depth == 0 ),key=lambda e: e.cumulative_us,reverse=True)
+    for e in top_level[:top]:
+        lines.append(f"  {e.cumulative_us/1000:8.1f} ms  {e.module}")
+    heavy = heavy_packages(records)
+    lines.append(f"Heavy packages: {', '.join(heavy) if len(heavy) > 0 else 'none'}")
+    return lines
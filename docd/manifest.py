@@ -0,0 +1,111 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+A persistent record of what the page build produced, used to only rebuild changes.
+"""
+
+# Python
+from pathlib import Path
+import json
+import hashlib
+# Local
+from docd.utils.filetools import atomic_open
+
+
+def content_hash(record):
+    # A short hash of what a page's outputs were made from, for cache busting
+    if record["sha256"] is None:
+        return None
+    raw = f"{record['sha256']}:{record['renderer']}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+class BuildManifest:
+
+    VERSION = 1
+
+    def __init__(self, filepath, entries=None):
+        self.filepath = Path(filepath)
+        # Entries are keyed by page uri
+        self.entries = {} if entries is None else entries
+
+    @classmethod
+    def load(cls, filepath):
+        filepath = Path(filepath)
+        if not filepath.is_file():
+            return cls(filepath)
+        try:
+            obj = json.loads(filepath.read_text())
+        except ValueError:
+            print(f"Ignoring unreadable build manifest: {filepath}")
+            return cls(filepath)
+        # A version change means we cannot trust any of the records
+        if obj.get("version") != cls.VERSION:
+            return cls(filepath)
+        return cls(filepath,entries=obj.get("pages",{}))
+
+    def save(self):
+        self.filepath.parent.mkdir(parents=True,exist_ok=True)
+        with atomic_open(self.filepath) as f:
+            f.write(json.dumps({
+                "version": self.VERSION,
+                "pages": self.entries
+            },indent=4))
+
+    #-- Records -------------------------------------------------------------#
+
+    def get(self, uri):
+        return self.entries.get(uri)
+
+    def source_hash(self, uri, source_filepath, source_relpath, st=None):
+        """
+        The sha256 of a source, returned with the source bytes if they had to be read.
+        A source is only read if its size or mtime moved since the last build.
+        """
+        st = Path(source_filepath).stat() if st is None else st
+        old = self.entries.get(uri)
+        if ( old is not None
+                and old["sha256"] is not None
+                and old["source_path"] == str(source_relpath)
+                and old["size"] == st.st_size
+                and old["mtime_ns"] == st.st_mtime_ns ):
+            return old["sha256"],None
+        data = Path(source_filepath).read_bytes()
+        return hashlib.sha256(data).hexdigest(),data
+
+    def make_record(self, uri, source_filepath, source_relpath, renderer, outputs):
+        # Make the record for a source, returning it with the source bytes if they had to be read
+        st = Path(source_filepath).stat()
+        sha256,data = self.source_hash(uri,source_filepath,source_relpath,st=st)
+        record = {
+            "source_path": str(source_relpath),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": sha256,
+            "renderer": renderer,
+            "outputs": [ str(e) for e in outputs ]
+        }
+        return record,data
+
+    def is_current(self, uri, record, dest_root):
+        old = self.entries.get(uri)
+        if old is None:
+            return False
+        if old["sha256"] != record["sha256"] or old["renderer"] != record["renderer"]:
+            return False
+        # A render may have added outputs after the ones known up front, like the parts of a split page
+        if old["outputs"][:len(record["outputs"])] != record["outputs"]:
+            return False
+        # Someone may have removed outputs by hand
+        return all( (dest_root/e).is_file() for e in old["outputs"] )
+
+    def stale_outputs(self, new_entries):
+        # Outputs we produced last time that nothing produces now
+        keep = set()
+        for record in new_entries.values():
+            keep.update(record["outputs"])
+        stale = set()
+        for record in self.entries.values():
+            stale.update( e for e in record["outputs"] if e not in keep )
+        return sorted(stale)
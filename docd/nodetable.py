@@ -0,0 +1,227 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+A compact, column oriented table of the directory and file nodes of a docs tree.
+
+Each column is an `array` with one entry per node. Strings (uris, source paths,
+display names and suffixes) are interned once in a shared string table and the
+columns hold their ids, so a directory's uri is stored once no matter how many
+children point at it. Modified times are kept as integer nanoseconds and content
+hashes as raw bytes. Rows are written straight to JSON without building dicts.
+"""
+
+# Python
+from array import array
+from json.encoder import encode_basestring_ascii as _json_str
+import json
+import datetime
+
+
+KINDS = ("directory","file")
+KIND_DIRECTORY = 0
+KIND_FILE = 1
+
+# Content hashes are 16 hex characters, stored as 8 bytes
+CONTENT_HASH_SIZE = 8
+
+
+class StringTable:
+
+    __slots__ = ("strings","_ids")
+
+    def __init__(self):
+        self.strings = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, value):
+        # None is stored as -1
+        if value is None:
+            return -1
+        sid = self._ids.get(value)
+        if sid is None:
+            sid = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return sid
+
+    def find(self, value):
+        return self._ids.get(value,-1)
+
+    def get(self, sid):
+        return None if sid < 0 else self.strings[sid]
+
+
+def _isoformat(mtime_ns):
+    # The local time, as `datetime.fromtimestamp(st_mtime).isoformat()` would give
+    seconds,ns = divmod(mtime_ns,1_000_000_000)
+    return datetime.datetime.fromtimestamp(seconds).replace(microsecond=ns//1000).isoformat()
+
+
+class NodeTable:
+
+    __slots__ = ( "strings","kind","uri","parent_uri","depth","source_path","display_name",
+                  "display_suffix","mtime_ns","_content_hashes","_has_content_hash","_rows_by_uri" )
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.kind = array("b")
+        self.uri = array("i")
+        self.parent_uri = array("i")
+        self.depth = array("i")
+        self.source_path = array("i")
+        self.display_name = array("i")
+        self.display_suffix = array("i")
+        self.mtime_ns = array("q")
+        self._content_hashes = bytearray()
+        self._has_content_hash = bytearray()
+        # Row of each uri's string id, built when first needed
+        self._rows_by_uri = None
+
+    def __len__(self):
+        return len(self.kind)
+
+    def __iter__(self):
+        for row in range(len(self.kind)):
+            yield DocNode(self,row)
+
+    def append(self, kind, uri, parent_uri, depth, source_path, display_name, display_suffix, mtime_ns):
+        """
+        Add a node, returning a DocNode view of it.
+        """
+        intern = self.strings.intern
+        self.kind.append(KIND_FILE if kind == "file" else KIND_DIRECTORY)
+        self.uri.append(intern(uri))
+        self.parent_uri.append(intern(parent_uri))
+        self.depth.append(depth)
+        self.source_path.append(intern(source_path))
+        self.display_name.append(intern(display_name))
+        self.display_suffix.append(intern(display_suffix))
+        self.mtime_ns.append(mtime_ns)
+        self._content_hashes.extend(bytes(CONTENT_HASH_SIZE))
+        self._has_content_hash.append(0)
+        self._rows_by_uri = None
+        return DocNode(self,len(self.kind)-1)
+
+    def find(self, uri):
+        """
+        The DocNode for a uri, or None if there is none.
+        """
+        sid = self.strings.find(uri)
+        if sid < 0:
+            return None
+        if self._rows_by_uri is None or len(self._rows_by_uri) < len(self.strings):
+            rows = array("i",[-1])*len(self.strings)
+            for row,uri_sid in enumerate(self.uri):
+                rows[uri_sid] = row
+            self._rows_by_uri = rows
+        row = self._rows_by_uri[sid]
+        return None if row < 0 else DocNode(self,row)
+
+    #-- Content Hashes ----------------------------------------------------#
+
+    def get_content_hash(self, row):
+        if not self._has_content_hash[row]:
+            return None
+        offset = row*CONTENT_HASH_SIZE
+        return self._content_hashes[offset:offset+CONTENT_HASH_SIZE].hex()
+
+    def set_content_hash(self, row, value):
+        offset = row*CONTENT_HASH_SIZE
+        if value is None:
+            self._has_content_hash[row] = 0
+            self._content_hashes[offset:offset+CONTENT_HASH_SIZE] = bytes(CONTENT_HASH_SIZE)
+        else:
+            self._content_hashes[offset:offset+CONTENT_HASH_SIZE] = bytes.fromhex(value)
+            self._has_content_hash[row] = 1
+
+    #-- JSON --------------------------------------------------------------#
+
+    def row_json(self, row, extra=()):
+        """
+        A row as compact JSON, the same as dumping its dict with `(",",":")`
+        separators, followed by any extra (key, value) pairs.
+        """
+        strings = self.strings.strings
+        parent_uri = self.parent_uri[row]
+        display_suffix = self.display_suffix[row]
+        content_hash = self.get_content_hash(row)
+        parts = [
+            '{"kind":"', KINDS[self.kind[row]],
+            '","uri":', _json_str(strings[self.uri[row]]),
+            ',"parent_uri":', "null" if parent_uri < 0 else _json_str(strings[parent_uri]),
+            ',"depth":', str(self.depth[row]),
+            ',"source_path":', _json_str(strings[self.source_path[row]]),
+            ',"display_name":', _json_str(strings[self.display_name[row]]),
+            ',"display_suffix":', "null" if display_suffix < 0 else _json_str(strings[display_suffix]),
+            ',"last_modified":"', _isoformat(self.mtime_ns[row]),
+            '","content_hash":', "null" if content_hash is None else f'"{content_hash}"'
+        ]
+        for key,value in extra:
+            parts += [ ",", _json_str(key), ":", json.dumps(value,separators=(",",":")) ]
+        parts.append("}")
+        return "".join(parts)
+
+
+class DocNode:
+    """
+    A view of one row of a NodeTable.
+    """
+
+    __slots__ = ("table","row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __repr__(self):
+        return f"DocNode({self.kind!r},{self.uri!r})"
+
+    @property
+    def kind(self):
+        return KINDS[self.table.kind[self.row]]
+
+    @property
+    def uri(self):
+        # This is the visible uri for the page. This functions as the primary key
+        return self.table.strings.get(self.table.uri[self.row])
+
+    @property
+    def parent_uri(self):
+        # This is uri of the "parent" or None if none
+        return self.table.strings.get(self.table.parent_uri[self.row])
+
+    @property
+    def depth(self):
+        return self.table.depth[self.row]
+
+    @property
+    def source_path(self):
+        # This is the relative filepath in the docs raw source
+        return self.table.strings.get(self.table.source_path[self.row])
+
+    @property
+    def display_name(self):
+        return self.table.strings.get(self.table.display_name[self.row])
+
+    @property
+    def display_suffix(self):
+        return self.table.strings.get(self.table.display_suffix[self.row])
+
+    @property
+    def last_modified(self):
+        return datetime.datetime.fromisoformat(_isoformat(self.table.mtime_ns[self.row]))
+
+    @property
+    def content_hash(self):
+        # This is a hash of the page's source and renderer, for cache busting
+        return self.table.get_content_hash(self.row)
+
+    @content_hash.setter
+    def content_hash(self, value):
+        self.table.set_content_hash(self.row,value)
+
+    def to_json(self, extra=()):
+        return self.table.row_json(self.row,extra)
@@ -0,0 +1,181 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+A content addressed store of build outputs, kept in `_dist/.objects`.
+
+Each distinct output is stored once, named by its sha256, and the paths in
+`_dist` are hardlinks to it, or reflinks or copies where the filesystem can't
+hardlink. An object is never rewritten, so a path whose content didn't change
+keeps its inode and mtime from build to build, which is what rsync, deploys
+and CDN caches go by.
+
+An object is garbage once no path in `_dist` shares its inode. Stores only
+pay off where `_dist` can hold hardlinks, since a copied path never shares
+one with its object.
+"""
+
+# Python
+from pathlib import Path
+from dataclasses import dataclass
+import os
+import errno
+import hashlib
+import threading
+# Local
+from docd.utils.sync import copy_file
+from docd.utils.filetools import file_sha256
+
+
+OBJECTS_DIRNAME = ".objects"
+
+# Errors that mean "can't hardlink here", so fall back to a copy
+_NO_LINK = { errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP }
+
+
+@dataclass
+class StoreStats:
+    written: int = 0
+    reused: int = 0
+    unchanged: int = 0
+    collected: int = 0
+
+    def __str__(self):
+        return (f"{self.written} objects written, {self.reused} reused, "
+                f"{self.unchanged} paths unchanged, {self.collected} collected")
+
+
+class ObjectStore:
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.stats = StoreStats()
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self.stats,name,getattr(self.stats,name)+1)
+
+    def object_path(self, digest):
+        return self.root/digest[:2]/digest[2:]
+
+    def _tmp_path(self, path):
+        # Unique per thread, since two writers may race to add the same object
+        return path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.docd-tmp")
+
+    #-- Adding Objects ----------------------------------------------------#
+
+    def add_bytes(self, data, digest=None):
+        """
+        Store `data` unless it is already there, returning its object path.
+        """
+        digest = hashlib.sha256(data).hexdigest() if digest is None else digest
+        obj = self.object_path(digest)
+        if obj.is_file():
+            self._count("reused")
+            return obj
+        obj.parent.mkdir(parents=True,exist_ok=True)
+        tmp = self._tmp_path(obj)
+        with tmp.open("wb") as f:
+            f.write(data)
+        os.replace(tmp,obj)
+        self._count("written")
+        return obj
+
+    def add_file(self, src, digest=None):
+        """
+        Store a copy of a file unless it is already there, returning its object
+        path. Sources are never linked in, since an edit made in place would
+        change the object under its name.
+        """
+        src = Path(src)
+        if digest is None:
+            digest = file_sha256(src)
+        obj = self.object_path(digest)
+        if obj.is_file():
+            self._count("reused")
+            return obj
+        obj.parent.mkdir(parents=True,exist_ok=True)
+        tmp = self._tmp_path(obj)
+        copy_file(src,tmp)
+        os.replace(tmp,obj)
+        self._count("written")
+        return obj
+
+    #-- Linking Paths -----------------------------------------------------#
+
+    def link(self, obj, dest):
+        """
+        Point `dest` at an object, leaving it alone if it already is. Returns
+        "unchanged", "linked" or "copied".
+        """
+        dest = Path(dest)
+        try:
+            if os.path.samestat(os.stat(obj),os.stat(dest)):
+                self._count("unchanged")
+                return "unchanged"
+        except FileNotFoundError:
+            pass
+        dest.parent.mkdir(parents=True,exist_ok=True)
+        tmp = self._tmp_path(dest)
+        try:
+            os.link(obj,tmp)
+        except OSError as e:
+            if e.errno not in _NO_LINK:
+                raise
+            # A reflink where the filesystem has them, else a copy
+            return copy_file(obj,dest)
+        os.replace(tmp,dest)
+        return "linked"
+
+    def write_bytes(self, dest, data, digest=None):
+        return self.link(self.add_bytes(data,digest=digest),dest)
+
+    def write_file(self, src, dest, digest=None):
+        """
+        Point `dest` at the object for a file's contents, which takes the
+        file's mtime so a sync by size and mtime finds `dest` unchanged next
+        time. Every path linked to the object holds the same contents.
+        """
+        how = self.link(self.add_file(src,digest=digest),dest)
+        st = os.stat(src)
+        if os.stat(dest).st_mtime_ns != st.st_mtime_ns:
+            os.utime(dest,ns=(st.st_atime_ns,st.st_mtime_ns))
+        return how
+
+    #-- Garbage -----------------------------------------------------------#
+
+    def collect_garbage(self, tree):
+        """
+        Remove the objects nothing under `tree` links to, returning how many.
+        Links from elsewhere, like a staging copy of the tree or the sources
+        themselves, don't keep an object. Only safe when nothing is adding to
+        the store.
+        """
+        if not self.root.is_dir():
+            return 0
+        live = set()
+        stack = [ Path(tree) ]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        if Path(e.path) != self.root:
+                            stack.append(Path(e.path))
+                    elif e.is_file(follow_symlinks=False):
+                        st = e.stat(follow_symlinks=False)
+                        live.add((st.st_dev,st.st_ino))
+        n_removed = 0
+        for fan in os.scandir(self.root):
+            if not fan.is_dir(follow_symlinks=False):
+                continue
+            for e in os.scandir(fan.path):
+                st = e.stat(follow_symlinks=False)
+                if e.name.endswith(".docd-tmp") or (st.st_dev,st.st_ino) not in live:
+                    os.unlink(e.path)
+                    n_removed += 1
+            if not any(os.scandir(fan.path)):
+                os.rmdir(fan.path)
+        with self._lock:
+            self.stats.collected += n_removed
+        return n_removed
@@ -0,0 +1,84 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Lays out the page database, either as one file or as a small root index plus one shard per directory.
+
+In the sharded layout `pages-database.json` holds the root directory and its
+children. Every directory node carries the `children_hash` of the shard in
+`pages-database/` that lists its own children, so the SPA only fetches a
+subtree when it is opened. Shards are named by the hash of their content,
+and since a directory's shard holds its subdirectories' hashes, a change only
+renames the shards on the path up to the root.
+"""
+
+# Python
+import json
+import hashlib
+# Local
+from docd.nodetable import KIND_DIRECTORY
+
+
+PAGE_DATABASE_FORMATS = ("single","sharded")
+
+# Bump when the layout of the sharded root index or its shards changes
+SHARDED_DATABASE_VERSION = 1
+
+
+def dump_compact(obj):
+    return json.dumps(obj,separators=(",",":"))
+
+
+def shard_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def iter_single_database(table, root_extra=()):
+    """
+    Yield the single file page database in chunks, straight from a NodeTable.
+    The root is always the first row, and gets any `root_extra` (key, value) pairs.
+    """
+    yield "["
+    for row in range(len(table)):
+        if row > 0:
+            yield ","
+        yield table.row_json(row,root_extra if row == 0 else ())
+    yield "]"
+
+
+def shard_page_database(table, root_extra=()):
+    """
+    Split a NodeTable into the root index and the shards of each directory's
+    children. Returns (root index content, {shard hash: shard content}).
+    """
+    # Group the rows under their parent, keeping the walk order
+    children = {}
+    for row in range(1,len(table)):
+        children.setdefault(table.parent_uri[row],[]).append(row)
+
+    # Deepest directories first, so each shard can name its subdirectories' shards
+    shards = {}
+    children_hashes = {}
+    def row_json(row):
+        if row in children_hashes:
+            return table.row_json(row,(("children_hash",children_hashes[row]),))
+        return table.row_json(row)
+    directories = [ row for row in range(1,len(table)) if table.kind[row] == KIND_DIRECTORY ]
+    directories.sort(key=lambda row: table.depth[row],reverse=True)
+    for row in directories:
+        content = "["+",".join( row_json(e) for e in children.get(table.uri[row],()) )+"]"
+        children_hashes[row] = shard_hash(content)
+        shards[children_hashes[row]] = content
+
+    nodes = [ table.row_json(0,root_extra) ] + [ row_json(e) for e in children.get(table.uri[0],()) ]
+    index = f'{{"docd_database_version":{SHARDED_DATABASE_VERSION},"nodes":[{",".join(nodes)}]}}'
+    return index,shards
+
+
+def database_root_node(db):
+    # The root node of either layout, which carries the search index hash
+    nodes = db if isinstance(db,list) else db["nodes"]
+    for node in nodes:
+        if node["uri"] == ".":
+            return node
+    return None
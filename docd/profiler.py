@@ -0,0 +1,235 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Records where a build spends its time, and writes it out as a Chrome trace.
+
+Each stage records its wall time, the CPU time of its thread plus that of
+the render workers it waited on, the bytes this process read and wrote, and
+the peak RSS when it finished. Byte counts are only kept per process, so
+they are left out of the report for stages that ran alongside a stage on
+another thread. Rendered pages record their own wall and CPU time and peak
+RSS along with the process that rendered them, so the trace shows a lane per
+render worker. Stages run at the same time by the build-all scheduler get a
+lane per thread. Load the trace in https://ui.perfetto.dev or
+chrome://tracing.
+"""
+
+# Python
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+import os
+import sys
+import json
+import time
+import threading
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _io_counters():
+    # Bytes passed through read and write calls, which Linux counts per process
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict( line.split(":",1) for line in f if ":" in line )
+        return int(counters["rchar"]),int(counters["wchar"])
+    except (OSError,KeyError,ValueError):
+        return None,None
+
+
+def peak_rss():
+    # Of this process, which a render worker reports along with its timings
+    if resource is None:
+        return None
+    # Linux reports kilobytes and macOS bytes
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*scale
+
+
+def _delta(end, start):
+    return None if end is None or start is None else end-start
+
+
+def format_bytes(n):
+    if n is None:
+        return "-"
+    for unit in ("B","KB","MB","GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+class NullProfiler:
+    """
+    Stands in for a BuildProfiler when a build is not being profiled.
+    """
+
+    enabled = False
+
+    def stage(self, name):
+        return nullcontext()
+
+    def page(self, uri, timing, language=None):
+        pass
+
+
+class BuildProfiler:
+
+    enabled = True
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.start_ns = time.perf_counter_ns()
+        # Dicts of what each stage and page took
+        self.stages = []
+        self.pages = []
+        # The stages open on each thread, innermost last
+        self._open = threading.local()
+
+    def _open_stages(self):
+        stack = getattr(self._open,"stack",None)
+        if stack is None:
+            stack = self._open.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name):
+        read0,written0 = _io_counters()
+        # CPU of this thread only, since other stages may be running on other threads
+        cpu0 = time.thread_time_ns()
+        start = time.perf_counter_ns()
+        record = { "name":name, "thread":threading.get_ident(), "worker_cpu_ns":0 }
+        stack = self._open_stages()
+        stack.append(record)
+        try:
+            yield
+        finally:
+            stack.pop()
+            end = time.perf_counter_ns()
+            read1,written1 = _io_counters()
+            worker_cpu = record.pop("worker_cpu_ns")
+            record.update({
+                "start_ns": start,
+                "end_ns": end,
+                "cpu_ns": time.thread_time_ns()-cpu0+worker_cpu,
+                "bytes_read": _delta(read1,read0),
+                "bytes_written": _delta(written1,written0),
+                "peak_rss": peak_rss()
+            })
+            # An outer stage on this thread waited on the same workers
+            if len(stack) > 0:
+                stack[-1]["worker_cpu_ns"] += worker_cpu
+            self.stages.append(record)
+
+    def page(self, uri, timing, language=None):
+        # `timing` is (pid, start ns, end ns, cpu ns, peak rss) as reported by the renderer
+        pid,start,end,cpu,rss = timing
+        self.pages.append({
+            "uri": uri,
+            "language": language,
+            "pid": pid,
+            "start_ns": start,
+            "end_ns": end,
+            "cpu_ns": cpu,
+            "peak_rss": rss
+        })
+        # A worker's CPU isn't in this thread's, so it goes to the stage waiting on it
+        stack = self._open_stages()
+        if pid != self.pid and len(stack) > 0:
+            stack[-1]["worker_cpu_ns"] += cpu
+
+    #-- Report ------------------------------------------------------------#
+
+    def slowest_pages(self, n=10):
+        return sorted(self.pages,key=lambda e: e["end_ns"]-e["start_ns"],reverse=True)[:n]
+
+    def overlapping_stages(self):
+        # The indexes of the stages that ran while a stage on another thread did
+        overlapping = set()
+        for i,a in enumerate(self.stages):
+            for j,b in enumerate(self.stages[i+1:],start=i+1):
+                if a["thread"] != b["thread"] and a["start_ns"] < b["end_ns"] and b["start_ns"] < a["end_ns"]:
+                    overlapping.update((i,j))
+        return overlapping
+
+    def worker_peak_rss(self):
+        # The largest peak any render worker reported, None without workers
+        return max(( e["peak_rss"] for e in self.pages if e["pid"] != self.pid and e["peak_rss"] is not None ),default=None)
+
+    def report_lines(self, top=10):
+        lines = []
+        width = max( [ len(e["name"]) for e in self.stages ] + [5] )
+        overlapping = self.overlapping_stages()
+        lines.append(f"{'stage':<{width}}  {'wall':>9}  {'cpu':>9}  {'read':>9}  {'written':>9}  {'peak rss':>9}")
+        for i,e in enumerate(self.stages):
+            wall = (e["end_ns"]-e["start_ns"])/1e9
+            cpu = e["cpu_ns"]/1e9
+            # The byte counts of stages that overlapped include each other's
+            read,written = (None,None) if i in overlapping else (e["bytes_read"],e["bytes_written"])
+            lines.append(f"{e['name']:<{width}}  {wall:8.3f}s  {cpu:8.3f}s  {format_bytes(read):>9}"
+                         f"  {format_bytes(written):>9}  {format_bytes(e['peak_rss']):>9}")
+        total = (time.perf_counter_ns()-self.start_ns)/1e9
+        lines.append(f"{'total':<{width}}  {total:8.3f}s")
+        if len(overlapping) > 0:
+            lines.append("Bytes are counted per process, so they are left out for stages that ran alongside another")
+
+        if len(self.pages) > 0:
+            render_cpu = sum( e["cpu_ns"] for e in self.pages )/1e9
+            n_workers = len({ e["pid"] for e in self.pages })
+            lines.append(f"Rendered {len(self.pages)} pages over {n_workers} process(es), {render_cpu:.3f}s of render CPU")
+            lines.append(f"Slowest {min(top,len(self.pages))} pages:")
+            for e in self.slowest_pages(top):
+                wall = (e["end_ns"]-e["start_ns"])/1e6
+                cpu = e["cpu_ns"]/1e6
+                language = e["language"] or "text"
+                lines.append(f"    {wall:9.2f} ms wall {cpu:9.2f} ms cpu  {e['uri']} ({language}, pid {e['pid']})")
+
+        worker_rss = self.worker_peak_rss()
+        workers = "" if worker_rss is None else f", largest render worker {format_bytes(worker_rss)}"
+        lines.append(f"Peak RSS: {format_bytes(peak_rss())}{workers}")
+        return lines
+
+    def chrome_trace(self):
+        """
+        The stages and pages as Chrome trace events. Stages are on one lane of this
+        process, and pages on a lane for each process that rendered them.
+        """
+        def us(ns):
+            return (ns-self.start_ns)/1000
+
+        events = [
+            { "ph":"M", "name":"process_name", "pid":self.pid, "tid":0, "args":{"name":"docd build"} },
+            { "ph":"M", "name":"thread_name", "pid":self.pid, "tid":0, "args":{"name":"stages"} }
+        ]
+        # The main thread's stages are on lane 0, and other threads' on lanes -1, -2, ...
+        lanes = { threading.main_thread().ident:0 }
+        for e in self.stages:
+            if e["thread"] not in lanes:
+                lanes[e["thread"]] = -len(lanes)
+                events.append({ "ph":"M", "name":"thread_name", "pid":self.pid, "tid":lanes[e["thread"]],
+                                "args":{"name":f"stages (thread {len(lanes)-1})"} })
+        overlapping = self.overlapping_stages()
+        for i,e in enumerate(self.stages):
+            # Bytes are for the whole process over the stage, whatever else was running
+            args = { "process_bytes_read":e["bytes_read"], "process_bytes_written":e["bytes_written"],
+                     "overlapped":i in overlapping, "peak_rss":e["peak_rss"], "cpu_ms":e["cpu_ns"]/1e6 }
+            events.append({ "ph":"X", "cat":"stage", "name":e["name"], "pid":self.pid, "tid":lanes[e["thread"]],
+                            "ts":us(e["start_ns"]), "dur":(e["end_ns"]-e["start_ns"])/1000, "args":args })
+
+        for pid in sorted({ e["pid"] for e in self.pages }):
+            name = "render (inline)" if pid == self.pid else f"render worker {pid}"
+            events.append({ "ph":"M", "name":"thread_name", "pid":self.pid, "tid":pid, "args":{"name":name} })
+        for e in self.pages:
+            events.append({ "ph":"X", "cat":"page", "name":e["uri"], "pid":self.pid, "tid":e["pid"],
+                            "ts":us(e["start_ns"]), "dur":(e["end_ns"]-e["start_ns"])/1000,
+                            "args":{ "language":e["language"], "cpu_ms":e["cpu_ns"]/1e6, "peak_rss":e["peak_rss"] } })
+
+        return { "traceEvents":events, "displayTimeUnit":"ms" }
+
+    def write_chrome_trace(self, filepath):
+        filepath = Path(filepath)
+        filepath.parent.mkdir(parents=True,exist_ok=True)
+        with filepath.open("w") as f:
+            json.dump(self.chrome_trace(),f)
@@ -5,48 +5,43 @@
 from pathlib import Path
 import json
 import uuid
-from dataclasses import dataclass
-import datetime
 import shutil
-# Lunr
-from lunr import lunr
+import hashlib
 # Local
-from docd.utils.markdown2html import make_html
-from docd.utils.proc import local_rsync
-
-
-SKIP_DIRECTORIES = (".git","_output","_media")
-
-@dataclass
-class DocNode:
-    kind: str                       # "directory" or "file"
-    uri: Path                       # this is the visible uri for the page. this functions as the primary key
-    parent_uri: Path                # this is uri of the "parent" or null if none
-    depth: int
-    source_path: Path               # this is the relative filepath in the docs raw source
-    display_name: str               # this is the name of the directory or file as displayed in the SPA
-    display_suffix: str = None      # this is the suffix, if applicable, to be displayed in the SPA
-    last_modified: datetime.datetime = None
-
-    def to_dict(self):
-        return {
-            "kind": self.kind,
-            "uri": str(self.uri),
-            "parent_uri": None if self.parent_uri is None else str(self.parent_uri),
-            "depth": self.depth,
-            "source_path": str(self.source_path),
-            "display_name": self.display_name,
-            "display_suffix": self.display_suffix,
-            "last_modified": self.last_modified.isoformat()
-        }
+from docd.utils.markdown2html import renderer_fingerprint
+from docd.utils.sync import sync_directory, copy_file
+from docd.utils.filetools import find_one_matching_file, atomic_open
+from docd.objectstore import ObjectStore, OBJECTS_DIRNAME
+from docd.compress import COMPRESSED_SUFFIXES, remove_compressed_copies
+from docd.manifest import BuildManifest, content_hash
+from docd.renderpool import RenderPool
+from docd.codepage import CodePageLimits, with_part_navigation
+from docd.searchindex import ( SearchAnalysisCache, build_search_index, verify_search_index,
+                               make_search_source, search_index_stats )
+from docd.pagedb import iter_single_database, shard_page_database
+from docd.nodetable import NodeTable
+from docd.walker import DEFAULT_SKIP_PATTERNS, SkipPatterns, walk_source_tree
+from docd.scheduler import update_tree_fingerprint
+from docd.profiler import NullProfiler, format_bytes
+
 
 class Publisher:
 
-    def __init__(self, ctx, config):
+    def __init__(self, ctx, config, jobs=1, render_pool=None, profiler=None, render_cache=None):
         # Save the config
         self.site_config = config.site
         self.max_directory_depth = config.source.max_depth
         self.FILE_MAP = config.source.file_types
+        self.media_hardlinks = config.source.media_hardlinks
+        self.raw_hardlinks = config.source.raw_hardlinks
+        self.page_database_format = config.site.page_database
+        self.skip_patterns = SkipPatterns(DEFAULT_SKIP_PATTERNS+tuple(config.source.skip))
+        self.search_code_mode = config.search.code
+        self.code_page_limits = CodePageLimits(
+            page_bytes = config.source.code_page_bytes,
+            highlight_max_bytes = config.source.code_highlight_max_bytes,
+            max_bytes = config.source.code_max_bytes
+        )
 
         # Establish base paths
         self.REPO_ROOT = ctx.DOCS_REPO_DIRPATH
@@ -56,15 +51,44 @@ class Publisher:
         self.DEST_ROOT = ctx.DOCS_DIST_DIRPATH
         self.DEST_RESOURCES_DIR = ctx.DOCS_DIST_DIRPATH/"_resources"
         self.DEST_PAGES_DB_FILE = self.DEST_RESOURCES_DIR/"pages-database.json"
+        self.DEST_PAGES_DB_SHARD_DIR = self.DEST_RESOURCES_DIR/"pages-database"
         self.DEST_PAGES_HTML_DIR = self.DEST_RESOURCES_DIR/"pages-html"
+        self.DEST_PAGES_PARTS_DIR = self.DEST_RESOURCES_DIR/"pages-html-parts"
         self.DEST_PAGES_TXT_DIR =  self.DEST_RESOURCES_DIR/"pages-txt"
         self.DEST_MEDIA_DIR = self.DEST_RESOURCES_DIR/"media"
         self.DEST_SEARCH_DIR = self.DEST_RESOURCES_DIR/"search"
         self.DEST_SEARCH_INDEX_FILE = self.DEST_SEARCH_DIR/"serialized-index.json"
         self.DEST_STATIC_DIR = self.DEST_RESOURCES_DIR/"static"
+        self.DEST_OBJECTS_DIR = self.DEST_ROOT/OBJECTS_DIRNAME
+
+        # Outputs go through a content addressed store when asked
+        self.store = ObjectStore(self.DEST_OBJECTS_DIR) if config.site.object_store else None
+
+        # Build caches, kept out of what gets published
+        self.CACHE_DIR = ctx.DOCS_DIST_DIRPATH/".docd-cache"
+        self.CACHE_MANIFEST_FILE = self.CACHE_DIR/"build-manifest.json"
+        self.CACHE_SEARCH_ANALYSIS_FILE = self.CACHE_DIR/"search-analysis.json"
 
         # Depth and Holder for nodes
-        self.doc_nodes = []
+        self.doc_nodes = NodeTable()
+        # The sources' size and mtime fingerprint as of the last finished walk
+        self.walk_fingerprint = None
+
+        # Pages are rendered through a pool, which may be shared with others
+        self._owns_render_pool = render_pool is None
+        self.render_pool = RenderPool(jobs) if render_pool is None else render_pool
+        # Rendered pages kept by source and renderer, which may also be shared with others
+        self.render_cache = render_cache
+
+        # What the last page build did, for reports
+        self.page_counts = None
+
+        # Stages and pages are timed when a BuildProfiler is given
+        self.profiler = NullProfiler() if profiler is None else profiler
+
+    def close(self):
+        if self._owns_render_pool:
+            self.render_pool.close()
 
     #-- Build Structure--------------------------------------------------------#
 
@@ -82,155 +106,414 @@ class Publisher:
 
     #-- Build Pages --------------------------------------------------------#
 
-    def build_docs(self):
+    def build_docs(self, incremental=True, media=True, database=True):
         # Build our doc nodes
-        self._build_set_of_doc_nodes()
+        with self.profiler.stage("walk"):
+            self._build_set_of_doc_nodes()
+        # Without `media` the media is left to its own stage, and without
+        # `database` the page database is left to the search build after it
+        self._build_pages(incremental=incremental,media=media,database=database)
 
+    def sync_media(self):
         # Synchronize the media folder
         media_src = self.SOURCE_ROOT/"_media"
         if media_src.is_dir():
-            c,o,e = local_rsync(media_src,self.DEST_MEDIA_DIR,delete=True)
-            if c != 0:
-                print(c,o,e)
-                raise Exception("Rsync of _media failed")
-
-        # Write out the page database to a json file
-        with self.DEST_PAGES_DB_FILE.open("w") as f:
-            db = json.dumps([ e.to_dict() for e in self.doc_nodes ],indent=4)
-            f.write(db)
-
-        # Render the pages
-        # ==> could be made smarter to only create new/modified sources
-        for info in self.doc_nodes:
-            if info.kind == "directory":
-                continue
-
-            # Determine paths
-            source = self.SOURCE_ROOT/info.source_path
-            dest = self.DEST_PAGES_HTML_DIR/f"{info.uri}.html"
-
-            # Ensure the folder exists
-            dest.parent.mkdir(parents=True,exist_ok=True)
-
-            # Add the contents
-            language = self.FILE_MAP.get(source.suffix,"")
-            content = self._create_html_page(source,language)
-
-            # Write the file
-            with dest.open("w") as f:
-                f.write(content)
-
-        # Copy over the raw pages
-        # ==> could be made smarter to only copy changes
-        for info in self.doc_nodes:
-            if info.kind == "directory":
-                continue
-
-            # Determine paths
-            source = self.SOURCE_ROOT/info.source_path
-            dest = self.DEST_PAGES_TXT_DIR/f"{info.uri}.txt"
-
-            # Ensure the folder exists
-            dest.parent.mkdir(parents=True,exist_ok=True)
-
-            # Copy the file
-            shutil.copy(source,dest)
-
+            with self.profiler.stage("media_sync"):
+                result = sync_directory(media_src,self.DEST_MEDIA_DIR,delete=True,hardlink=self.media_hardlinks,store=self.store,
+                                        keep_suffixes=COMPRESSED_SUFFIXES)
+            print(f"Media: {result}")
+
+    def _build_pages(self, incremental=True, media=True, database=True):
+        if media:
+            self.sync_media()
+
+        # Load what the last build produced, unless rebuilding everything
+        if incremental:
+            manifest = BuildManifest.load(self.CACHE_MANIFEST_FILE)
+        else:
+            manifest = BuildManifest(self.CACHE_MANIFEST_FILE)
+        fingerprint = renderer_fingerprint()
+
+        # Work out which pages changed since the last build
+        new_entries = {}
+        pending = {}
+        with self.profiler.stage("find_changes"):
+            for info in self.doc_nodes:
+                if info.kind == "directory":
+                    continue
+
+                # Determine paths
+                uri = info.uri
+                source = self.SOURCE_ROOT/info.source_path
+                html_dest = self.DEST_PAGES_HTML_DIR/f"{uri}.html"
+                txt_dest = self.DEST_PAGES_TXT_DIR/f"{uri}.txt"
+
+                # Record this page and skip it if nothing changed.
+                # A source is only read here if its stat doesn't match the last build.
+                language = self.FILE_MAP.get(source.suffix,"")
+                record,data = manifest.make_record(uri,source,info.source_path,
+                    renderer = self._renderer_key(fingerprint,language),
+                    outputs = [ e.relative_to(self.DEST_RESOURCES_DIR) for e in (html_dest,txt_dest) ]
+                )
+                new_entries[uri] = record
+                info.content_hash = content_hash(record)
+                if manifest.is_current(uri,record,self.DEST_RESOURCES_DIR):
+                    # Keep the parts of a split page
+                    record["outputs"] = manifest.get(uri)["outputs"]
+                else:
+                    if data is None:
+                        data = source.read_bytes()
+                    pending[uri] = (data,language,html_dest,txt_dest)
+
+        # Pages with the same source and renderer render the same, so each is rendered
+        # once, and not at all if the render cache already has it
+        by_key = {}
+        for uri in pending:
+            by_key.setdefault((new_entries[uri]["renderer"],new_entries[uri]["sha256"]),[]).append(uri)
+
+        # Render the changed pages, writing out each batch as it comes back
+        errors = []
+        n_cached = 0
+        render_jobs = []
+        with self.profiler.stage("render"):
+            for key,uris in by_key.items():
+                parts = None if self.render_cache is None else self.render_cache.get(key)
+                if parts is None:
+                    data,language,_,_ = pending[uris[0]]
+                    render_jobs.append((uris[0],data,language,self.code_page_limits))
+                    continue
+                for uri in uris:
+                    self._write_page(uri,parts,pending[uri],new_entries[uri])
+                n_cached += len(uris)
+
+            for batch in self.render_pool.render(render_jobs):
+                for first,parts,error,timing in batch:
+                    key = (new_entries[first]["renderer"],new_entries[first]["sha256"])
+                    self.profiler.page(first,timing,language=pending[first][1])
+                    if error is None and self.render_cache is not None:
+                        self.render_cache.put(key,parts)
+                    for uri in by_key[key]:
+                        if error is not None:
+                            errors.append((uri,error))
+                            # Never trust a failed page so it is retried next build
+                            new_entries[uri]["sha256"] = None
+                            self.doc_nodes.find(uri).content_hash = None
+                            continue
+                        self._write_page(uri,parts,pending[uri],new_entries[uri])
+        n_rendered = len(pending) - len(errors) - n_cached
+
+        with self.profiler.stage("page_database"):
+            # Remove outputs for sources that are gone
+            stale = manifest.stale_outputs(new_entries)
+            for relpath in stale:
+                self._remove_output(self.DEST_RESOURCES_DIR/relpath)
+
+            # Write out the page database to a json file
+            if database:
+                self._write_page_database()
+
+            # Save the manifest for next time
+            manifest.entries = new_entries
+            manifest.save()
+        self.page_counts = dict(rendered=n_rendered,cached=n_cached,unchanged=len(new_entries)-len(pending),
+                                pruned=len(stale),failed=len(errors))
+        cached = "" if self.render_cache is None else f", {n_cached} from the render cache"
+        print(f"Pages: {n_rendered} rendered{cached}, {len(new_entries)-len(pending)} unchanged, {len(stale)} stale outputs pruned")
+
+        # Report every page that failed rather than stopping at the first
+        if len(errors) > 0:
+            for uri,error in errors:
+                print(f"ERROR rendering {uri}: {error}")
+            raise Exception(f"{len(errors)} page(s) failed to render")
+
+    def _write_page(self, uri, parts, item, record):
+        data,language,html_dest,txt_dest = item
+
+        # Ensure the folders exist
+        html_dest.parent.mkdir(parents=True,exist_ok=True)
+        txt_dest.parent.mkdir(parents=True,exist_ok=True)
+
+        # Write the rendered file, and the rest of its parts if it was split
+        pages = self._link_page_parts(uri,parts,record)
+        self._write_output(html_dest,pages[0].encode("utf-8"))
+        for n,page in enumerate(pages[1:],start=2):
+            part_dest = self._page_part_path(uri,n)
+            part_dest.parent.mkdir(parents=True,exist_ok=True)
+            self._write_output(part_dest,page.encode("utf-8"))
+            record["outputs"].append(str(part_dest.relative_to(self.DEST_RESOURCES_DIR)))
+
+        # Write the raw file from what we already read, or link the source itself
+        if self.raw_hardlinks:
+            remove_compressed_copies(txt_dest)
+            copy_file(self.SOURCE_ROOT/self.doc_nodes.find(uri).source_path,txt_dest,hardlink=True)
+        else:
+            self._write_output(txt_dest,data,digest=record["sha256"])
 
-    def _create_html_page(self, source_path, language):
-        if language == "markdown":
-            return make_html(source_path.read_text())
+    def _write_output(self, dest, data, digest=None):
+        # Through the object store if there is one, which leaves an unchanged file alone
+        if self.store is not None:
+            if self.store.write_bytes(dest,data,digest=digest) != "unchanged":
+                remove_compressed_copies(dest)
         else:
-            code = source_path.read_text()
-            txt = f"```{language}\n{code}\n```"
-            return make_html(txt)
+            remove_compressed_copies(dest)
+            with atomic_open(dest,"wb") as f:
+                f.write(data)
+
+    def collect_store_garbage(self):
+        # Only once nothing else is writing to the store
+        if self.store is None:
+            return
+        with self.profiler.stage("store_gc"):
+            self.store.collect_garbage(self.DEST_ROOT)
+        print(f"Store: {self.store.stats}")
+
+    def _renderer_key(self, fingerprint, language):
+        # Code pages also depend on the size limits they were rendered with
+        if language == "markdown":
+            return f"{fingerprint}:{language}"
+        return f"{fingerprint}:{language}:{','.join(map(str,self.code_page_limits))}"
+
+    def _page_part_path(self, uri, n):
+        # Part 1 is the page itself, and the rest are kept apart so they can't clash with a page
+        return self.DEST_PAGES_PARTS_DIR/uri/f"{n}.html"
+
+    def _link_page_parts(self, uri, parts, record):
+        """
+        The html of each part of a page, linked to each other if it was split.
+        Links carry the page's content hash so browsers don't mix up builds.
+        """
+        root = f"{self.site_config.root_uri}/_resources"
+        query = "" if record is None or record["sha256"] is None else f"?h={content_hash(record)}"
+        def part_url(n):
+            if n == 1:
+                return f"{root}/pages-html/{uri}.html{query}"
+            return f"{root}/pages-html-parts/{uri}/{n}.html{query}"
+        return with_part_navigation(parts,part_url)
+
+    def page_database_content(self, search_index_hash=None):
+        """
+        The page database in the configured layout, as chunks of the content of
+        `pages-database.json` and a dict of shard hash to shard content.
+        """
+        # The root node points the SPA at the content addressed search index
+        if search_index_hash is None:
+            search_index_hash = self._current_search_index_hash()
+        root_extra = () if search_index_hash is None else (("search_index_hash",search_index_hash),)
+        if self.page_database_format == "sharded":
+            index,shards = shard_page_database(self.doc_nodes,root_extra)
+            return [index],shards
+        return iter_single_database(self.doc_nodes,root_extra),{}
+
+    def _write_page_database(self, search_index_hash=None):
+        # Streamed out, so the whole database is never held as one string
+        chunks,shards = self.page_database_content(search_index_hash)
+        remove_compressed_copies(self.DEST_PAGES_DB_FILE)
+        with atomic_open(self.DEST_PAGES_DB_FILE,"w") as f:
+            f.writelines(chunks)
+
+        # Shards are content addressed, so only new ones need writing
+        if len(shards) > 0:
+            self.DEST_PAGES_DB_SHARD_DIR.mkdir(exist_ok=True)
+        for shard_hash,shard_content in shards.items():
+            shard_file = self.DEST_PAGES_DB_SHARD_DIR/f"{shard_hash}.json"
+            if not shard_file.is_file():
+                with atomic_open(shard_file,"w") as f:
+                    f.write(shard_content)
+        if self.DEST_PAGES_DB_SHARD_DIR.is_dir():
+            for old in self.DEST_PAGES_DB_SHARD_DIR.glob("*.json"):
+                if old.stem not in shards:
+                    self._remove_output(old)
+
+    def _current_search_index_hash(self):
+        try:
+            filepath = find_one_matching_file(self.DEST_SEARCH_DIR,"serialized-index-*.json")
+        except Exception:
+            return None
+        return filepath.stem[len("serialized-index-"):]
+
+    def _remove_output(self, filepath):
+        # Along with any precompressed copies of it
+        remove_compressed_copies(filepath)
+        if filepath.is_file():
+            filepath.unlink()
+        # Clear out any directories left empty
+        parent = filepath.parent
+        while parent not in (self.DEST_PAGES_HTML_DIR,self.DEST_PAGES_TXT_DIR,self.DEST_PAGES_PARTS_DIR,self.DEST_RESOURCES_DIR):
+            if not parent.is_dir() or any(parent.iterdir()):
+                break
+            parent.rmdir()
+            parent = parent.parent
 
 
     #-- Search System ---------------------------------------------------------------------------#
 
-    def build_search_index(self):
-        self._build_set_of_doc_nodes()
-        DOCS = self._create_document_set_for_lunr()
-
-        # Generate the indexer
-        indexer = lunr(ref="path",fields=("title","body"),documents=DOCS)
-
-        # Output the serialized index
-        serialized_index = indexer.serialize()
-        with self.DEST_SEARCH_INDEX_FILE.open("w") as fp:
-            json.dump(serialized_index,fp,indent=None)
+    def build_search_index(self, verify=False, walk=True):
+        # Without `walk` the nodes from the page build's walk are reused
+        if walk:
+            with self.profiler.stage("walk"):
+                self._build_set_of_doc_nodes()
+        self._build_search_index(verify=verify)
+
+    def _build_search_index(self, verify=False):
+        with self.profiler.stage("search_documents"):
+            DOCS = self._create_document_set_for_lunr()
+
+        # Generate the index, only extracting and analyzing documents that changed
+        with self.profiler.stage("search_index"):
+            cache = SearchAnalysisCache.load(self.CACHE_SEARCH_ANALYSIS_FILE)
+            previous_stats = self._previous_search_index_stats(cache)
+            serialized_index,n_analyzed = build_search_index(DOCS,cache,pool=self.render_pool)
+
+        # Optionally check it against a plain serial build
+        if verify:
+            with self.profiler.stage("search_verify"):
+                problems = verify_search_index(DOCS,serialized_index)
+            if len(problems) > 0:
+                for problem in problems:
+                    print(f"ERROR verifying search index: {problem}")
+                raise Exception("Search index does not match a serial build")
+            print("Search: index matches a serial build")
+
+        with self.profiler.stage("search_write"):
+            search_index_hash,serialized = self._write_search_index(serialized_index)
+            cache.stats = search_index_stats(serialized_index,serialized)
+            cache.save()
+
+        # Point the page database at it, written once from the nodes already walked
+        with self.profiler.stage("page_database"):
+            self._write_page_database(search_index_hash)
+        print(f"Search: {n_analyzed} analyzed, {len(DOCS)-n_analyzed} cached, "
+              f"{self._format_search_index_stats(cache.stats,previous_stats)}")
+
+    def _previous_search_index_stats(self, cache):
+        if cache.stats is not None:
+            return cache.stats
+        # Without stats in the cache, measure the index this build replaces
+        try:
+            serialized = self.DEST_SEARCH_INDEX_FILE.read_text()
+            return search_index_stats(json.loads(serialized),serialized)
+        except (OSError,ValueError,KeyError):
+            return None
+
+    def _format_search_index_stats(self, stats, previous=None):
+        terms = f"{stats['terms']} terms"
+        size = f"index {format_bytes(stats['bytes'])}"
+        if previous is not None:
+            terms += f" (was {previous['terms']})"
+            size += f" (was {format_bytes(previous['bytes'])})"
+        return f"{terms}, {size}"
+
+    def _write_search_index(self, serialized_index):
+        """
+        Output the serialized index, both at its stable name and at a content
+        addressed name that can be cached forever. Returns its hash and content.
+        """
+        serialized = json.dumps(serialized_index,indent=None)
+        remove_compressed_copies(self.DEST_SEARCH_INDEX_FILE)
+        with atomic_open(self.DEST_SEARCH_INDEX_FILE,"w") as fp:
+            fp.write(serialized)
+        search_index_hash = hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:16]
+        hashed_file = self.DEST_SEARCH_DIR/f"serialized-index-{search_index_hash}.json"
+        if not hashed_file.is_file():
+            with atomic_open(hashed_file,"w") as fp:
+                fp.write(serialized)
+        for old in self.DEST_SEARCH_DIR.glob("serialized-index-*.json"):
+            if old != hashed_file:
+                self._remove_output(old)
+        return search_index_hash,serialized
 
 
     def _create_document_set_for_lunr(self):
+        # Pages whose html the last page build left current are indexed from it.
+        # Sources are only read here if their stat moved since that build, and
+        # otherwise by the analysis, only if it isn't cached.
+        manifest = BuildManifest.load(self.CACHE_MANIFEST_FILE)
+        fingerprint = renderer_fingerprint()
         DOCS = []
         for docnode in self.doc_nodes:
             if docnode.kind != "file":
                 continue
-            ref = str(docnode.uri)
-            entry = {
-                "path": ref,
-                "title": ref,
-                "body": ""
-            }
-            with (self.SOURCE_ROOT/docnode.source_path).open("r") as fp:
-                entry["body"] = fp.read()
-            DOCS.append(entry)
+            source = self.SOURCE_ROOT/docnode.source_path
+            source_hash,data = manifest.source_hash(docnode.uri,source,docnode.source_path)
+            # Without a page build before this, the page database's cache keys come from the manifest
+            record = manifest.get(docnode.uri)
+            if docnode.content_hash is None and record is not None and record["sha256"] == source_hash:
+                docnode.content_hash = content_hash(record)
+            DOCS.append(self._make_search_document(docnode,data,manifest=manifest,fingerprint=fingerprint,
+                                                   source_hash=source_hash))
 
         return DOCS
 
+    def _make_search_document(self, docnode, data, manifest=None, fingerprint=None, source_hash=None):
+        """
+        The search source for a page. Its text is extracted from the rendered
+        html when it is analyzed, so this only hashes the source. Given its
+        `source_hash`, `data` may be None to read the source only if needed.
+        """
+        language = self.FILE_MAP.get(Path(docnode.source_path).suffix,"")
+        renderer = self._renderer_key(renderer_fingerprint() if fingerprint is None else fingerprint,language)
+        if source_hash is None:
+            source_hash = hashlib.sha256(data).hexdigest()
+        html_file = None
+        record = None if manifest is None else manifest.get(docnode.uri)
+        if record is not None and record["renderer"] == renderer and record["sha256"] == source_hash:
+            html_file = self.DEST_PAGES_HTML_DIR/f"{docnode.uri}.html"
+        return make_search_source(docnode.uri,data,language,
+            title = docnode.display_name+(docnode.display_suffix or ""),
+            renderer = renderer,
+            code_mode = self.search_code_mode,
+            html_file = html_file,
+            source_hash = source_hash,
+            source_file = self.SOURCE_ROOT/docnode.source_path,
+            code_max_bytes = self.code_page_limits.max_bytes
+        )
+
 
     #-- Source walker and Page Makers ------------------------------------------------------#
 
     def _build_set_of_doc_nodes(self):
         # Parse the docs directory
-        self.doc_nodes = []
-        self._walk_and_unpack_source_directory(self.SOURCE_ROOT,max_depth=self.max_directory_depth)
-
-    def _walk_and_unpack_source_directory(self, directory_path, depth=0, max_depth=100000):
-        # Calculate directory relpath
-        directory_relpath = directory_path.relative_to(self.SOURCE_ROOT)
-
-        # If we are the root, set the parent as None
-        directory_parent_uri = str(directory_relpath.parent)
-        if str(directory_relpath) == ".":
-            directory_parent_uri = None
-
-        # Display name exchanges '--' for ': '
-        directory_display_name = directory_relpath.name.replace("--",": ")
-
-        # Get the modified time
-        modified_time = datetime.datetime.fromtimestamp(directory_path.stat().st_mtime)
-
-        # Add the node for this directory
-        self.doc_nodes.append(DocNode(
-            kind = "directory",
-            uri = directory_relpath,
-            parent_uri = directory_parent_uri,
-            depth = depth,
-            source_path = directory_relpath,
-            display_name = directory_display_name,
-            display_suffix = None,
-            last_modified = modified_time
-        ))
-
-        # Traverse the sources
-        children = sorted([s for s in directory_path.iterdir()])
-        for child_path in children:
-            # Ignore skipped directories (Note should make deep path support)
-            if child_path.is_dir() and child_path.name in SKIP_DIRECTORIES:
-                continue
-
-            # If this is a file, add entry
-            if child_path.is_file():
-
-                # Get the relative child_path
-                child_relpath = child_path.relative_to(self.SOURCE_ROOT)
-
-                # Pull out path components
-                relpath_parent = child_relpath.parent
-                _name = child_relpath.name
-                _stem = child_relpath.stem
-                _suffix = child_relpath.suffix
+        for _ in self.iter_doc_nodes():
+            pass
+
+    def iter_doc_nodes(self):
+        """
+        Walk the docs directory into a new node table in `doc_nodes`, yielding
+        a DocNode for each directory and file as it is added, each directory
+        before its contents. Once the walk finishes, `walk_fingerprint` is the
+        `tree_fingerprint` of what it saw.
+        """
+        self.doc_nodes = table = NodeTable()
+        hasher = hashlib.sha256()
+        for entry in walk_source_tree(self.SOURCE_ROOT,max_depth=self.max_directory_depth,skip=self.skip_patterns):
+            update_tree_fingerprint(hasher,entry)
+            relpath = entry.relpath
+            parent = relpath[:-len(entry.name)-1] or "."
+
+            if entry.kind == "directory":
+                # If we are the root, set the parent as None
+                is_root = relpath == "."
+
+                # Add the node for this directory
+                # Display name exchanges '--' for ': '
+                yield table.append(
+                    kind = "directory",
+                    uri = relpath,
+                    parent_uri = None if is_root else parent,
+                    depth = entry.depth,
+                    source_path = relpath,
+                    display_name = "" if is_root else entry.name.replace("--",": "),
+                    display_suffix = None,
+                    mtime_ns = entry.stat.st_mtime_ns
+                )
+            else:
+                # Pull out name components, the way `Path.stem` and `Path.suffix` would
+                i = entry.name.rfind(".")
+                if 0 < i < len(entry.name)-1:
+                    _stem,_suffix = entry.name[:i],entry.name[i:]
+                else:
+                    _stem,_suffix = entry.name,""
+                display_name = _stem.replace("--",": ")
 
                 # If it's a markdown file, set suffix to nothing
                 # If it's not, set the stem to show the suffix
@@ -239,24 +522,15 @@ class Publisher:
                 else:
                     _stem += f"--dot-{_suffix[1:]}"
 
-                # Display name exchanges '--' for ': '
-                child_display_name = child_relpath.stem.replace("--",": ")
-
-                # Get the modified time
-                modified_time = datetime.datetime.fromtimestamp(child_path.stat().st_mtime)
-
                 # Add the node for this file
-                self.doc_nodes.append(DocNode(
+                yield table.append(
                     kind = "file",
-                    uri = relpath_parent/_stem,
-                    parent_uri = child_relpath.parent,
-                    depth = depth,
-                    source_path = child_relpath,
-                    display_name = child_display_name,
+                    uri = _stem if parent == "." else f"{parent}/{_stem}",
+                    parent_uri = parent,
+                    depth = entry.depth,
+                    source_path = relpath,
+                    display_name = display_name,
                     display_suffix = _suffix,
-                    last_modified = modified_time
-                ))
-
-            # If this is a directory, recurse or return depending on depth
-            elif child_path.is_dir() and depth+1 <= max_depth:
-                subnode = self._walk_and_unpack_source_directory(child_path,depth=depth+1,max_depth=max_depth)
+                    mtime_ns = entry.stat.st_mtime_ns
+                )
+        self.walk_fingerprint = hasher.hexdigest()
@@ -0,0 +1,163 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Renders pages, either inline or spread over a pool of long lived worker processes.
+"""
+
+# Python
+import os
+import time
+import threading
+import traceback
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+# Local
+from docd.utils.filetools import decode_text
+from docd.profiler import peak_rss
+
+
+def get_renderer():
+    # Imported on first use, so a pool that only scans files never loads markdown
+    from docd.utils import markdown2html
+    return markdown2html.get_renderer()
+
+
+def render_source(text, language):
+    # Uses the warm renderer kept by this process
+    return get_renderer().render(text,language)
+
+
+def render_source_parts(text, language, limits=None):
+    # As `render_source`, but as a list of parts when a code page is split
+    return get_renderer().render_parts(text,language,limits)
+
+
+def _worker_init():
+    # Build the renderer once per worker so it stays warm across batches
+    get_renderer()
+
+
+def _render_batch(batch):
+    # Each page reports its own result so one bad page doesn't sink the batch,
+    # along with the (pid, start ns, end ns, cpu ns, peak rss) it took for profiling
+    pid = os.getpid()
+    results = []
+    for uri,data,language,limits in batch:
+        start = time.perf_counter_ns()
+        cpu = time.thread_time_ns()
+        try:
+            parts = render_source_parts(decode_text(data),language,limits)
+            error = None
+        except Exception as e:
+            parts = None
+            error = "".join(traceback.format_exception_only(type(e),e)).strip()
+        timing = (pid,start,time.perf_counter_ns(),time.thread_time_ns()-cpu,peak_rss())
+        results.append((uri,parts,error,timing))
+    return results
+
+
+def _worker_context():
+    # Pools are started while other threads of a build are running, and a forked
+    # worker could inherit a lock one of them held. A forkserver forks from a
+    # clean single threaded process instead.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def resolve_jobs(jobs):
+    # 0 or None means use every core
+    if not jobs:
+        return os.cpu_count() or 1
+    return max(1,int(jobs))
+
+
+class RenderPool:
+
+    def __init__(self, jobs=1, batch_size=16, warm=True):
+        self.jobs = resolve_jobs(jobs)
+        self.batch_size = batch_size
+        # Build a renderer in each worker as it starts, for pools that render
+        self.warm = warm
+        self._executor = None
+
+    @property
+    def executor(self):
+        # Workers are started on first use and then kept for the life of the pool
+        if self._executor is None and self.jobs > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.jobs,mp_context=_worker_context(),
+                                                 initializer=_worker_init if self.warm else None)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def map_batches(self, fn, items, batch_size=None):
+        # Yields the result of `fn` for each batch of items, in order
+        items = list(items)
+        batch_size = self.batch_size if batch_size is None else batch_size
+        batches = [ items[i:i+batch_size] for i in range(0,len(items),batch_size) ]
+        if self.executor is None:
+            for batch in batches:
+                yield fn(batch)
+        else:
+            yield from self.executor.map(fn,batches)
+
+    def render(self, jobs):
+        """
+        Render (uri,source_bytes,language,code_page_limits) jobs, yielding one
+        list of (uri,html_parts,error,timing) per batch in the same order as
+        the jobs. Only a split code page has more than one part.
+        """
+        yield from self.map_batches(_render_batch,jobs)
+
+
+class RenderCache:
+    """
+    Rendered parts kept in memory by (renderer key, source sha256), so a
+    source that shows up on several pages, or in several sites of a batch
+    build, is only rendered once. Parts are stored before the links between
+    them are added, so they don't depend on the page or site. The least
+    recently used entries are dropped past `max_bytes` of html.
+    """
+
+    def __init__(self, max_bytes=256*1024*1024):
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            parts = self._entries.get(key)
+            if parts is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return parts
+
+    def put(self, key, parts):
+        size = sum( len(e) for e in parts )
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = parts
+            self.n_bytes += size
+            while self.n_bytes > self.max_bytes:
+                _,old = self._entries.popitem(last=False)
+                self.n_bytes -= sum( len(e) for e in old )
@@ -0,0 +1,332 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Runs build stages as a task graph, and builds into a staging copy of `_dist`.
+
+Each stage declares the paths it reads and writes, relative to the output
+directory. A stage depends on every stage that writes a path it reads, or a
+path inside or above one. Stages whose dependencies are done run together
+over a pool of threads, which suits stages that mostly wait on files or on
+the render pool's processes.
+
+A stage can also give a key, a fingerprint of what it reads from outside the
+build such as the sources and config. A stage is skipped when its key matches
+the one stamped by the last build, its outputs exist and none of its
+dependencies ran. Keys can cost a walk of the sources, so a key is only taken
+when the stage could be skipped, or else once it ran, to stamp it. A key
+taken after a stage ran has to describe its inputs as the stage found them,
+such as a fingerprint from the walk the stage did anyway.
+
+`staged_directory` gives a staging copy of a directory to build in, made of
+hardlinks so it is cheap, and swaps it into place once the build succeeds.
+Everything that writes into the build replaces files rather than writing
+over them, so the hardlinked files of the live directory are never touched.
+"""
+
+# Python
+from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from typing import Callable
+import os
+import json
+import time
+import shutil
+import hashlib
+import ctypes
+import ctypes.util
+# Local
+from docd.utils.filetools import atomic_open
+from docd.utils.sync import sync_directory
+
+
+# Bump when what a stage stamp records changes
+STAGE_STAMP_VERSION = 1
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable
+    # Paths read and written, relative to the output directory
+    inputs: tuple = ()
+    outputs: tuple = ()
+    # Returns a json-able fingerprint of what the stage reads from outside the build,
+    # called at most once a run
+    key: Callable = None
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str = "pending"
+    start: float = None
+    end: float = None
+    error: BaseException = None
+    dependencies: set = field(default_factory=set)
+
+    @property
+    def seconds(self):
+        return 0.0 if self.start is None or self.end is None else self.end-self.start
+
+
+def _overlaps(a, b):
+    # If one of two relative paths is the other or inside it
+    a,b = a.strip("/"),b.strip("/")
+    return a == b or a.startswith(b+"/") or b.startswith(a+"/")
+
+
+def stage_dependencies(stages):
+    """
+    The names of the stages each stage depends on. Only an earlier stage can
+    be a dependency, so the graph can't have cycles.
+    """
+    deps = {}
+    for i,stage in enumerate(stages):
+        deps[stage.name] = { e.name for e in stages[:i]
+                             if any( _overlaps(out,inp) for out in e.outputs for inp in stage.inputs ) }
+    return deps
+
+
+def tree_fingerprint(root, skip=None, max_depth=100000):
+    # The size and mtime of everything under a directory, without reading any of it
+    from docd.walker import walk_source_tree
+    root = Path(root)
+    hasher = hashlib.sha256()
+    if root.is_dir():
+        for entry in walk_source_tree(root,max_depth=max_depth,skip=skip):
+            update_tree_fingerprint(hasher,entry)
+    return hasher.hexdigest()
+
+
+def update_tree_fingerprint(hasher, entry):
+    # For a walk done anyway to give the same fingerprint as `tree_fingerprint`
+    if entry.kind == "file":
+        hasher.update(f"{entry.relpath}\0{entry.stat.st_size}\0{entry.stat.st_mtime_ns}\n".encode("utf-8"))
+
+
+def file_fingerprint(filepath):
+    filepath = Path(filepath)
+    return hashlib.sha256(filepath.read_bytes()).hexdigest() if filepath.is_file() else None
+
+
+class StageScheduler:
+
+    def __init__(self, stages, output_dir, stamp_file=None, force=False):
+        self.stages = list(stages)
+        self.output_dir = Path(output_dir)
+        self.stamp_file = None if stamp_file is None else Path(stamp_file)
+        # Run every stage, whatever the stamps say
+        self.force = force
+        self.dependencies = stage_dependencies(self.stages)
+        self.results = { e.name:StageResult(e.name,dependencies=self.dependencies[e.name]) for e in self.stages }
+        self.start = None
+        self.end = None
+
+    #-- Stamps ------------------------------------------------------------#
+
+    def _load_stamps(self):
+        if self.stamp_file is None or not self.stamp_file.is_file():
+            return {}
+        try:
+            obj = json.loads(self.stamp_file.read_text())
+        except ValueError:
+            return {}
+        if obj.get("version") != STAGE_STAMP_VERSION:
+            return {}
+        return obj.get("stages",{})
+
+    def _save_stamps(self, stamps):
+        if self.stamp_file is None:
+            return
+        self.stamp_file.parent.mkdir(parents=True,exist_ok=True)
+        with atomic_open(self.stamp_file) as f:
+            json.dump({ "version":STAGE_STAMP_VERSION, "stages":stamps },f,indent=None)
+
+    def _stage_key(self, stage):
+        if stage.key is None:
+            return None
+        raw = json.dumps(stage.key(),sort_keys=True).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _is_up_to_date(self, stage, keys, stamps):
+        # The key is only taken once nothing cheaper rules the skip out
+        if self.force or stage.name not in stamps:
+            return False
+        if any( self.results[e].status == "ran" for e in self.dependencies[stage.name] ):
+            return False
+        if not all( (self.output_dir/e).exists() for e in stage.outputs ):
+            return False
+        keys[stage.name] = self._stage_key(stage)
+        return stamps[stage.name] == keys[stage.name]
+
+    #-- Running -----------------------------------------------------------#
+
+    def run(self):
+        """
+        Run the stages, raising the first stage's error after letting the
+        stages already running finish. Returns the results by stage name.
+        """
+        self.start = time.perf_counter()
+        stamps = self._load_stamps()
+        new_stamps = {}
+        # Keys taken to check for a skip, and reused for the stamps
+        keys = {}
+        by_name = { e.name:e for e in self.stages }
+        pending = [ e.name for e in self.stages ]
+        running = {}
+        failed = None
+
+        def run_stage(stage):
+            result = self.results[stage.name]
+            result.start = time.perf_counter()
+            try:
+                stage.run()
+            finally:
+                result.end = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max(1,len(self.stages))) as executor:
+            while len(pending) > 0 or len(running) > 0:
+                # Start or skip everything whose dependencies are done
+                for name in list(pending):
+                    if failed is not None:
+                        break
+                    if any( self.results[e].status in ("pending","running") for e in self.dependencies[name] ):
+                        continue
+                    pending.remove(name)
+                    stage = by_name[name]
+                    if self._is_up_to_date(stage,keys,stamps):
+                        self.results[name].status = "skipped"
+                        new_stamps[name] = keys[name]
+                        continue
+                    self.results[name].status = "running"
+                    running[executor.submit(run_stage,stage)] = name
+                if failed is not None:
+                    pending = []
+                if len(running) == 0:
+                    # Skipping may have freed up more stages
+                    continue
+
+                done,_ = wait(running,return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self.results[name].status = "ran"
+                        if name not in keys:
+                            keys[name] = self._stage_key(by_name[name])
+                        new_stamps[name] = keys[name]
+                    else:
+                        self.results[name].status = "failed"
+                        self.results[name].error = error
+                        if failed is None:
+                            failed = error
+
+        self.end = time.perf_counter()
+        if failed is not None:
+            raise failed
+        self._save_stamps(new_stamps)
+        return self.results
+
+    #-- Report ------------------------------------------------------------#
+
+    def critical_path(self):
+        """
+        The chain of stages, each waiting on the one before, that took the
+        longest in total. Returns (stage names, seconds).
+        """
+        longest = {}
+        for stage in self.stages:
+            deps = self.dependencies[stage.name]
+            before = max( (longest[e] for e in deps), key=lambda e: e[1], default=([],0.0) )
+            longest[stage.name] = (before[0]+[stage.name],before[1]+self.results[stage.name].seconds)
+        return max(longest.values(),key=lambda e: e[1],default=([],0.0))
+
+    def report_lines(self):
+        parts = []
+        for stage in self.stages:
+            result = self.results[stage.name]
+            parts.append(f"{stage.name} {result.seconds:.2f}s" if result.status == "ran" else f"{stage.name} {result.status}")
+        names,seconds = self.critical_path()
+        wall = 0.0 if self.start is None or self.end is None else self.end-self.start
+        if not any( e.status == "ran" for e in self.results.values() ):
+            return [ f"Stages: {', '.join(parts)}", "Critical path: none, every stage was up to date" ]
+        return [
+            f"Stages: {', '.join(parts)}",
+            f"Critical path: {' -> '.join(names)}, {seconds:.2f}s of {wall:.2f}s"
+        ]
+
+
+#-- Staging -------------------------------------------------------------------#
+
+# renameat2 flag to swap two paths in one step, on Linux
+RENAME_EXCHANGE = 2
+AT_FDCWD = -100
+
+
+def _rename_exchange(a, b):
+    # Returns False if the platform or filesystem can't swap atomically
+    libc_name = ctypes.util.find_library("c")
+    if libc_name is None:
+        return False
+    try:
+        libc = ctypes.CDLL(libc_name,use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError,AttributeError):
+        return False
+    renameat2.argtypes = (ctypes.c_int,ctypes.c_char_p,ctypes.c_int,ctypes.c_char_p,ctypes.c_uint)
+    if renameat2(AT_FDCWD,os.fsencode(a),AT_FDCWD,os.fsencode(b),RENAME_EXCHANGE) == 0:
+        return True
+    return False
+
+
+def swap_directories(staging, target):
+    """
+    Put `staging` in place of `target`, leaving the old `target` at `staging`
+    if there was one. The swap is atomic where `renameat2` is supported, and
+    otherwise two renames with `target` missing in between.
+    """
+    staging,target = Path(staging),Path(target)
+    if not target.exists():
+        os.rename(staging,target)
+        return
+    if _rename_exchange(staging,target):
+        return
+    old = target.with_name(f".{target.name}-old")
+    if old.exists():
+        shutil.rmtree(old)
+    os.rename(target,old)
+    os.rename(staging,target)
+    os.rename(old,staging)
+
+
+@contextmanager
+def staged_directory(target, keep=True, seed=()):
+    """
+    Yield a staging directory to build `target` in, swapped into place when
+    the block finishes without an error and thrown away if it fails. With
+    `keep` the staging directory starts as a hardlinked copy of `target`,
+    otherwise it starts empty but for hardlinked copies of the `seed`
+    directories, given relative to `target`.
+    """
+    target = Path(target)
+    staging = target.with_name(f".{target.name}-staging")
+    if staging.exists():
+        shutil.rmtree(staging)
+    if keep and target.is_dir():
+        sync_directory(target,staging,hardlink=True)
+    else:
+        staging.mkdir(parents=True)
+        for relpath in seed:
+            if (target/relpath).is_dir():
+                sync_directory(target/relpath,staging/relpath,hardlink=True)
+
+    try:
+        yield staging
+    except BaseException:
+        shutil.rmtree(staging,ignore_errors=True)
+        raise
+    swap_directories(staging,target)
+    shutil.rmtree(staging,ignore_errors=True)
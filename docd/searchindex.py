@@ -0,0 +1,315 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Builds the lunr search index from per-document analysis that is cached between builds.
+
+Tokenizing, stop-word filtering and stemming every document is the slow part of
+building a lunr index. We run that pipeline per document, cache the resulting
+term frequencies keyed by a hash of the document, and then replay them into a
+builder to produce the same index `lunr()` would have.
+
+Pages are indexed from their rendered html rather than their raw source, see
+`docd.textextract`. A page is passed in as a search source, which is keyed by
+a hash of its source and renderer, so the html is only read or rendered and
+its text extracted when the page changed.
+"""
+
+# Python
+from pathlib import Path
+from collections import defaultdict
+from html import escape
+import os
+import json
+import hashlib
+# Lunr
+from lunr import get_default_builder
+from lunr.index import Index
+from lunr.tokenizer import Tokenizer
+from lunr.field_ref import FieldRef
+# Local
+from docd.utils.filetools import decode_text, atomic_open
+from docd.renderpool import render_source
+from docd.textextract import extract_page_text, extract_code_text
+
+
+# Bump when the layout or content of the serialized index changes
+SEARCH_INDEX_VERSION = 2
+
+SEARCH_REF = "path"
+SEARCH_FIELDS = ("title","headings","body","code")
+# Matches in titles and headings count for more, and in code for less
+SEARCH_FIELD_BOOSTS = { "title":10, "headings":4, "body":1, "code":0.25 }
+
+
+def make_builder():
+    # Set up a builder the same way `lunr()` does
+    builder = get_default_builder()
+    builder.ref(SEARCH_REF)
+    for field in SEARCH_FIELDS:
+        builder.field(field,boost=SEARCH_FIELD_BOOSTS[field])
+    return builder
+
+
+def document_hash(doc):
+    raw = json.dumps([ doc[k] for k in (SEARCH_REF,)+SEARCH_FIELDS ]).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def make_search_source(ref, data, language, title, renderer, code_mode, html_file=None, source_hash=None,
+                       code_max_bytes=0, source_file=None):
+    """
+    A page to be indexed from its source bytes. `title` is used if the page
+    has no `h1`, and `html_file` is its already rendered html if it is current.
+    Code sources over `code_max_bytes` only have their title indexed. Given
+    its `source_hash` and `source_file`, `data` may be None and is then only
+    read if the page is analyzed and needs it.
+    """
+    if source_hash is None:
+        source_hash = hashlib.sha256(data).hexdigest()
+    key = json.dumps([SEARCH_INDEX_VERSION,ref,source_hash,renderer,title,code_mode,code_max_bytes]).encode("utf-8")
+    return {
+        SEARCH_REF: ref,
+        "key": hashlib.sha256(key).hexdigest(),
+        "source": {
+            "data": data,
+            "language": language,
+            "title": title,
+            "code_mode": code_mode,
+            "code_max_bytes": code_max_bytes,
+            "html_file": None if html_file is None else str(html_file),
+            "source_file": None if source_file is None else str(source_file)
+        }
+    }
+
+
+def search_document(item):
+    """
+    The fields of a search source, extracted from its rendered html. Documents
+    that already have their fields are returned as they are.
+    """
+    source = item.get("source")
+    if source is None:
+        return item
+    if source["language"] != "markdown":
+        # A code page's text is its source, so there is nothing to render
+        if 0 < source["code_max_bytes"] < _source_size(source):
+            text = extract_code_text("",source["code_mode"])
+        else:
+            text = extract_code_text(decode_text(_source_data(source),errors="replace"),source["code_mode"])
+        return _document_from_text(item,text)
+    html = None
+    if source["html_file"] is not None:
+        try:
+            with open(source["html_file"],encoding="utf-8") as f:
+                html = f.read()
+        except OSError:
+            html = None
+    if html is None:
+        data = _source_data(source)
+        try:
+            html = render_source(decode_text(data),source["language"])
+        except Exception:
+            # Index the text of a page that won't render as it is
+            html = f"<p>{escape(decode_text(data,errors='replace'))}</p>"
+    return _document_from_text(item,extract_page_text(html,source["code_mode"]))
+
+
+def _source_data(source):
+    if source["data"] is not None:
+        return source["data"]
+    with open(source["source_file"],"rb") as f:
+        return f.read()
+
+
+def _source_size(source):
+    if source["data"] is not None:
+        return len(source["data"])
+    return os.path.getsize(source["source_file"])
+
+
+def _document_from_text(item, text):
+    return {
+        SEARCH_REF: item[SEARCH_REF],
+        "title": text["title"] or item["source"]["title"],
+        "headings": text["headings"],
+        "body": text["body"],
+        "code": text["code"]
+    }
+
+
+def document_key(doc):
+    # Search sources carry their own key, and plain documents are hashed
+    return doc.get("key") or document_hash(doc)
+
+
+def search_index_stats(serialized_index, serialized):
+    return {
+        "terms": len(serialized_index["invertedIndex"]),
+        "bytes": len(serialized.encode("utf-8"))
+    }
+
+
+def analyze_document(builder, doc):
+    """
+    Run the builder's pipeline over each field of a document, returning
+    the field length and its terms with counts in order of first appearance.
+    """
+    analysis = {}
+    for field_name in builder._fields:
+        terms = builder.pipeline.run(Tokenizer(doc[field_name]),field_name)
+        counts = {}
+        for term in terms:
+            term = str(term)
+            counts[term] = counts.get(term,0) + 1
+        analysis[field_name] = {
+            "length": len(terms),
+            "terms": list(counts.items())
+        }
+    return analysis
+
+
+def add_analyzed_document(builder, ref, analysis):
+    # Mirrors `Builder.add` but from already analyzed terms
+    builder._documents[ref] = {}
+    builder.document_count += 1
+    for field_name in builder._fields:
+        field = analysis[field_name]
+        field_ref = str(FieldRef(ref,field_name))
+        field_terms = defaultdict(int)
+        builder.field_term_frequencies[field_ref] = field_terms
+        builder.field_lengths[field_ref] = field["length"]
+        for term,count in field["terms"]:
+            field_terms[term] = count
+            if term not in builder.inverted_index:
+                posting = { _field_name:{} for _field_name in builder._fields }
+                posting["_index"] = builder.term_index
+                builder.term_index += 1
+                builder.inverted_index[term] = posting
+            builder.inverted_index[term][field_name][ref] = defaultdict(list)
+
+
+class SearchAnalysisCache:
+
+    def __init__(self, filepath, entries=None, stats=None):
+        self.filepath = Path(filepath)
+        # Entries are keyed by document ref
+        self.entries = {} if entries is None else entries
+        # The term count and size of the last index built from these entries
+        self.stats = stats
+
+    @classmethod
+    def load(cls, filepath):
+        filepath = Path(filepath)
+        if not filepath.is_file():
+            return cls(filepath)
+        try:
+            obj = json.loads(filepath.read_text())
+        except ValueError:
+            print(f"Ignoring unreadable search cache: {filepath}")
+            return cls(filepath)
+        if obj.get("version") != SEARCH_INDEX_VERSION:
+            return cls(filepath)
+        return cls(filepath,entries=obj.get("documents",{}),stats=obj.get("stats"))
+
+    def save(self):
+        self.filepath.parent.mkdir(parents=True,exist_ok=True)
+        with atomic_open(self.filepath) as f:
+            json.dump({
+                "version": SEARCH_INDEX_VERSION,
+                "stats": self.stats,
+                "documents": self.entries
+            },f,indent=None)
+
+    def get(self, ref, sha256):
+        entry = self.entries.get(ref)
+        if entry is None or entry["sha256"] != sha256:
+            return None
+        return entry["analysis"]
+
+
+# Each worker process keeps its own builder to run the pipeline with
+_WORKER_BUILDER = None
+
+def _analyze_batch(batch):
+    global _WORKER_BUILDER
+    if _WORKER_BUILDER is None:
+        _WORKER_BUILDER = make_builder()
+    return [ analyze_document(_WORKER_BUILDER,search_document(doc)) for doc in batch ]
+
+
+def build_search_index(documents, cache, pool=None):
+    """
+    Build the serialized index for the documents or search sources, only
+    analyzing ones that are not already in the cache. The cache is updated to hold exactly
+    the given documents. Returns the serialized index and the number analyzed.
+
+    If a worker pool is given, the documents to analyze are partitioned across
+    its workers. The analyses are then merged back in document order, so the
+    index is the same as a serial build.
+    """
+    # Find what we need to analyze
+    hashes = [ document_key(doc) for doc in documents ]
+    analyses = [ cache.get(str(doc[SEARCH_REF]),sha256) for doc,sha256 in zip(documents,hashes) ]
+    todo = [ i for i,analysis in enumerate(analyses) if analysis is None ]
+
+    # Analyze the partitions, serially or over the pool
+    if pool is None or pool.jobs == 1 or len(todo) < 2:
+        results = _analyze_batch([ documents[i] for i in todo ])
+    else:
+        partition_size = max(1,-(-len(todo)//(pool.jobs*4)))
+        results = []
+        for batch in pool.map_batches(_analyze_batch,[ documents[i] for i in todo ],batch_size=partition_size):
+            results.extend(batch)
+    for i,analysis in zip(todo,results):
+        analyses[i] = analysis
+
+    # Merge everything into one builder in document order
+    builder = make_builder()
+    entries = {}
+    for doc,sha256,analysis in zip(documents,hashes,analyses):
+        ref = str(doc[SEARCH_REF])
+        entries[ref] = { "sha256":sha256, "analysis":analysis }
+        add_analyzed_document(builder,ref,analysis)
+    cache.entries = entries
+    n_analyzed = len(todo)
+
+    serialized_index = builder.build().serialize()
+    serialized_index["docd_index_version"] = SEARCH_INDEX_VERSION
+    return serialized_index,n_analyzed
+
+
+def verify_search_index(documents, serialized_index, n_queries=200):
+    """
+    Check an index against a plain serial `lunr()` build of the same documents,
+    comparing both the serialized form and the results of sample queries.
+    Returns a list of problems, which is empty if they match.
+    """
+    documents = [ search_document(doc) for doc in documents ]
+    serial = make_builder()
+    for doc in documents:
+        serial.add(doc)
+    serial_index = serial.build()
+    expected = serial_index.serialize()
+
+    problems = []
+    actual = dict(serialized_index)
+    actual.pop("docd_index_version",None)
+    if json.dumps(actual) != json.dumps(expected):
+        problems.append("serialized index differs from a serial build")
+
+    # Query a spread of the indexed terms plus some of the titles
+    loaded = Index.load(serialized_index)
+    terms = sorted(serial_index.inverted_index)
+    step = max(1,len(terms)//n_queries)
+    queries = terms[::step] + [ str(doc["title"]) for doc in documents[:n_queries] ]
+    for query in queries:
+        query = query.replace(":"," ").replace("~"," ").replace("^"," ")
+        try:
+            want = [ (r["ref"],r["score"]) for r in serial_index.search(query) ]
+        except Exception:
+            continue
+        got = [ (r["ref"],r["score"]) for r in loaded.search(query) ]
+        if got != want:
+            problems.append(f"results differ for query {query!r}")
+    return problems
@@ -41,5 +41,55 @@
  */n.Index=function(r){this.invertedIndex=r.invertedIndex,this.fieldVectors=r.fieldVectors,this.tokenSet=r.tokenSet,this.fields=r.fields,this.pipeline=r.pipeline},n.Index.prototype.search=function(r){return this.query(function(s){var i=new n.QueryParser(r,s);i.parse()})},n.Index.prototype.query=function(r){for(var s=new n.Query(this.fields),i=Object.create(null),o=Object.create(null),l=Object.create(null),c=Object.create(null),a=Object.create(null),f=0;f<this.fields.length;f++)o[this.fields[f]]=new n.Vector;r.call(s,s);for(var f=0;f<s.clauses.length;f++){var d=s.clauses[f],p=null,m=n.Set.empty;d.usePipeline?p=this.pipeline.runString(d.term,{fields:d.fields}):p=[d.term];for(var R=0;R<p.length;R++){var b=p[R];d.term=b;var k=n.TokenSet.fromClause(d),F=this.tokenSet.intersect(k).toArray();if(F.length===0&&d.presence===n.Query.presence.REQUIRED){for(var P=0;P<d.fields.length;P++){var $=d.fields[P];c[$]=n.Set.empty}break}for(var A=0;A<F.length;A++)for(var q=F[A],oe=this.invertedIndex[q],le=oe._index,P=0;P<d.fields.length;P++){var $=d.fields[P],xe=oe[$],Ce=Object.keys(xe),we=q+"/"+$,$e=new n.Set(Ce);if(d.presence==n.Query.presence.REQUIRED&&(m=m.union($e),c[$]===void 0&&(c[$]=n.Set.complete)),d.presence==n.Query.presence.PROHIBITED){a[$]===void 0&&(a[$]=n.Set.empty),a[$]=a[$].union($e);continue}if(o[$].upsert(le,d.boost,function(X,u){return X+u}),!l[we]){for(var Ie=0;Ie<Ce.length;Ie++){var be=Ce[Ie],Oe=new n.FieldRef(be,$),Fe=xe[be],ue;(ue=i[Oe])===void 0?i[Oe]=new n.MatchData(q,$,Fe):ue.add(q,$,Fe)}l[we]=!0}}}if(d.presence===n.Query.presence.REQUIRED)for(var P=0;P<d.fields.length;P++){var $=d.fields[P];c[$]=c[$].intersect(m)}}for(var J=n.Set.complete,z=n.Set.empty,f=0;f<this.fields.length;f++){var $=this.fields[f];c[$]&&(J=J.intersect(c[$])),a[$]&&(z=z.union(a[$]))}var O=Object.keys(i),W=[],me=Object.create(null);if(s.isNegated()){O=Object.keys(this.fieldVectors);for(var f=0;f<O.length;f++){var Oe=O[f],se=n.FieldRef.fromString(Oe);i[Oe]=new n.MatchData}}for(var f=0;f<O.length;f++){var se=n.FieldRef.fromString(O[f]),D=se.docRef;if(J.contains(D)&&!z.contains(D)){var ne=this.fieldVectors[se],Ae=o[se.fieldName].similarity(ne),fe;if((fe=me[D])!==void 0)fe.score+=Ae,fe.matchData.combine(i[se]);else{var g={ref:D,score:Ae,matchData:i[se]};me[D]=g,W.push(g)}}}return W.sort(function(T,S){return S.score-T.score})},n.Index.prototype.toJSON=function(){var r=Object.keys(this.invertedIndex).sort().map(function(i){return[i,this.invertedIndex[i]]},this),s=Object.keys(this.fieldVectors).map(function(i){return[i,this.fieldVectors[i].toJSON()]},this);return{version:n.version,fields:this.fields,fieldVectors:s,invertedIndex:r,pipeline:this.pipeline.toJSON()}},n.Index.load=function(r){var s={},i={},o=r.fieldVectors,l=Object.create(null),c=r.invertedIndex,a=new n.TokenSet.Builder,f=n.Pipeline.load(r.pipeline);r.version!=n.version&&n.utils.warn("Version mismatch when loading serialised index. Current version of lunr '"+n.version+"' does not match serialized index '"+r.version+"'");for(var d=0;d<o.length;d++){var p=o[d],m=p[0],R=p[1];i[m]=new n.Vector(R)}for(var d=0;d<c.length;d++){var p=c[d],b=p[0],k=p[1];a.insert(b),l[b]=k}return a.finish(),s.fields=r.fields,s.fieldVectors=i,s.invertedIndex=l,s.tokenSet=a.root,s.pipeline=f,new n.Index(s)};/*!
  * lunr.Builder
  * Copyright (C) 2020 Oliver Nightingale
- */n.Builder=function(){this._ref="id",this._fields=Object.create(null),this._documents=Object.create(null),this.invertedIndex=Object.create(null),this.fieldTermFrequencies={},this.fieldLengths={},this.tokenizer=n.tokenizer,this.pipeline=new n.Pipeline,this.searchPipeline=new n.Pipeline,this.documentCount=0,this._b=.75,this._k1=1.2,this.termIndex=0,this.metadataWhitelist=[]},n.Builder.prototype.ref=function(r){this._ref=r},n.Builder.prototype.field=function(r,s){if(/\//.test(r))throw new RangeError("Field '"+r+"' contains illegal character '/'");this._fields[r]=s||{}},n.Builder.prototype.b=function(r){r<0?this._b=0:r>1?this._b=1:this._b=r},n.Builder.prototype.k1=function(r){this._k1=r},n.Builder.prototype.add=function(r,s){var i=r[this._ref],o=Object.keys(this._fields);this._documents[i]=s||{},this.documentCount+=1;for(var l=0;l<o.length;l++){var c=o[l],a=this._fields[c].extractor,f=a?a(r):r[c],d=this.tokenizer(f,{fields:[c]}),p=this.pipeline.run(d),m=new n.FieldRef(i,c),R=Object.create(null);this.fieldTermFrequencies[m]=R,this.fieldLengths[m]=0,this.fieldLengths[m]+=p.length;for(var b=0;b<p.length;b++){var k=p[b];if(R[k]==null&&(R[k]=0),R[k]+=1,this.invertedIndex[k]==null){var F=Object.create(null);F._index=this.termIndex,this.termIndex+=1;for(var P=0;P<o.length;P++)F[o[P]]=Object.create(null);this.invertedIndex[k]=F}this.invertedIndex[k][c][i]==null&&(this.invertedIndex[k][c][i]=Object.create(null));for(var $=0;$<this.metadataWhitelist.length;$++){var A=this.metadataWhitelist[$],q=k.metadata[A];this.invertedIndex[k][c][i][A]==null&&(this.invertedIndex[k][c][i][A]=[]),this.invertedIndex[k][c][i][A].push(q)}}}},n.Builder.prototype.calculateAverageFieldLengths=function(){for(var r=Object.keys(this.fieldLengths),s=r.length,i={},o={},l=0;l<s;l++){var c=n.FieldRef.fromString(r[l]),a=c.fieldName;o[a]||(o[a]=0),o[a]+=1,i[a]||(i[a]=0),i[a]+=this.fieldLengths[c]}for(var f=Object.keys(this._fields),l=0;l<f.length;l++){var d=f[l];i[d]=i[d]/o[d]}this.averageFieldLength=i},n.Builder.prototype.createFieldVectors=function(){for(var r={},s=Object.keys(this.fieldTermFrequencies),i=s.length,o=Object.create(null),l=0;l<i;l++){for(var c=n.FieldRef.fromString(s[l]),a=c.fieldName,f=this.fieldLengths[c],d=new n.Vector,p=this.fieldTermFrequencies[c],m=Object.keys(p),R=m.length,b=this._fields[a].boost||1,k=this._documents[c.docRef].boost||1,F=0;F<R;F++){var P=m[F],$=p[P],A=this.invertedIndex[P]._index,q,oe,le;o[P]===void 0?(q=n.idf(this.invertedIndex[P],this.documentCount),o[P]=q):q=o[P],oe=q*((this._k1+1)*$)/(this._k1*(1-this._b+this._b*(f/this.averageFieldLength[a]))+$),oe*=b,oe*=k,le=Math.round(oe*1e3)/1e3,d.insert(A,le)}r[c]=d}this.fieldVectors=r},n.Builder.prototype.createTokenSet=function(){this.tokenSet=n.TokenSet.fromArray(Object.keys(this.invertedIndex).sort())},n.Builder.prototype.build=function(){return this.calculateAverageFieldLengths(),this.createFieldVectors(),this.createTokenSet(),new n.Index({invertedIndex:this.invertedIndex,fieldVectors:this.fieldVectors,tokenSet:this.tokenSet,fields:Object.keys(this._fields),pipeline:this.searchPipeline})},n.Builder.prototype.use=function(r){var s=Array.prototype.slice.call(arguments,1);s.unshift(this),r.apply(this,s)},n.MatchData=function(r,s,i){for(var o=Object.create(null),l=Object.keys(i||{}),c=0;c<l.length;c++){var a=l[c];o[a]=i[a].slice()}this.metadata=Object.create(null),r!==void 0&&(this.metadata[r]=Object.create(null),this.metadata[r][s]=o)},n.MatchData.prototype.combine=function(r){for(var s=Object.keys(r.metadata),i=0;i<s.length;i++){var o=s[i],l=Object.keys(r.metadata[o]);this.metadata[o]==null&&(this.metadata[o]=Object.create(null));for(var c=0;c<l.length;c++){var a=l[c],f=Object.keys(r.metadata[o][a]);this.metadata[o][a]==null&&(this.metadata[o][a]=Object.create(null));for(var d=0;d<f.length;d++){var p=f[d];this.metadata[o][a][p]==null?this.metadata[o][a][p]=r.metadata[o][a][p]:this.metadata[o][a][p]=this.metadata[o][a][p].concat(r.metadata[o][a][p])}}}},n.MatchData.prototype.add=function(r,s,i){if(!(r in this.metadata)){this.metadata[r]=Object.create(null),this.metadata[r][s]=i;return}if(!(s in this.metadata[r])){this.metadata[r][s]=i;return}for(var o=Object.keys(i),l=0;l<o.length;l++){var c=o[l];c in this.metadata[r][s]?this.metadata[r][s][c]=this.metadata[r][s][c].concat(i[c]):this.metadata[r][s][c]=i[c]}},n.Query=function(r){this.clauses=[],this.allFields=r},n.Query.wildcard=new String("*"),n.Query.wildcard.NONE=0,n.Query.wildcard.LEADING=1,n.Query.wildcard.TRAILING=2,n.Query.presence={OPTIONAL:1,REQUIRED:2,PROHIBITED:3},n.Query.prototype.clause=function(r){return"fields"in r||(r.fields=this.allFields),"boost"in r||(r.boost=1),"usePipeline"in r||(r.usePipeline=!0),"wildcard"in r||(r.wildcard=n.Query.wildcard.NONE),r.wildcard&n.Query.wildcard.LEADING&&r.term.charAt(0)!=n.Query.wildcard&&(r.term="*"+r.term),r.wildcard&n.Query.wildcard.TRAILING&&r.term.slice(-1)!=n.Query.wildcard&&(r.term=""+r.term+"*"),"presence"in r||(r.presence=n.Query.presence.OPTIONAL),this.clauses.push(r),this},n.Query.prototype.isNegated=function(){for(var r=0;r<this.clauses.length;r++)if(this.clauses[r].presence!=n.Query.presence.PROHIBITED)return!1;return!0},n.Query.prototype.term=function(r,s){if(Array.isArray(r))return r.forEach(function(o){this.term(o,n.utils.clone(s))},this),this;var i=s||{};return i.term=r.toString(),this.clause(i),this},n.QueryParseError=function(r,s,i){this.name="QueryParseError",this.message=r,this.start=s,this.end=i},n.QueryParseError.prototype=new Error,n.QueryLexer=function(r){this.lexemes=[],this.str=r,this.length=r.length,this.pos=0,this.start=0,this.escapeCharPositions=[]},n.QueryLexer.prototype.run=function(){for(var r=n.QueryLexer.lexText;r;)r=r(this)},n.QueryLexer.prototype.sliceString=function(){for(var r=[],s=this.start,i=this.pos,o=0;o<this.escapeCharPositions.length;o++)i=this.escapeCharPositions[o],r.push(this.str.slice(s,i)),s=i+1;return r.push(this.str.slice(s,this.pos)),this.escapeCharPositions.length=0,r.join("")},n.QueryLexer.prototype.emit=function(r){this.lexemes.push({type:r,str:this.sliceString(),start:this.start,end:this.pos}),this.start=this.pos},n.QueryLexer.prototype.escapeCharacter=function(){this.escapeCharPositions.push(this.pos-1),this.pos+=1},n.QueryLexer.prototype.next=function(){if(this.pos>=this.length)return n.QueryLexer.EOS;var r=this.str.charAt(this.pos);return this.pos+=1,r},n.QueryLexer.prototype.width=function(){return this.pos-this.start},n.QueryLexer.prototype.ignore=function(){this.start==this.pos&&(this.pos+=1),this.start=this.pos},n.QueryLexer.prototype.backup=function(){this.pos-=1},n.QueryLexer.prototype.acceptDigitRun=function(){var r,s;do r=this.next(),s=r.charCodeAt(0);while(s>47&&s<58);r!=n.QueryLexer.EOS&&this.backup()},n.QueryLexer.prototype.more=function(){return this.pos<this.length},n.QueryLexer.EOS="EOS",n.QueryLexer.FIELD="FIELD",n.QueryLexer.TERM="TERM",n.QueryLexer.EDIT_DISTANCE="EDIT_DISTANCE",n.QueryLexer.BOOST="BOOST",n.QueryLexer.PRESENCE="PRESENCE",n.QueryLexer.lexField=function(r){return r.backup(),r.emit(n.QueryLexer.FIELD),r.ignore(),n.QueryLexer.lexText},n.QueryLexer.lexTerm=function(r){if(r.width()>1&&(r.backup(),r.emit(n.QueryLexer.TERM)),r.ignore(),r.more())return n.QueryLexer.lexText},n.QueryLexer.lexEditDistance=function(r){return r.ignore(),r.acceptDigitRun(),r.emit(n.QueryLexer.EDIT_DISTANCE),n.QueryLexer.lexText},n.QueryLexer.lexBoost=function(r){return r.ignore(),r.acceptDigitRun(),r.emit(n.QueryLexer.BOOST),n.QueryLexer.lexText},n.QueryLexer.lexEOS=function(r){r.width()>0&&r.emit(n.QueryLexer.TERM)},n.QueryLexer.termSeparator=n.tokenizer.separator,n.QueryLexer.lexText=function(r){for(;;){var s=r.next();if(s==n.QueryLexer.EOS)return n.QueryLexer.lexEOS;if(s.charCodeAt(0)==92){r.escapeCharacter();continue}if(s==":")return n.QueryLexer.lexField;if(s=="~")return r.backup(),r.width()>0&&r.emit(n.QueryLexer.TERM),n.QueryLexer.lexEditDistance;if(s=="^")return r.backup(),r.width()>0&&r.emit(n.QueryLexer.TERM),n.QueryLexer.lexBoost;if(s=="+"&&r.width()===1||s=="-"&&r.width()===1)return r.emit(n.QueryLexer.PRESENCE),n.QueryLexer.lexText;if(s.match(n.QueryLexer.termSeparator))return n.QueryLexer.lexTerm}},n.QueryParser=function(r,s){this.lexer=new n.QueryLexer(r),this.query=s,this.currentClause={},this.lexemeIdx=0},n.QueryParser.prototype.parse=function(){this.lexer.run(),this.lexemes=this.lexer.lexemes;for(var r=n.QueryParser.parseClause;r;)r=r(this);return this.query},n.QueryParser.prototype.peekLexeme=function(){return this.lexemes[this.lexemeIdx]},n.QueryParser.prototype.consumeLexeme=function(){var r=this.peekLexeme();return this.lexemeIdx+=1,r},n.QueryParser.prototype.nextClause=function(){var r=this.currentClause;this.query.clause(r),this.currentClause={}},n.QueryParser.parseClause=function(r){var s=r.peekLexeme();if(s!=null)switch(s.type){case n.QueryLexer.PRESENCE:return n.QueryParser.parsePresence;case n.QueryLexer.FIELD:return n.QueryParser.parseField;case n.QueryLexer.TERM:return n.QueryParser.parseTerm;default:var i="expected either a field or a term, found "+s.type;throw s.str.length>=1&&(i+=" with value '"+s.str+"'"),new n.QueryParseError(i,s.start,s.end)}},n.QueryParser.parsePresence=function(r){var s=r.consumeLexeme();if(s!=null){switch(s.str){case"-":r.currentClause.presence=n.Query.presence.PROHIBITED;break;case"+":r.currentClause.presence=n.Query.presence.REQUIRED;break;default:var i="unrecognised presence operator'"+s.str+"'";throw new n.QueryParseError(i,s.start,s.end)}var o=r.peekLexeme();if(o==null){var i="expecting term or field, found nothing";throw new n.QueryParseError(i,s.start,s.end)}switch(o.type){case n.QueryLexer.FIELD:return n.QueryParser.parseField;case n.QueryLexer.TERM:return n.QueryParser.parseTerm;default:var i="expecting term or field, found '"+o.type+"'";throw new n.QueryParseError(i,o.start,o.end)}}},n.QueryParser.parseField=function(r){var s=r.consumeLexeme();if(s!=null){if(r.query.allFields.indexOf(s.str)==-1){var i=r.query.allFields.map(function(c){return"'"+c+"'"}).join(", "),o="unrecognised field '"+s.str+"', possible fields: "+i;throw new n.QueryParseError(o,s.start,s.end)}r.currentClause.fields=[s.str];var l=r.peekLexeme();if(l==null){var o="expecting term, found nothing";throw new n.QueryParseError(o,s.start,s.end)}switch(l.type){case n.QueryLexer.TERM:return n.QueryParser.parseTerm;default:var o="expecting term, found '"+l.type+"'";throw new n.QueryParseError(o,l.start,l.end)}}},n.QueryParser.parseTerm=function(r){var s=r.consumeLexeme();if(s!=null){r.currentClause.term=s.str.toLowerCase(),s.str.indexOf("*")!=-1&&(r.currentClause.usePipeline=!1);var i=r.peekLexeme();if(i==null){r.nextClause();return}switch(i.type){case n.QueryLexer.TERM:return r.nextClause(),n.QueryParser.parseTerm;case n.QueryLexer.FIELD:return r.nextClause(),n.QueryParser.parseField;case n.QueryLexer.EDIT_DISTANCE:return n.QueryParser.parseEditDistance;case n.QueryLexer.BOOST:return n.QueryParser.parseBoost;case n.QueryLexer.PRESENCE:return r.nextClause(),n.QueryParser.parsePresence;default:var o="Unexpected lexeme type '"+i.type+"'";throw new n.QueryParseError(o,i.start,i.end)}}},n.QueryParser.parseEditDistance=function(r){var s=r.consumeLexeme();if(s!=null){var i=parseInt(s.str,10);if(isNaN(i)){var o="edit distance must be numeric";throw new n.QueryParseError(o,s.start,s.end)}r.currentClause.editDistance=i;var l=r.peekLexeme();if(l==null){r.nextClause();return}switch(l.type){case n.QueryLexer.TERM:return r.nextClause(),n.QueryParser.parseTerm;case n.QueryLexer.FIELD:return r.nextClause(),n.QueryParser.parseField;case n.QueryLexer.EDIT_DISTANCE:return n.QueryParser.parseEditDistance;case n.QueryLexer.BOOST:return n.QueryParser.parseBoost;case n.QueryLexer.PRESENCE:return r.nextClause(),n.QueryParser.parsePresence;default:var o="Unexpected lexeme type '"+l.type+"'";throw new n.QueryParseError(o,l.start,l.end)}}},n.QueryParser.parseBoost=function(r){var s=r.consumeLexeme();if(s!=null){var i=parseInt(s.str,10);if(isNaN(i)){var o="boost must be numeric";throw new n.QueryParseError(o,s.start,s.end)}r.currentClause.boost=i;var l=r.peekLexeme();if(l==null){r.nextClause();return}switch(l.type){case n.QueryLexer.TERM:return r.nextClause(),n.QueryParser.parseTerm;case n.QueryLexer.FIELD:return r.nextClause(),n.QueryParser.parseField;case n.QueryLexer.EDIT_DISTANCE:return n.QueryParser.parseEditDistance;case n.QueryLexer.BOOST:return n.QueryParser.parseBoost;case n.QueryLexer.PRESENCE:return r.nextClause(),n.QueryParser.parsePresence;default:var o="Unexpected lexeme type '"+l.type+"'";throw new n.QueryParseError(o,l.start,l.end)}}},function(r,s){e.exports=s()}(this,function(){return n})})()})(Ui);var ma=Ui.exports;const ga=_a(ma);function un(){return Math.random().toString(36).substr(2)}class ya{constructor(t,n){this.$G=t;const r=`${n.root_uri}/_resources`;this.API_URIS={},this.API_URIS.PAGE_DB_FILE=`${r}/pages-database.json?h=${un()}`,this.API_URIS.SEARCH_INDEX_FILE=`${r}/search/serialized-index.json?h=${un()}`,this.API_URIS.PAGE_RENDERER_FILE=s=>`${r}/pages-html/${s}.html?h=${un()}`,this.API_URIS.PAGE_RAW_FILE=s=>`${r}/pages-txt/${s}.txt?h=${un()}`,this._uistate=Tt({is_mobile:!1,theme:"light",show_nav:!1,show_search:!1,error_open:!1,error_msg:"",article_view_mode:"rendered"}),this._data=Tt({name:n.name,footer_text:n.footer_text,home_addr:n.home_addr,root_node:null,nodes_by_uri:new Map,directory_nodes_by_uri:new Map,orphaned_nodes:new Set,current_uri:"",current_html:"",current_raw_text:"",current_node:null,has_search_result:!1,search_results:[]}),this._is_page_data_loaded=!1,this._page_data_loaded_state_hold=null,this._is_search_index_loaded=!1,this._setup_theme()}async start(){if(await this._fetch_page_database(),this._is_page_data_loaded=!0,this._page_data_loaded_state_hold!=null){const{name:t,params:n}=this._page_data_loaded_state_hold;this.load_page_view(t,n)}}get uistate(){return this._uistate}get data(){return this._data}_setup_theme(){const t="(min-width:768px)",n=s=>{const i=window.matchMedia(t);this._uistate.is_mobile=!i.matches,this._uistate.is_mobile||(this._uistate.show_nav=!0)};new ResizeObserver(s=>{n()}).observe(document.body),n(),localStorage.theme==="dark"||!("theme"in localStorage)&&window.matchMedia("(prefers-color-scheme: dark)").matches?(this._uistate.theme="dark",document.documentElement.classList.add("dark")):(this._uistate.theme="light",document.documentElement.classList.remove("dark"))}set_theme(t){t!="dark"&&t!="light"&&console.warn(`Unknown theme: ${t}`),localStorage.theme=t,this._uistate.theme=t,t=="dark"?document.documentElement.classList.add("dark"):document.documentElement.classList.remove("dark")}toggle_all_directories(t){for(const n of this._data.directory_nodes_by_uri.values())n._is_open=t}open_search_modal(){this._uistate.show_search=!0,this._data.has_search_result=!1,this._data.search_results=[]}close_search_modal(){this._uistate.show_search=!1}async _fetch_page_database(){(await(await window.fetch(this.API_URIS.PAGE_DB_FILE)).json()).forEach(r=>this._process_node(r))}_process_node(t){const n=t.uri;if(t.kind=="directory"&&(t.files=[],t.directories=[],t._is_open=!0),this._data.nodes_by_uri.set(n,t),t.kind=="directory"&&this._data.directory_nodes_by_uri.set(n,t),t.parent_uri){const r=this._data.nodes_by_uri.get(t.parent_uri)||null;r==null?this._data.orphaned_nodes.add(t):t.kind=="file"?r.files.push(t):r.directories.push(t)}if(n=="."&&(this._data.root_node=t),t.kind=="directory")for(const r of this._data.orphaned_nodes)r.parent_uri==t.uri&&(r.kind=="file"?t.files.push(r):t.directories.push(r)),this._data.orphaned_nodes.delete(r)}clear_errors(){this._uistate.error_open=!1}set_error(t){this._uistate.error_open=!0,this._uistate.error_msg=t}async load_page_view(t,n){if(!this._is_page_data_loaded){this._page_data_loaded_state_hold={name:t,params:n};return}const r=n.pagepath.join("/");try{this.clear_errors();const s=this._data.nodes_by_uri.get(r);this._data.current_node=s,this._data.current_uri=r;const o=await(await window.fetch(this.API_URIS.PAGE_RENDERER_FILE(s.uri))).text();this._data.current_html=o}catch(s){console.error("Error loading page:",r,s),this.set_error(`Failed to load ${r}`)}this._uistate.is_mobile&&(this._uistate.show_nav=!1),this._uistate.article_view_mode="rendered"}async load_raw_text(){const n=await(await window.fetch(this.API_URIS.PAGE_RAW_FILE(this._data.current_node.uri))).text();this._data.current_raw_text=n,this._uistate.article_view_mode="raw"}async load_search_system(){const n=await(await window.fetch(this.API_URIS.SEARCH_INDEX_FILE)).json();this.search_index=ga.Index.load(n),this._is_search_index_loaded=!0}async trigger_search(t){this._is_search_index_loaded||await this.load_search_system();const n=this.search_index.search(t);this._data.has_search_result=!0,this._data.search_results=Object.freeze(n)}}const pe=(e,t)=>{const n=e.__vccOpts||e;for(const[r,s]of t)n[r]=s;return n},va={},xa={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-list",viewBox:"0 0 16 16"},wa=L("path",{"fill-rule":"evenodd",d:"M2.5 12a.5.5 0 0 1 .5-.5h10a.5.5 0 0 1 0 1H3a.5.5 0 0 1-.5-.5m0-4a.5.5 0 0 1 .5-.5h10a.5.5 0 0 1 0 1H3a.5.5 0 0 1-.5-.5m0-4a.5.5 0 0 1 .5-.5h10a.5.5 0 0 1 0 1H3a.5.5 0 0 1-.5-.5"},null,-1),ba=[wa];function Ea(e,t,n,r,s,i){return V(),G("svg",xa,ba)}const Ra=pe(va,[["render",Ea]]),Pa={},Sa={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-search",viewBox:"0 0 16 16"},Ca=L("path",{d:"M11.742 10.344a6.5 6.5 0 1 0-1.397 1.398h-.001q.044.06.098.115l3.85 3.85a1 1 0 0 0 1.415-1.414l-3.85-3.85a1 1 0 0 0-.115-.1zM12 6.5a5.5 5.5 0 1 1-11 0 5.5 5.5 0 0 1 11 0"},null,-1),$a=[Ca];function Ia(e,t,n,r,s,i){return V(),G("svg",Sa,$a)}const Ar=pe(Pa,[["render",Ia]]),Oa={data(){return{}},components:{IconList:Ra,IconSearch:Ar},computed:{name(){return this.$M.data.name},show_nav:{get(){return this.$M.uistate.show_nav},set(e){this.$M.uistate.show_nav=e}}},methods:{open_search_modal(){this.$M.open_search_modal()}}},Ta={class:"show-when-mobile-flex ui-parent-row items-center gap-x-4 p-4 border-b th-core-border-base th-core-text-pop"},ka={class:"text-xl font-bold"};function Aa(e,t,n,r,s,i){const o=de("IconList"),l=de("IconSearch");return V(),G("header",Ta,[L("button",{class:"sq-6",onClick:t[0]||(t[0]=c=>i.show_nav=!0)},[te(o)]),L("button",{class:"sq-5",onClick:t[1]||(t[1]=(...c)=>i.open_search_modal&&i.open_search_modal(...c))},[te(l)]),L("h1",ka,tt(i.name),1)])}const La=pe(Oa,[["render",Aa]]),Ma={data(){return{}},computed:{footer_text(){return this.$M.data.footer_text}}},Fa={class:"flex flex-row items-center justify-center p-8 bg-core-950 text-core-500 text-sm"};function Qa(e,t,n,r,s,i){return V(),G("footer",Fa,[L("span",null,tt(i.footer_text),1)])}const Na=pe(Ma,[["render",Qa]]),ja={},Da={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-house",viewBox:"0 0 16 16"},Ba=L("path",{d:"M8.707 1.5a1 1 0 0 0-1.414 0L.646 8.146a.5.5 0 0 0 .708.708L2 8.207V13.5A1.5 1.5 0 0 0 3.5 15h9a1.5 1.5 0 0 0 1.5-1.5V8.207l.646.647a.5.5 0 0 0 .708-.708L13 5.793V2.5a.5.5 0 0 0-.5-.5h-1a.5.5 0 0 0-.5.5v1.293zM13 7.207V13.5a.5.5 0 0 1-.5.5h-9a.5.5 0 0 1-.5-.5V7.207l5-5z"},null,-1),Ha=[Ba];function Ua(e,t,n,r,s,i){return V(),G("svg",Da,Ha)}const Va=pe(ja,[["render",Ua]]),za={},Ka={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-sun",viewBox:"0 0 16 16"},qa=L("path",{d:"M8 11a3 3 0 1 1 0-6 3 3 0 0 1 0 6m0 1a4 4 0 1 0 0-8 4 4 0 0 0 0 8M8 0a.5.5 0 0 1 .5.5v2a.5.5 0 0 1-1 0v-2A.5.5 0 0 1 8 0m0 13a.5.5 0 0 1 .5.5v2a.5.5 0 0 1-1 0v-2A.5.5 0 0 1 8 13m8-5a.5.5 0 0 1-.5.5h-2a.5.5 0 0 1 0-1h2a.5.5 0 0 1 .5.5M3 8a.5.5 0 0 1-.5.5h-2a.5.5 0 0 1 0-1h2A.5.5 0 0 1 3 8m10.657-5.657a.5.5 0 0 1 0 .707l-1.414 1.415a.5.5 0 1 1-.707-.708l1.414-1.414a.5.5 0 0 1 .707 0m-9.193 9.193a.5.5 0 0 1 0 .707L3.05 13.657a.5.5 0 0 1-.707-.707l1.414-1.414a.5.5 0 0 1 .707 0zm9.193 2.121a.5.5 0 0 1-.707 0l-1.414-1.414a.5.5 0 0 1 .707-.707l1.414 1.414a.5.5 0 0 1 0 .707M4.464 4.465a.5.5 0 0 1-.707 0L2.343 3.05a.5.5 0 1 1 .707-.707l1.414 1.414a.5.5 0 0 1 0 .708z"},null,-1),Wa=[qa];function Ga(e,t,n,r,s,i){return V(),G("svg",Ka,Wa)}const Ja=pe(za,[["render",Ga]]),Ya={},Xa={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-moon",viewBox:"0 0 16 16"},Za=L("path",{d:"M6 .278a.768.768 0 0 1 .08.858 7.208 7.208 0 0 0-.878 3.46c0 4.021 3.278 7.277 7.318 7.277.527 0 1.04-.055 1.533-.16a.787.787 0 0 1 .81.316.733.733 0 0 1-.031.893A8.349 8.349 0 0 1 8.344 16C3.734 16 0 12.286 0 7.71 0 4.266 2.114 1.312 5.124.06A.752.752 0 0 1 6 .278M4.858 1.311A7.269 7.269 0 0 0 1.025 7.71c0 4.02 3.279 7.276 7.319 7.276a7.316 7.316 0 0 0 5.205-2.162c-.337.042-.68.063-1.029.063-4.61 0-8.343-3.714-8.343-8.29 0-1.167.242-2.278.681-3.286z"},null,-1),eu=[Za];function tu(e,t,n,r,s,i){return V(),G("svg",Xa,eu)}const nu=pe(Ya,[["render",tu]]),ru={},su={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-map",viewBox:"0 0 16 16"},iu=L("path",{"fill-rule":"evenodd",d:"M15.817.113A.5.5 0 0 1 16 .5v14a.5.5 0 0 1-.402.49l-5 1a.5.5 0 0 1-.196 0L5.5 15.01l-4.902.98A.5.5 0 0 1 0 15.5v-14a.5.5 0 0 1 .402-.49l5-1a.5.5 0 0 1 .196 0L10.5.99l4.902-.98a.5.5 0 0 1 .415.103M10 1.91l-4-.8v12.98l4 .8zm1 12.98 4-.8V1.11l-4 .8zm-6-.8V1.11l-4 .8v12.98z"},null,-1),ou=[iu];function lu(e,t,n,r,s,i){return V(),G("svg",su,ou)}const cu=pe(ru,[["render",lu]]),au={},uu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-text-center",viewBox:"0 0 16 16"},fu=L("path",{"fill-rule":"evenodd",d:"M4 12.5a.5.5 0 0 1 .5-.5h7a.5.5 0 0 1 0 1h-7a.5.5 0 0 1-.5-.5m-2-3a.5.5 0 0 1 .5-.5h11a.5.5 0 0 1 0 1h-11a.5.5 0 0 1-.5-.5m2-3a.5.5 0 0 1 .5-.5h7a.5.5 0 0 1 0 1h-7a.5.5 0 0 1-.5-.5m-2-3a.5.5 0 0 1 .5-.5h11a.5.5 0 0 1 0 1h-11a.5.5 0 0 1-.5-.5"},null,-1),du=[fu];function hu(e,t,n,r,s,i){return V(),G("svg",uu,du)}const pu=pe(au,[["render",hu]]),_u={},mu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-lg-x",viewBox:"0 0 16 16"},gu=L("path",{d:"M2.146 2.854a.5.5 0 1 1 .708-.708L8 7.293l5.146-5.147a.5.5 0 0 1 .708.708L8.707 8l5.147 5.146a.5.5 0 0 1-.708.708L8 8.707l-5.146 5.147a.5.5 0 0 1-.708-.708L7.293 8z"},null,-1),yu=[gu];function vu(e,t,n,r,s,i){return V(),G("svg",mu,yu)}const xu=pe(_u,[["render",vu]]),wu={},bu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-caret-down-fill",viewBox:"0 0 16 16"},Eu=L("path",{d:"M7.247 11.14 2.451 5.658C1.885 5.013 2.345 4 3.204 4h9.592a1 1 0 0 1 .753 1.659l-4.796 5.48a1 1 0 0 1-1.506 0z"},null,-1),Ru=[Eu];function Pu(e,t,n,r,s,i){return V(),G("svg",bu,Ru)}const Vi=pe(wu,[["render",Pu]]),Su={},Cu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-caret-right-fill",viewBox:"0 0 16 16"},$u=L("path",{d:"m12.14 8.753-5.482 4.796c-.646.566-1.658.106-1.658-.753V3.204a1 1 0 0 1 1.659-.753l5.48 4.796a1 1 0 0 1 0 1.506z"},null,-1),Iu=[$u];function Ou(e,t,n,r,s,i){return V(),G("svg",Cu,Iu)}const zi=pe(Su,[["render",Ou]]),Tu={},ku={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-geo-alt-fill",viewBox:"0 0 16 16"},Au=L("path",{d:"M8 16s6-5.686 6-10A6 6 0 0 0 2 6c0 4.314 6 10 6 10m0-7a3 3 0 1 1 0-6 3 3 0 0 1 0 6"},null,-1),Lu=[Au];function Mu(e,t,n,r,s,i){return V(),G("svg",ku,Lu)}const Fu=pe(Tu,[["render",Mu]]),Qu={},Nu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-text-right",viewBox:"0 0 16 16"},ju=L("path",{"fill-rule":"evenodd",d:"M6 12.5a.5.5 0 0 1 .5-.5h7a.5.5 0 0 1 0 1h-7a.5.5 0 0 1-.5-.5m-4-3a.5.5 0 0 1 .5-.5h11a.5.5 0 0 1 0 1h-11a.5.5 0 0 1-.5-.5m4-3a.5.5 0 0 1 .5-.5h7a.5.5 0 0 1 0 1h-7a.5.5 0 0 1-.5-.5m-4-3a.5.5 0 0 1 .5-.5h11a.5.5 0 0 1 0 1h-11a.5.5 0 0 1-.5-.5"},null,-1),Du=[ju];function Bu(e,t,n,r,s,i){return V(),G("svg",Nu,Du)}const Hu=pe(Qu,[["render",Bu]]),Uu={data(){return{}},props:{deep:{type:Boolean,default:!0},node:Object,current_uri:String},components:{IconCaretRight:zi,IconCaretDown:Vi},computed:{is_open(){return this.deep?this.open:!0},open:{get(){return this.node._is_open},set(e){this.node._is_open=e}}}},Vu={key:0},zu={class:"font-semibold th-core-text-pop"};function Ku(e,t,n,r,s,i){const o=de("IconCaretDown"),l=de("IconCaretRight"),c=de("NavigationPanelCategory",!0),a=de("RouterLink");return V(),G("div",null,[n.deep?(V(),G("div",Vu,[L("span",{onClick:t[0]||(t[0]=f=>i.open=!i.open),class:"w-fit py-1 flex flex-row items-center gap-x-2 cursor-pointer th-core-text-base"},[i.open?(V(),mt(o,{key:0,class:"sq-3 th-accent-text-muted"})):Ge("",!0),i.open?Ge("",!0):(V(),mt(l,{key:1,class:"sq-3 th-accent-text-muted"})),L("span",zu,tt(n.node.display_name),1)])])):Ge("",!0),i.is_open?(V(),G("div",{key:1,class:vt(n.deep?"pl-6 flex flex-col":"")},[(V(!0),G(Le,null,er(n.node.directories,f=>(V(),mt(c,{key:f.display_name,node:f,current_uri:n.current_uri},null,8,["node","current_uri"]))),128)),(V(!0),G(Le,null,er(n.node.files,f=>(V(),G("div",{class:vt(["border-l pl-4 py-0.5",f.uri==n.current_uri?"th-accent-border":"th-core-border-base"]),key:f.display_name},[te(a,{to:{name:"pageview",params:{pagepath:f.uri.split("/")}}},{default:Rr(()=>[Cr(tt(f.display_name),1)]),_:2},1032,["to"])],2))),128))],2)):Ge("",!0)])}const qu=pe(Uu,[["render",Ku]]),Wu={data(){return{}},components:{IconHouse:Va,IconSun:Ja,IconMoon:nu,IconMap:cu,IconTextCenter:pu,IconLargeX:xu,IconGeoAltFill:Fu,IconTextRight:Hu,IconCaretDown:Vi,IconCaretRight:zi,IconSearch:Ar,NavigationPanelCategory:qu},computed:{name(){return this.$M.data.name},home_addr(){return this.$M.data.home_addr},show_nav:{get(){return this.$M.uistate.show_nav},set(e){this.$M.uistate.show_nav=e}},root_node(){return this.$M.data.root_node},theme:{get(){return this.$M.uistate.theme},set(e){this.$M.set_theme(e)}},is_darkmode(){return this.theme=="dark"},is_mobile(){return this.$M.uistate.is_mobile},current_uri(){return this.$M.data.current_uri}},methods:{open_all(){this.$M.toggle_all_directories(!0)},close_all(){this.$M.toggle_all_directories(!1)},open_search_modal(){this.$M.open_search_modal()}}},Gu={class:"border-r th-core-border-base th-core-bg-surface1"},Ju={class:"p-4 flex flex-col gap-y-4 border-b th-core-border-base"},Yu={class:"ui-parent-row items-center gap-x-4 th-core-text-pop"},Xu={class:"text-xl font-bold"},Zu={class:"ui-parent-row items-center gap-x-2"},ef=["href"],tf=L("div",{class:"grow"},null,-1),nf={class:"sq-4"},rf=L("div",{class:"pr-8"}," Quick search... ",-1),sf=L("div",{class:"text-sm"}," Ctrl K ",-1),of={class:"text-sm flex flex-row items-center gap-x-2 th-core-text-base"},lf={class:"ui-child-expand ui-parent-col ui-scroll-y gap-y-2 px-4 py-8"};function cf(e,t,n,r,s,i){const o=de("IconHouse"),l=de("IconSun"),c=de("IconMoon"),a=de("IconLargeX"),f=de("IconSearch"),d=de("IconTextRight"),p=de("IconCaretRight"),m=de("IconCaretDown"),R=de("NavigationPanelCategory");return V(),G("nav",Gu,[L("header",Ju,[L("section",Yu,[L("h1",Xu,tt(i.name),1),L("div",Zu,[i.home_addr!=""?(V(),G("a",{key:0,class:"sq-5 cursor-pointer th-accent-text",href:i.home_addr,title:"go to main homepage"},[te(o)],8,ef)):Ge("",!0),i.is_darkmode?(V(),G("button",{key:1,class:"sq-5 cursor-pointer th-accent-text",onClick:t[0]||(t[0]=b=>i.theme="light"),title:"set theme to light"},[te(l)])):Ge("",!0),i.is_darkmode?Ge("",!0):(V(),G("button",{key:2,class:"sq-5 cursor-pointer th-accent-text",onClick:t[1]||(t[1]=b=>i.theme="dark"),title:"set theme to dark"},[te(c)]))]),tf,L("button",{class:"show-when-mobile-block sq-5",onClick:t[2]||(t[2]=b=>i.show_nav=!1),title:"close navigation"},[te(a)])]),L("section",null,[L("button",{onClick:t[3]||(t[3]=(...b)=>i.open_search_modal&&i.open_search_modal(...b)),class:"ui-row items-center gap-x-4 min-h-8 max-h-8 px-4 th-core-bg-surface2 hover:th-core-bg-surface3 rounded-md"},[L("div",nf,[te(f)]),rf,sf])]),L("section",of,[te(d,{class:"sq-5 th-core-text-muted"}),L("button",{class:"w-fit p-1 rounded th-core-bg-surface2 th-accent-text",onClick:t[4]||(t[4]=(...b)=>i.close_all&&i.close_all(...b)),title:"open all categories"},[te(p,{class:"sq-3"})]),L("button",{class:"w-fit p-1 rounded th-core-bg-surface2 th-accent-text",onClick:t[5]||(t[5]=(...b)=>i.open_all&&i.open_all(...b)),title:"collapse all categories"},[te(m,{class:"sq-3"})])])]),L("section",lf,[i.root_node!=null?(V(),mt(R,{key:0,deep:!1,node:i.root_node,current_uri:i.current_uri},null,8,["node","current_uri"])):Ge("",!0)])])}const af=pe(Wu,[["render",cf]]),uf={data(){return{local_search_term:""}},mounted(){this.$nextTick(()=>{this.$refs.search_input.focus()})},components:{IconSearch:Ar},computed:{has_search_results(){return this.$M.data.has_search_result},search_results(){return this.$M.data.search_results}},methods:{run_search(){const e=this.local_search_term;e!=""&&this.$M.trigger_search(e)},close(){this.$M.close_search_modal()}}},ff={class:"ui-child-expand ui-parent-stack"},df={class:"ui-child-center-x top-4 md:top-16 w-[calc(100%-2rem)] md:w-1/2 h-[calc(100%-2rem)] md:h-1/2 ui-parent-col th-core-bg-surface2 th-core-text-base rounded-lg"},hf={class:"ui-row items-center h-16 px-4 border-b th-core-border-soft"},pf={class:"sq-4"},_f={class:"ui-row items-center"},mf={key:0,class:"ui-col ui-child-expand ui-scroll-y"},gf={key:1,class:"ui-col ui-child-expand ui-scroll-y"},yf=L("div",{class:"ui-row items-center px-4 min-h-16 max-h-16"}," no results ",-1),vf=[yf],xf=L("section",{class:"min-h-8 max-h-8 px-4 ui-row items-center border-t th-core-border-soft text-xs th-core-text-muted"},[L("span",{class:"flex-1 h-1"}),L("span",null,"powered by lunrjs")],-1);function wf(e,t,n,r,s,i){const o=de("IconSearch"),l=de("RouterLink");return V(),G("div",ff,[L("nav",df,[L("section",hf,[L("div",pf,[te(o)]),pn(L("input",{ref:"search_input",type:"text","onUpdate:modelValue":t[0]||(t[0]=c=>s.local_search_term=c),class:"flex-1 bg-transparent border-0 focus:ring-0",placeholder:"Search documentation",onKeypress:t[1]||(t[1]=lc((...c)=>i.run_search&&i.run_search(...c),["enter"]))},null,544),[[ic,s.local_search_term,void 0,{trim:!0}]]),L("div",_f,[L("button",{onClick:t[2]||(t[2]=(...c)=>i.close&&i.close(...c)),class:"th-core-bg-muted rounded px-2"}," esc ")])]),i.has_search_results&&i.search_results.length>0?(V(),G("section",mf,[(V(!0),G(Le,null,er(i.search_results,c=>(V(),mt(l,{to:{name:"pageview",params:{pagepath:c.ref.split("/")}},onClick:i.close,class:"ui-row items-center px-4 min-h-16 max-h-16 border-b th-core-border-soft hover:th-accent-text hover:th-core-bg-surface3"},{default:Rr(()=>[Cr(tt(c.ref),1)]),_:2},1032,["to","onClick"]))),256))])):(V(),G("section",gf,vf)),xf])])}const bf=pe(uf,[["render",wf]]),Ef={data(){return{}},components:{OnMobileHeader:La,ArticleFooter:Na,NavigationPanel:af,SearchModal:bf},mounted(){document.addEventListener("keydown",this.key_event_controller)},beforeUnmount(){document.removeEventListener("keydown",this.key_event_controller)},computed:{show_nav:{get(){return this.$M.uistate.show_nav},set(e){this.$M.uistate.show_nav=e}},show_search(){return this.$M.uistate.show_search},error_open(){return this.$M.uistate.error_open},error_msg(){return this.$M.uistate.error_msg},current_html(){return this.$M.data.current_html}},watch:{current_html(e,t){this.$refs.article_container.scrollTop=0}},methods:{key_event_controller(e){e.key=="k"&&e.ctrlKey&&(e.preventDefault(),this.show_search||this.$M.open_search_modal()),(e.keyCode==27||e.key=="Escape")&&this.show_search&&(e.preventDefault(),this.$M.close_search_modal())}}},Rf={class:"ui-spa-root ui-parent-stack font-sans th-core-bg-base th-core-text-base"},Pf={class:"ui-child-expand ui-parent-row"},Sf=L("div",{class:"show-when-desktop-block ui-nav-w pl-8 h-full"},null,-1),Cf={class:"ui-child-expand ui-parent-col"},$f={key:0,class:"py-2 px-4 bg-red-700 text-white"},If={ref:"article_container",class:"ui-child-expand ui-parent-col ui-scroll-y"},Of=L("div",{class:"min-h-8 w-full"},null,-1),Tf=L("div",{class:"min-h-16 w-full"},null,-1),kf={class:"show-when-mobile-block ui-child-expand bg-black opacity-75"},Af={class:"ui-child-expand bg-black/30 backdrop-blur-sm"};function Lf(e,t,n,r,s,i){const o=de("OnMobileHeader"),l=de("RouterView"),c=de("ArticleFooter"),a=de("NavigationPanel"),f=de("SearchModal");return V(),G("div",Rf,[L("main",Pf,[Sf,L("div",Cf,[te(o),i.error_open?(V(),G("div",$f,tt(i.error_msg),1)):Ge("",!0),L("section",If,[Of,te(l),Tf,te(c)],512)])]),pn(L("div",kf,null,512),[[Dn,i.show_nav]]),pn(te(a,{class:"absolute pin-tl ui-parent-col ui-nav-w h-full th-core-bg-base"},null,512),[[Dn,i.show_nav]]),pn(L("div",Af,null,512),[[Dn,i.show_search]]),i.show_search?(V(),mt(f,{key:0})):Ge("",!0)])}const Mf=pe(Ef,[["render",Lf]]),Ff={data(){return{}}},Qf={class:"grow px-4 pt-8 pb-16 md:w-[48rem] md:self-center md:pt-12 md:pb-24 th-core-bg-surface1 docd-article"},Nf=L("h1",{class:"text-2xl text-yellow-500"}," Hello from Home ",-1),jf=L("div",{class:"text-purple-300"}," This is a documentation page ",-1),Df=[Nf,jf];function Bf(e,t,n,r,s,i){return V(),G("article",Qf,Df)}const Hf=pe(Ff,[["render",Bf]]),Uf={data(){return{}},computed:{current_html(){return this.$M.data.current_html},current_raw_text(){return this.$M.data.current_raw_text},current_node(){return this.$M.data.current_node},last_modified(){return this.current_node==null?"":this.current_node.last_modified.split("T")[0]},article_view_mode(){return this.$M.uistate.article_view_mode},is_raw(){return this.article_view_mode=="raw"}},methods:{set_rendered(){this.$M.uistate.article_view_mode="rendered"},load_raw(){this.$M.load_raw_text()},btn_class(e){return e?"th-accent-text":"th-core-text-muted hover:th-accent-text"}}},Vf={class:"grow ui-col px-4 pt-4 pb-12 md:w-[48rem] md:self-center th-core-bg-surface1 rounded-lg"},zf={class:"ui-row items-center mb-8 text-sm"},Kf={class:"th-core-text-muted"},qf=L("div",{class:"flex-1"},null,-1),Wf={class:"ui-row gap-x-2"},Gf=L("span",null,"|",-1),Jf=["innerHTML"],Yf={key:1,class:"whitespace-pre-wrap"};function Xf(e,t,n,r,s,i){return V(),G("div",Vf,[L("div",zf,[L("div",Kf," last modified: "+tt(this.last_modified),1),qf,L("div",Wf,[L("span",{class:vt(["cursor-pointer",i.btn_class(!i.is_raw)]),onClick:t[0]||(t[0]=(...o)=>i.set_rendered&&i.set_rendered(...o))}," rendered ",2),Gf,L("span",{class:vt(["cursor-pointer",i.btn_class(i.is_raw)]),onClick:t[1]||(t[1]=(...o)=>i.load_raw&&i.load_raw(...o))}," raw ",2)])]),i.article_view_mode=="rendered"?(V(),G("article",{key:0,class:"docd-article",innerHTML:i.current_html},null,8,Jf)):(V(),G("pre",Yf,tt(i.current_raw_text),1))])}const Zf=pe(Uf,[["render",Xf]]);function ed(){const e={root_uri:window.$ROOT_URI,name:window.$NAME,footer_text:window.$FOOTER,home_addr:window.$HOME_ADDR};ke.mng=new ya(ke,e);const t=[{name:"home",path:`${e.root_uri}/`,component:Hf},{name:"pageview",path:`${e.root_uri}/view/:pagepath+`,component:Zf}];ke.router=ha({history:Hc(),routes:t}),ke.router.beforeEach((n,r)=>{const{name:s,params:i}=n;switch(s){case"home":break;case"pageview":ke.mng.load_page_view(s,i);break}}),ke.app=uc(Mf),ke.app.use(ke),ke.app.use(ke.router),ke.app.mount("#mount"),ke.mng.start(),window.$G===void 0?window.$G=ke:console.warn("window.$G already assigned.")}ed();
+ */n.Builder=function(){this._ref="id",this._fields=Object.create(null),this._documents=Object.create(null),this.invertedIndex=Object.create(null),this.fieldTermFrequencies={},this.fieldLengths={},this.tokenizer=n.tokenizer,this.pipeline=new n.Pipeline,this.searchPipeline=new n.Pipeline,this.documentCount=0,this._b=.75,this._k1=1.2,this.termIndex=0,this.metadataWhitelist=[]},n.Builder.prototype.ref=function(r){this._ref=r},n.Builder.prototype.field=function(r,s){if(/\//.test(r))throw new RangeError("Field '"+r+"' contains illegal character '/'");this._fields[r]=s||{}},n.Builder.prototype.b=function(r){r<0?this._b=0:r>1?this._b=1:this._b=r},n.Builder.prototype.k1=function(r){this._k1=r},n.Builder.prototype.add=function(r,s){var i=r[this._ref],o=Object.keys(this._fields);this._documents[i]=s||{},this.documentCount+=1;for(var l=0;l<o.length;l++){var c=o[l],a=this._fields[c].extractor,f=a?a(r):r[c],d=this.tokenizer(f,{fields:[c]}),p=this.pipeline.run(d),m=new n.FieldRef(i,c),R=Object.create(null);this.fieldTermFrequencies[m]=R,this.fieldLengths[m]=0,this.fieldLengths[m]+=p.length;for(var b=0;b<p.length;b++){var k=p[b];if(R[k]==null&&(R[k]=0),R[k]+=1,this.invertedIndex[k]==null){var F=Object.create(null);F._index=this.termIndex,this.termIndex+=1;for(var P=0;P<o.length;P++)F[o[P]]=Object.create(null);this.invertedIndex[k]=F}this.invertedIndex[k][c][i]==null&&(this.invertedIndex[k][c][i]=Object.create(null));for(var $=0;$<this.metadataWhitelist.length;$++){var A=this.metadataWhitelist[$],q=k.metadata[A];this.invertedIndex[k][c][i][A]==null&&(this.invertedIndex[k][c][i][A]=[]),this.invertedIndex[k][c][i][A].push(q)}}}},n.Builder.prototype.calculateAverageFieldLengths=function(){for(var r=Object.keys(this.fieldLengths),s=r.length,i={},o={},l=0;l<s;l++){var c=n.FieldRef.fromString(r[l]),a=c.fieldName;o[a]||(o[a]=0),o[a]+=1,i[a]||(i[a]=0),i[a]+=this.fieldLengths[c]}for(var f=Object.keys(this._fields),l=0;l<f.length;l++){var d=f[l];i[d]=i[d]/o[d]}this.averageFieldLength=i},n.Builder.prototype.createFieldVectors=function(){for(var r={},s=Object.keys(this.fieldTermFrequencies),i=s.length,o=Object.create(null),l=0;l<i;l++){for(var c=n.FieldRef.fromString(s[l]),a=c.fieldName,f=this.fieldLengths[c],d=new n.Vector,p=this.fieldTermFrequencies[c],m=Object.keys(p),R=m.length,b=this._fields[a].boost||1,k=this._documents[c.docRef].boost||1,F=0;F<R;F++){var P=m[F],$=p[P],A=this.invertedIndex[P]._index,q,oe,le;o[P]===void 0?(q=n.idf(this.invertedIndex[P],this.documentCount),o[P]=q):q=o[P],oe=q*((this._k1+1)*$)/(this._k1*(1-this._b+this._b*(f/this.averageFieldLength[a]))+$),oe*=b,oe*=k,le=Math.round(oe*1e3)/1e3,d.insert(A,le)}r[c]=d}this.fieldVectors=r},n.Builder.prototype.createTokenSet=function(){this.tokenSet=n.TokenSet.fromArray(Object.keys(this.invertedIndex).sort())},n.Builder.prototype.build=function(){return this.calculateAverageFieldLengths(),this.createFieldVectors(),this.createTokenSet(),new n.Index({invertedIndex:this.invertedIndex,fieldVectors:this.fieldVectors,tokenSet:this.tokenSet,fields:Object.keys(this._fields),pipeline:this.searchPipeline})},n.Builder.prototype.use=function(r){var s=Array.prototype.slice.call(arguments,1);s.unshift(this),r.apply(this,s)},n.MatchData=function(r,s,i){for(var o=Object.create(null),l=Object.keys(i||{}),c=0;c<l.length;c++){var a=l[c];o[a]=i[a].slice()}this.metadata=Object.create(null),r!==void 0&&(this.metadata[r]=Object.create(null),this.metadata[r][s]=o)},n.MatchData.prototype.combine=function(r){for(var s=Object.keys(r.metadata),i=0;i<s.length;i++){var o=s[i],l=Object.keys(r.metadata[o]);this.metadata[o]==null&&(this.metadata[o]=Object.create(null));for(var c=0;c<l.length;c++){var a=l[c],f=Object.keys(r.metadata[o][a]);this.metadata[o][a]==null&&(this.metadata[o][a]=Object.create(null));for(var d=0;d<f.length;d++){var p=f[d];this.metadata[o][a][p]==null?this.metadata[o][a][p]=r.metadata[o][a][p]:this.metadata[o][a][p]=this.metadata[o][a][p].concat(r.metadata[o][a][p])}}}},n.MatchData.prototype.add=function(r,s,i){if(!(r in this.metadata)){this.metadata[r]=Object.create(null),this.metadata[r][s]=i;return}if(!(s in this.metadata[r])){this.metadata[r][s]=i;return}for(var o=Object.keys(i),l=0;l<o.length;l++){var c=o[l];c in this.metadata[r][s]?this.metadata[r][s][c]=this.metadata[r][s][c].concat(i[c]):this.metadata[r][s][c]=i[c]}},n.Query=function(r){this.clauses=[],this.allFields=r},n.Query.wildcard=new String("*"),n.Query.wildcard.NONE=0,n.Query.wildcard.LEADING=1,n.Query.wildcard.TRAILING=2,n.Query.presence={OPTIONAL:1,REQUIRED:2,PROHIBITED:3},n.Query.prototype.clause=function(r){return"fields"in r||(r.fields=this.allFields),"boost"in r||(r.boost=1),"usePipeline"in r||(r.usePipeline=!0),"wildcard"in r||(r.wildcard=n.Query.wildcard.NONE),r.wildcard&n.Query.wildcard.LEADING&&r.term.charAt(0)!=n.Query.wildcard&&(r.term="*"+r.term),r.wildcard&n.Query.wildcard.TRAILING&&r.term.slice(-1)!=n.Query.wildcard&&(r.term=""+r.term+"*"),"presence"in r||(r.presence=n.Query.presence.OPTIONAL),this.clauses.push(r),this},n.Query.prototype.isNegated=function(){for(var r=0;r<this.clauses.length;r++)if(this.clauses[r].presence!=n.Query.presence.PROHIBITED)return!1;return!0},n.Query.prototype.term=function(r,s){if(Array.isArray(r))return r.forEach(function(o){this.term(o,n.utils.clone(s))},this),this;var i=s||{};return i.term=r.toString(),this.clause(i),this},n.QueryParseError=function(r,s,i){this.name="QueryParseError",this.message=r,this.start=s,this.end=i},n.QueryParseError.prototype=new Error,n.QueryLexer=function(r){this.lexemes=[],this.str=r,this.length=r.length,this.pos=0,this.start=0,this.escapeCharPositions=[]},n.QueryLexer.prototype.run=function(){for(var r=n.QueryLexer.lexText;r;)r=r(this)},n.QueryLexer.prototype.sliceString=function(){for(var r=[],s=this.start,i=this.pos,o=0;o<this.escapeCharPositions.length;o++)i=this.escapeCharPositions[o],r.push(this.str.slice(s,i)),s=i+1;return r.push(this.str.slice(s,this.pos)),this.escapeCharPositions.length=0,r.join("")},n.QueryLexer.prototype.emit=function(r){this.lexemes.push({type:r,str:this.sliceString(),start:this.start,end:this.pos}),this.start=this.pos},n.QueryLexer.prototype.escapeCharacter=function(){this.escapeCharPositions.push(this.pos-1),this.pos+=1},n.QueryLexer.prototype.next=function(){if(this.pos>=this.length)return n.QueryLexer.EOS;var r=this.str.charAt(this.pos);return this.pos+=1,r},n.QueryLexer.prototype.width=function(){return this.pos-this.start},n.QueryLexer.prototype.ignore=function(){this.start==this.pos&&(this.pos+=1),this.start=this.pos},n.QueryLexer.prototype.backup=function(){this.pos-=1},n.QueryLexer.prototype.acceptDigitRun=function(){var r,s;do r=this.next(),s=r.charCodeAt(0);while(s>47&&s<58);r!=n.QueryLexer.EOS&&this.backup()},n.QueryLexer.prototype.more=function(){return this.pos<this.length},n.QueryLexer.EOS="EOS",n.QueryLexer.FIELD="FIELD",n.QueryLexer.TERM="TERM",n.QueryLexer.EDIT_DISTANCE="EDIT_DISTANCE",n.QueryLexer.BOOST="BOOST",n.QueryLexer.PRESENCE="PRESENCE",n.QueryLexer.lexField=function(r){return r.backup(),r.emit(n.QueryLexer.FIELD),r.ignore(),n.QueryLexer.lexText},n.QueryLexer.lexTerm=function(r){if(r.width()>1&&(r.backup(),r.emit(n.QueryLexer.TERM)),r.ignore(),r.more())return n.QueryLexer.lexText},n.QueryLexer.lexEditDistance=function(r){return r.ignore(),r.acceptDigitRun(),r.emit(n.QueryLexer.EDIT_DISTANCE),n.QueryLexer.lexText},n.QueryLexer.lexBoost=function(r){return r.ignore(),r.acceptDigitRun(),r.emit(n.QueryLexer.BOOST),n.QueryLexer.lexText},n.QueryLexer.lexEOS=function(r){r.width()>0&&r.emit(n.QueryLexer.TERM)},n.QueryLexer.termSeparator=n.tokenizer.separator,n.QueryLexer.lexText=function(r){for(;;){var s=r.next();if(s==n.QueryLexer.EOS)return n.QueryLexer.lexEOS;if(s.charCodeAt(0)==92){r.escapeCharacter();continue}if(s==":")return n.QueryLexer.lexField;if(s=="~")return r.backup(),r.width()>0&&r.emit(n.QueryLexer.TERM),n.QueryLexer.lexEditDistance;if(s=="^")return r.backup(),r.width()>0&&r.emit(n.QueryLexer.TERM),n.QueryLexer.lexBoost;if(s=="+"&&r.width()===1||s=="-"&&r.width()===1)return r.emit(n.QueryLexer.PRESENCE),n.QueryLexer.lexText;if(s.match(n.QueryLexer.termSeparator))return n.QueryLexer.lexTerm}},n.QueryParser=function(r,s){this.lexer=new n.QueryLexer(r),this.query=s,this.currentClause={},this.lexemeIdx=0},n.QueryParser.prototype.parse=function(){this.lexer.run(),this.lexemes=this.lexer.lexemes;for(var r=n.QueryParser.parseClause;r;)r=r(this);return this.query},n.QueryParser.prototype.peekLexeme=function(){return this.lexemes[this.lexemeIdx]},n.QueryParser.prototype.consumeLexeme=function(){var r=this.peekLexeme();return this.lexemeIdx+=1,r},n.QueryParser.prototype.nextClause=function(){var r=this.currentClause;this.query.clause(r),this.currentClause={}},n.QueryParser.parseClause=function(r){var s=r.peekLexeme();if(s!=null)switch(s.type){case n.QueryLexer.PRESENCE:return n.QueryParser.parsePresence;case n.QueryLexer.FIELD:return n.QueryParser.parseField;case n.QueryLexer.TERM:return n.QueryParser.parseTerm;default:var i="expected either a field or a term, found "+s.type;throw s.str.length>=1&&(i+=" with value '"+s.str+"'"),new n.QueryParseError(i,s.start,s.end)}},n.QueryParser.parsePresence=function(r){var s=r.consumeLexeme();if(s!=null){switch(s.str){case"-":r.currentClause.presence=n.Query.presence.PROHIBITED;break;case"+":r.currentClause.presence=n.Query.presence.REQUIRED;break;default:var i="unrecognised presence operator'"+s.str+"'";throw new n.QueryParseError(i,s.start,s.end)}var o=r.peekLexeme();if(o==null){var i="expecting term or field, found nothing";throw new n.QueryParseError(i,s.start,s.end)}switch(o.type){case n.QueryLexer.FIELD:return n.QueryParser.parseField;case n.QueryLexer.TERM:return n.QueryParser.parseTerm;default:var i="expecting term or field, found '"+o.type+"'";throw new n.QueryParseError(i,o.start,o.end)}}},n.QueryParser.parseField=function(r){var s=r.consumeLexeme();if(s!=null){if(r.query.allFields.indexOf(s.str)==-1){var i=r.query.allFields.map(function(c){return"'"+c+"'"}).join(", "),o="unrecognised field '"+s.str+"', possible fields: "+i;throw new n.QueryParseError(o,s.start,s.end)}r.currentClause.fields=[s.str];var l=r.peekLexeme();if(l==null){var o="expecting term, found nothing";throw new n.QueryParseError(o,s.start,s.end)}switch(l.type){case n.QueryLexer.TERM:return n.QueryParser.parseTerm;default:var o="expecting term, found '"+l.type+"'";throw new n.QueryParseError(o,l.start,l.end)}}},n.QueryParser.parseTerm=function(r){var s=r.consumeLexeme();if(s!=null){r.currentClause.term=s.str.toLowerCase(),s.str.indexOf("*")!=-1&&(r.currentClause.usePipeline=!1);var i=r.peekLexeme();if(i==null){r.nextClause();return}switch(i.type){case n.QueryLexer.TERM:return r.nextClause(),n.QueryParser.parseTerm;case n.QueryLexer.FIELD:return r.nextClause(),n.QueryParser.parseField;case n.QueryLexer.EDIT_DISTANCE:return n.QueryParser.parseEditDistance;case n.QueryLexer.BOOST:return n.QueryParser.parseBoost;case n.QueryLexer.PRESENCE:return r.nextClause(),n.QueryParser.parsePresence;default:var o="Unexpected lexeme type '"+i.type+"'";throw new n.QueryParseError(o,i.start,i.end)}}},n.QueryParser.parseEditDistance=function(r){var s=r.consumeLexeme();if(s!=null){var i=parseInt(s.str,10);if(isNaN(i)){var o="edit distance must be numeric";throw new n.QueryParseError(o,s.start,s.end)}r.currentClause.editDistance=i;var l=r.peekLexeme();if(l==null){r.nextClause();return}switch(l.type){case n.QueryLexer.TERM:return r.nextClause(),n.QueryParser.parseTerm;case n.QueryLexer.FIELD:return r.nextClause(),n.QueryParser.parseField;case n.QueryLexer.EDIT_DISTANCE:return n.QueryParser.parseEditDistance;case n.QueryLexer.BOOST:return n.QueryParser.parseBoost;case n.QueryLexer.PRESENCE:return r.nextClause(),n.QueryParser.parsePresence;default:var o="Unexpected lexeme type '"+l.type+"'";throw new n.QueryParseError(o,l.start,l.end)}}},n.QueryParser.parseBoost=function(r){var s=r.consumeLexeme();if(s!=null){var i=parseInt(s.str,10);if(isNaN(i)){var o="boost must be numeric";throw new n.QueryParseError(o,s.start,s.end)}r.currentClause.boost=i;var l=r.peekLexeme();if(l==null){r.nextClause();return}switch(l.type){case n.QueryLexer.TERM:return r.nextClause(),n.QueryParser.parseTerm;case n.QueryLexer.FIELD:return r.nextClause(),n.QueryParser.parseField;case n.QueryLexer.EDIT_DISTANCE:return n.QueryParser.parseEditDistance;case n.QueryLexer.BOOST:return n.QueryParser.parseBoost;case n.QueryLexer.PRESENCE:return r.nextClause(),n.QueryParser.parsePresence;default:var o="Unexpected lexeme type '"+l.type+"'";throw new n.QueryParseError(o,l.start,l.end)}}},function(r,s){e.exports=s()}(this,function(){return n})})()})(Ui);var ma=Ui.exports;const ga=_a(ma);function un(){return Math.random().toString(36).substr(2)}class ya{constructor(G,config){this.$G=G;const URIROOT=`${config.root_uri}/_resources`;this.API_URIS={};this.API_URIS.PAGE_DB_FILE=()=>`${URIROOT}/pages-database.json?h=${un()}`;this.API_URIS.PAGE_DB_SHARD_FILE=(HASH)=>`${URIROOT}/pages-database/${HASH}.json`;this.API_URIS.SEARCH_INDEX_FILE=(HASH)=>(HASH)?`${URIROOT}/search/serialized-index-${HASH}.json`:`${URIROOT}/search/serialized-index.json?h=${un()}`;this.API_URIS.PAGE_RENDERER_FILE=(NODE)=>`${URIROOT}/pages-html/${NODE.uri}.html?h=${NODE.content_hash||un()}`;this.API_URIS.PAGE_RAW_FILE=(NODE)=>`${URIROOT}/pages-txt/${NODE.uri}.txt?h=${NODE.content_hash||un()}`;this._uistate=Tt({is_mobile:false,theme:"light",show_nav:false,show_search:false,error_open:false,error_msg:"",article_view_mode:"rendered",});this._data=Tt({name:config.name,footer_text:config.footer_text,home_addr:config.home_addr,root_node:null,nodes_by_uri:new Map(),directory_nodes_by_uri:new Map(),orphaned_nodes_by_parent_uri:new Map(),current_uri:"",current_html:"",current_raw_text:"",current_node:null,has_search_result:false,search_results:[]});this._is_page_data_loaded=false;this._page_data_loaded_state_hold=null;this._is_page_database_sharded=false;this._directory_loads=new Map();this._is_search_index_loaded=false;this._live_reload_uri=config.live_reload_uri||null;this._setup_theme();}
+async start(){await this._fetch_page_database();this._is_page_data_loaded=true;if(this._page_data_loaded_state_hold!=null){const{name,params}=this._page_data_loaded_state_hold;this.load_page_view(name,params);}
+if(this._live_reload_uri){this._connect_live_reload(false);}}
+get uistate(){return this._uistate;}
+get data(){return this._data;}
+_setup_theme(){const IS_MOBILE_QUERY="(min-width:768px)";const resize_meth=(e)=>{const mq=window.matchMedia(IS_MOBILE_QUERY);this._uistate.is_mobile=!mq.matches;if(!this._uistate.is_mobile){this._uistate.show_nav=true;}}
+const resizeObserver=new ResizeObserver(e=>{resize_meth(e);});resizeObserver.observe(document.body);resize_meth();if(localStorage.theme==="dark"||(!("theme"in localStorage)&&window.matchMedia("(prefers-color-scheme: dark)").matches)){this._uistate.theme="dark";document.documentElement.classList.add("dark")}else{this._uistate.theme="light";document.documentElement.classList.remove("dark")}}
+set_theme(theme){if(theme!="dark"&&theme!="light"){console.warn(`Unknown theme: ${theme}`);}
+localStorage.theme=theme;this._uistate.theme=theme;(theme=="dark")?document.documentElement.classList.add("dark"):document.documentElement.classList.remove("dark");}
+toggle_all_directories(state){for(const d of this._data.directory_nodes_by_uri.values()){if(state&&!d._is_loaded){continue;}
+d._is_open=state;}}
+set_directory_open(node,state){node._is_open=state;if(state&&!node._is_loaded){this.load_directory(node).catch(err=>{console.error("Error loading directory:",node.uri,err);this.set_error(`Failed to load ${node.display_name}`);});}}
+open_search_modal(){this._uistate.show_search=true;this._data.has_search_result=false;this._data.search_results=[];}
+close_search_modal(){this._uistate.show_search=false;}
+async _fetch_page_database(){const resp=await window.fetch(this.API_URIS.PAGE_DB_FILE());this._process_page_database(await resp.json());}
+_process_page_database(db){this._is_page_database_sharded=!Array.isArray(db);const objects=(this._is_page_database_sharded)?db.nodes:db;objects.forEach(e=>this._process_node(e));}
+async load_directory(node){if(node._is_loaded){return;}
+let pending=this._directory_loads.get(node.children_hash);if(pending==null){pending=window.fetch(this.API_URIS.PAGE_DB_SHARD_FILE(node.children_hash)).then(resp=>resp.json()).finally(()=>this._directory_loads.delete(node.children_hash));this._directory_loads.set(node.children_hash,pending);}
+const objects=await pending;if(node._is_loaded||this._data.directory_nodes_by_uri.get(node.uri)!==node){return;}
+node._is_loaded=true;objects.forEach(e=>this._process_node(e));}
+async _load_directories_to(uri){const parts=uri.split("/");for(let i=1;i<parts.length;i++){const node=this._data.directory_nodes_by_uri.get(parts.slice(0,i).join("/"));if(node==null){return;}
+await this.load_directory(node);node._is_open=true;}}
+_process_node(node){const uri=node.uri;if("directory"==node.kind){node.files=[];node.directories=[];node._is_loaded=!this._is_page_database_sharded||uri==".";node._is_open=node._is_loaded;}
+this._data.nodes_by_uri.set(uri,node);if("directory"==node.kind){this._data.directory_nodes_by_uri.set(uri,node);}
+if(node.parent_uri){const parent=this._data.nodes_by_uri.get(node.parent_uri)||null;if(parent==null){const orphans=this._data.orphaned_nodes_by_parent_uri;if(!orphans.has(node.parent_uri)){orphans.set(node.parent_uri,[]);}
+orphans.get(node.parent_uri).push(node);}else{if("file"==node.kind){parent.files.push(node);}else{parent.directories.push(node);}}}
+if(uri=="."){this._data.root_node=node;}
+if("directory"==node.kind){const orphans=this._data.orphaned_nodes_by_parent_uri.get(uri)||[];for(const orphan of orphans){if("file"==orphan.kind){node.files.push(orphan);}else{node.directories.push(orphan);}}
+this._data.orphaned_nodes_by_parent_uri.delete(uri);}}
+clear_errors(){this._uistate.error_open=false;}
+set_error(error_msg){this._uistate.error_open=true;this._uistate.error_msg=error_msg;}
+async load_page_view(name,params){if(!this._is_page_data_loaded){this._page_data_loaded_state_hold={name,params};return;}
+const page_uri=params.pagepath.join("/");try{this.clear_errors();if(this._is_page_database_sharded){await this._load_directories_to(page_uri);}
+const page_obj=this._data.nodes_by_uri.get(page_uri);this._data.current_node=page_obj;this._data.current_uri=page_uri;const resp=await window.fetch(this.API_URIS.PAGE_RENDERER_FILE(page_obj));const text=await resp.text();this._data.current_html=text;}catch(err){console.error("Error loading page:",page_uri,err);this.set_error(`Failed to load ${page_uri}`);}
+if(this._uistate.is_mobile){this._uistate.show_nav=false;}
+this._uistate.article_view_mode="rendered";}
+async load_page_part(part_url){try{const resp=await window.fetch(part_url);this._data.current_html=await resp.text();window.scrollTo(0,0);}catch(err){console.error("Error loading page part:",part_url,err);this.set_error(`Failed to load ${part_url}`);}}
+async load_raw_text(){const resp=await window.fetch(this.API_URIS.PAGE_RAW_FILE(this._data.current_node));const raw_text=await resp.text();this._data.current_raw_text=raw_text;this._uistate.article_view_mode="raw";}
+_connect_live_reload(is_reconnect){const scheme=(window.location.protocol=="https:")?"wss":"ws";const socket=new WebSocket(`${scheme}://${window.location.host}${this._live_reload_uri}`);socket.onopen=()=>{if(is_reconnect){window.location.reload();}};socket.onmessage=(e)=>this._on_live_reload_message(JSON.parse(e.data));socket.onclose=()=>{window.setTimeout(()=>this._connect_live_reload(true),1000);};}
+async _on_live_reload_message(msg){switch(msg.type){case"reload":window.location.reload();break;case"pages":await this._reload_page_database();this._is_search_index_loaded=false;if(msg.uris.includes(this._data.current_uri)){await this._reload_current_page();}
+break;}}
+async _reload_page_database(){const resp=await window.fetch(this.API_URIS.PAGE_DB_FILE());const db=await resp.json();const closed=new Set();const loaded=[];for(const[uri,node]of this._data.directory_nodes_by_uri){if(!node._is_open){closed.add(uri);}
+if(node._is_loaded&&uri!="."){loaded.push(uri);}}
+this._data.nodes_by_uri.clear();this._data.directory_nodes_by_uri.clear();this._data.orphaned_nodes_by_parent_uri.clear();this._process_page_database(db);if(this._is_page_database_sharded){loaded.sort((a,b)=>a.split("/").length-b.split("/").length);for(const uri of loaded){const node=this._data.directory_nodes_by_uri.get(uri);if(node){await this.load_directory(node);}}}
+for(const[uri,node]of this._data.directory_nodes_by_uri){node._is_open=node._is_loaded&&!closed.has(uri);}
+this._data.current_node=this._data.nodes_by_uri.get(this._data.current_uri)||null;}
+async _reload_current_page(){const page_uri=this._data.current_uri;const page_obj=this._data.current_node;if(page_obj==null){this.set_error(`${page_uri} was removed`);return;}
+try{const resp=await window.fetch(this.API_URIS.PAGE_RENDERER_FILE(page_obj));this._data.current_html=await resp.text();if(this._uistate.article_view_mode=="raw"){const resp=await window.fetch(this.API_URIS.PAGE_RAW_FILE(page_obj));this._data.current_raw_text=await resp.text();}}catch(err){console.error("Error reloading page:",page_uri,err);this.set_error(`Failed to reload ${page_uri}`);}}
+async load_search_system(){const root=this._data.root_node;const resp=await window.fetch(this.API_URIS.SEARCH_INDEX_FILE(root?root.search_index_hash:null));const resp_obj=await resp.json();this.search_index=ga.Index.load(resp_obj);this._is_search_index_loaded=true;}
+async trigger_search(search_text){if(!this._is_search_index_loaded){await this.load_search_system();}
+const results=this.search_index.search(search_text);this._data.has_search_result=true;this._data.search_results=Object.freeze(results);}}const pe=(e,t)=>{const n=e.__vccOpts||e;for(const[r,s]of t)n[r]=s;return n},va={},xa={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-list",viewBox:"0 0 16 16"},wa=L("path",{"fill-rule":"evenodd",d:"M2.5 12a.5.5 0 0 1 .5-.5h10a.5.5 0 0 1 0 1H3a.5.5 0 0 1-.5-.5m0-4a.5.5 0 0 1 .5-.5h10a.5.5 0 0 1 0 1H3a.5.5 0 0 1-.5-.5m0-4a.5.5 0 0 1 .5-.5h10a.5.5 0 0 1 0 1H3a.5.5 0 0 1-.5-.5"},null,-1),ba=[wa];function Ea(e,t,n,r,s,i){return V(),G("svg",xa,ba)}const Ra=pe(va,[["render",Ea]]),Pa={},Sa={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-search",viewBox:"0 0 16 16"},Ca=L("path",{d:"M11.742 10.344a6.5 6.5 0 1 0-1.397 1.398h-.001q.044.06.098.115l3.85 3.85a1 1 0 0 0 1.415-1.414l-3.85-3.85a1 1 0 0 0-.115-.1zM12 6.5a5.5 5.5 0 1 1-11 0 5.5 5.5 0 0 1 11 0"},null,-1),$a=[Ca];function Ia(e,t,n,r,s,i){return V(),G("svg",Sa,$a)}const Ar=pe(Pa,[["render",Ia]]),Oa={data(){return{}},components:{IconList:Ra,IconSearch:Ar},computed:{name(){return this.$M.data.name},show_nav:{get(){return this.$M.uistate.show_nav},set(e){this.$M.uistate.show_nav=e}}},methods:{open_search_modal(){this.$M.open_search_modal()}}},Ta={class:"show-when-mobile-flex ui-parent-row items-center gap-x-4 p-4 border-b th-core-border-base th-core-text-pop"},ka={class:"text-xl font-bold"};function Aa(e,t,n,r,s,i){const o=de("IconList"),l=de("IconSearch");return V(),G("header",Ta,[L("button",{class:"sq-6",onClick:t[0]||(t[0]=c=>i.show_nav=!0)},[te(o)]),L("button",{class:"sq-5",onClick:t[1]||(t[1]=(...c)=>i.open_search_modal&&i.open_search_modal(...c))},[te(l)]),L("h1",ka,tt(i.name),1)])}const La=pe(Oa,[["render",Aa]]),Ma={data(){return{}},computed:{footer_text(){return this.$M.data.footer_text}}},Fa={class:"flex flex-row items-center justify-center p-8 bg-core-950 text-core-500 text-sm"};function Qa(e,t,n,r,s,i){return V(),G("footer",Fa,[L("span",null,tt(i.footer_text),1)])}const Na=pe(Ma,[["render",Qa]]),ja={},Da={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-house",viewBox:"0 0 16 16"},Ba=L("path",{d:"M8.707 1.5a1 1 0 0 0-1.414 0L.646 8.146a.5.5 0 0 0 .708.708L2 8.207V13.5A1.5 1.5 0 0 0 3.5 15h9a1.5 1.5 0 0 0 1.5-1.5V8.207l.646.647a.5.5 0 0 0 .708-.708L13 5.793V2.5a.5.5 0 0 0-.5-.5h-1a.5.5 0 0 0-.5.5v1.293zM13 7.207V13.5a.5.5 0 0 1-.5.5h-9a.5.5 0 0 1-.5-.5V7.207l5-5z"},null,-1),Ha=[Ba];function Ua(e,t,n,r,s,i){return V(),G("svg",Da,Ha)}const Va=pe(ja,[["render",Ua]]),za={},Ka={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-sun",viewBox:"0 0 16 16"},qa=L("path",{d:"M8 11a3 3 0 1 1 0-6 3 3 0 0 1 0 6m0 1a4 4 0 1 0 0-8 4 4 0 0 0 0 8M8 0a.5.5 0 0 1 .5.5v2a.5.5 0 0 1-1 0v-2A.5.5 0 0 1 8 0m0 13a.5.5 0 0 1 .5.5v2a.5.5 0 0 1-1 0v-2A.5.5 0 0 1 8 13m8-5a.5.5 0 0 1-.5.5h-2a.5.5 0 0 1 0-1h2a.5.5 0 0 1 .5.5M3 8a.5.5 0 0 1-.5.5h-2a.5.5 0 0 1 0-1h2A.5.5 0 0 1 3 8m10.657-5.657a.5.5 0 0 1 0 .707l-1.414 1.415a.5.5 0 1 1-.707-.708l1.414-1.414a.5.5 0 0 1 .707 0m-9.193 9.193a.5.5 0 0 1 0 .707L3.05 13.657a.5.5 0 0 1-.707-.707l1.414-1.414a.5.5 0 0 1 .707 0zm9.193 2.121a.5.5 0 0 1-.707 0l-1.414-1.414a.5.5 0 0 1 .707-.707l1.414 1.414a.5.5 0 0 1 0 .707M4.464 4.465a.5.5 0 0 1-.707 0L2.343 3.05a.5.5 0 1 1 .707-.707l1.414 1.414a.5.5 0 0 1 0 .708z"},null,-1),Wa=[qa];function Ga(e,t,n,r,s,i){return V(),G("svg",Ka,Wa)}const Ja=pe(za,[["render",Ga]]),Ya={},Xa={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-moon",viewBox:"0 0 16 16"},Za=L("path",{d:"M6 .278a.768.768 0 0 1 .08.858 7.208 7.208 0 0 0-.878 3.46c0 4.021 3.278 7.277 7.318 7.277.527 0 1.04-.055 1.533-.16a.787.787 0 0 1 .81.316.733.733 0 0 1-.031.893A8.349 8.349 0 0 1 8.344 16C3.734 16 0 12.286 0 7.71 0 4.266 2.114 1.312 5.124.06A.752.752 0 0 1 6 .278M4.858 1.311A7.269 7.269 0 0 0 1.025 7.71c0 4.02 3.279 7.276 7.319 7.276a7.316 7.316 0 0 0 5.205-2.162c-.337.042-.68.063-1.029.063-4.61 0-8.343-3.714-8.343-8.29 0-1.167.242-2.278.681-3.286z"},null,-1),eu=[Za];function tu(e,t,n,r,s,i){return V(),G("svg",Xa,eu)}const nu=pe(Ya,[["render",tu]]),ru={},su={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-map",viewBox:"0 0 16 16"},iu=L("path",{"fill-rule":"evenodd",d:"M15.817.113A.5.5 0 0 1 16 .5v14a.5.5 0 0 1-.402.49l-5 1a.5.5 0 0 1-.196 0L5.5 15.01l-4.902.98A.5.5 0 0 1 0 15.5v-14a.5.5 0 0 1 .402-.49l5-1a.5.5 0 0 1 .196 0L10.5.99l4.902-.98a.5.5 0 0 1 .415.103M10 1.91l-4-.8v12.98l4 .8zm1 12.98 4-.8V1.11l-4 .8zm-6-.8V1.11l-4 .8v12.98z"},null,-1),ou=[iu];function lu(e,t,n,r,s,i){return V(),G("svg",su,ou)}const cu=pe(ru,[["render",lu]]),au={},uu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-text-center",viewBox:"0 0 16 16"},fu=L("path",{"fill-rule":"evenodd",d:"M4 12.5a.5.5 0 0 1 .5-.5h7a.5.5 0 0 1 0 1h-7a.5.5 0 0 1-.5-.5m-2-3a.5.5 0 0 1 .5-.5h11a.5.5 0 0 1 0 1h-11a.5.5 0 0 1-.5-.5m2-3a.5.5 0 0 1 .5-.5h7a.5.5 0 0 1 0 1h-7a.5.5 0 0 1-.5-.5m-2-3a.5.5 0 0 1 .5-.5h11a.5.5 0 0 1 0 1h-11a.5.5 0 0 1-.5-.5"},null,-1),du=[fu];function hu(e,t,n,r,s,i){return V(),G("svg",uu,du)}const pu=pe(au,[["render",hu]]),_u={},mu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"icon-lg-x",viewBox:"0 0 16 16"},gu=L("path",{d:"M2.146 2.854a.5.5 0 1 1 .708-.708L8 7.293l5.146-5.147a.5.5 0 0 1 .708.708L8.707 8l5.147 5.146a.5.5 0 0 1-.708.708L8 8.707l-5.146 5.147a.5.5 0 0 1-.708-.708L7.293 8z"},null,-1),yu=[gu];function vu(e,t,n,r,s,i){return V(),G("svg",mu,yu)}const xu=pe(_u,[["render",vu]]),wu={},bu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-caret-down-fill",viewBox:"0 0 16 16"},Eu=L("path",{d:"M7.247 11.14 2.451 5.658C1.885 5.013 2.345 4 3.204 4h9.592a1 1 0 0 1 .753 1.659l-4.796 5.48a1 1 0 0 1-1.506 0z"},null,-1),Ru=[Eu];function Pu(e,t,n,r,s,i){return V(),G("svg",bu,Ru)}const Vi=pe(wu,[["render",Pu]]),Su={},Cu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-caret-right-fill",viewBox:"0 0 16 16"},$u=L("path",{d:"m12.14 8.753-5.482 4.796c-.646.566-1.658.106-1.658-.753V3.204a1 1 0 0 1 1.659-.753l5.48 4.796a1 1 0 0 1 0 1.506z"},null,-1),Iu=[$u];function Ou(e,t,n,r,s,i){return V(),G("svg",Cu,Iu)}const zi=pe(Su,[["render",Ou]]),Tu={},ku={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-geo-alt-fill",viewBox:"0 0 16 16"},Au=L("path",{d:"M8 16s6-5.686 6-10A6 6 0 0 0 2 6c0 4.314 6 10 6 10m0-7a3 3 0 1 1 0-6 3 3 0 0 1 0 6"},null,-1),Lu=[Au];function Mu(e,t,n,r,s,i){return V(),G("svg",ku,Lu)}const Fu=pe(Tu,[["render",Mu]]),Qu={},Nu={xmlns:"http://www.w3.org/2000/svg",width:"100%",height:"100%",fill:"currentColor",class:"bi bi-text-right",viewBox:"0 0 16 16"},ju=L("path",{"fill-rule":"evenodd",d:"M6 12.5a.5.5 0 0 1 .5-.5h7a.5.5 0 0 1 0 1h-7a.5.5 0 0 1-.5-.5m-4-3a.5.5 0 0 1 .5-.5h11a.5.5 0 0 1 0 1h-11a.5.5 0 0 1-.5-.5m4-3a.5.5 0 0 1 .5-.5h7a.5.5 0 0 1 0 1h-7a.5.5 0 0 1-.5-.5m-4-3a.5.5 0 0 1 .5-.5h11a.5.5 0 0 1 0 1h-11a.5.5 0 0 1-.5-.5"},null,-1),Du=[ju];function Bu(e,t,n,r,s,i){return V(),G("svg",Nu,Du)}const Hu=pe(Qu,[["render",Bu]]),Uu={data(){return{}},props:{deep:{type:Boolean,default:!0},node:Object,current_uri:String},components:{IconCaretRight:zi,IconCaretDown:Vi},computed:{is_open(){return this.deep?this.open:!0},open:{get(){return this.node._is_open},set(e){this.$M.set_directory_open(this.node,e)}}}},Vu={key:0},zu={class:"font-semibold th-core-text-pop"};function Ku(e,t,n,r,s,i){const o=de("IconCaretDown"),l=de("IconCaretRight"),c=de("NavigationPanelCategory",!0),a=de("RouterLink");return V(),G("div",null,[n.deep?(V(),G("div",Vu,[L("span",{onClick:t[0]||(t[0]=f=>i.open=!i.open),class:"w-fit py-1 flex flex-row items-center gap-x-2 cursor-pointer th-core-text-base"},[i.open?(V(),mt(o,{key:0,class:"sq-3 th-accent-text-muted"})):Ge("",!0),i.open?Ge("",!0):(V(),mt(l,{key:1,class:"sq-3 th-accent-text-muted"})),L("span",zu,tt(n.node.display_name),1)])])):Ge("",!0),i.is_open?(V(),G("div",{key:1,class:vt(n.deep?"pl-6 flex flex-col":"")},[(V(!0),G(Le,null,er(n.node.directories,f=>(V(),mt(c,{key:f.display_name,node:f,current_uri:n.current_uri},null,8,["node","current_uri"]))),128)),(V(!0),G(Le,null,er(n.node.files,f=>(V(),G("div",{class:vt(["border-l pl-4 py-0.5",f.uri==n.current_uri?"th-accent-border":"th-core-border-base"]),key:f.display_name},[te(a,{to:{name:"pageview",params:{pagepath:f.uri.split("/")}}},{default:Rr(()=>[Cr(tt(f.display_name),1)]),_:2},1032,["to"])],2))),128))],2)):Ge("",!0)])}const qu=pe(Uu,[["render",Ku]]),Wu={data(){return{}},components:{IconHouse:Va,IconSun:Ja,IconMoon:nu,IconMap:cu,IconTextCenter:pu,IconLargeX:xu,IconGeoAltFill:Fu,IconTextRight:Hu,IconCaretDown:Vi,IconCaretRight:zi,IconSearch:Ar,NavigationPanelCategory:qu},computed:{name(){return this.$M.data.name},home_addr(){return this.$M.data.home_addr},show_nav:{get(){return this.$M.uistate.show_nav},set(e){this.$M.uistate.show_nav=e}},root_node(){return this.$M.data.root_node},theme:{get(){return this.$M.uistate.theme},set(e){this.$M.set_theme(e)}},is_darkmode(){return this.theme=="dark"},is_mobile(){return this.$M.uistate.is_mobile},current_uri(){return this.$M.data.current_uri}},methods:{open_all(){this.$M.toggle_all_directories(!0)},close_all(){this.$M.toggle_all_directories(!1)},open_search_modal(){this.$M.open_search_modal()}}},Gu={class:"border-r th-core-border-base th-core-bg-surface1"},Ju={class:"p-4 flex flex-col gap-y-4 border-b th-core-border-base"},Yu={class:"ui-parent-row items-center gap-x-4 th-core-text-pop"},Xu={class:"text-xl font-bold"},Zu={class:"ui-parent-row items-center gap-x-2"},ef=["href"],tf=L("div",{class:"grow"},null,-1),nf={class:"sq-4"},rf=L("div",{class:"pr-8"}," Quick search... ",-1),sf=L("div",{class:"text-sm"}," Ctrl K ",-1),of={class:"text-sm flex flex-row items-center gap-x-2 th-core-text-base"},lf={class:"ui-child-expand ui-parent-col ui-scroll-y gap-y-2 px-4 py-8"};function cf(e,t,n,r,s,i){const o=de("IconHouse"),l=de("IconSun"),c=de("IconMoon"),a=de("IconLargeX"),f=de("IconSearch"),d=de("IconTextRight"),p=de("IconCaretRight"),m=de("IconCaretDown"),R=de("NavigationPanelCategory");return V(),G("nav",Gu,[L("header",Ju,[L("section",Yu,[L("h1",Xu,tt(i.name),1),L("div",Zu,[i.home_addr!=""?(V(),G("a",{key:0,class:"sq-5 cursor-pointer th-accent-text",href:i.home_addr,title:"go to main homepage"},[te(o)],8,ef)):Ge("",!0),i.is_darkmode?(V(),G("button",{key:1,class:"sq-5 cursor-pointer th-accent-text",onClick:t[0]||(t[0]=b=>i.theme="light"),title:"set theme to light"},[te(l)])):Ge("",!0),i.is_darkmode?Ge("",!0):(V(),G("button",{key:2,class:"sq-5 cursor-pointer th-accent-text",onClick:t[1]||(t[1]=b=>i.theme="dark"),title:"set theme to dark"},[te(c)]))]),tf,L("button",{class:"show-when-mobile-block sq-5",onClick:t[2]||(t[2]=b=>i.show_nav=!1),title:"close navigation"},[te(a)])]),L("section",null,[L("button",{onClick:t[3]||(t[3]=(...b)=>i.open_search_modal&&i.open_search_modal(...b)),class:"ui-row items-center gap-x-4 min-h-8 max-h-8 px-4 th-core-bg-surface2 hover:th-core-bg-surface3 rounded-md"},[L("div",nf,[te(f)]),rf,sf])]),L("section",of,[te(d,{class:"sq-5 th-core-text-muted"}),L("button",{class:"w-fit p-1 rounded th-core-bg-surface2 th-accent-text",onClick:t[4]||(t[4]=(...b)=>i.close_all&&i.close_all(...b)),title:"open all categories"},[te(p,{class:"sq-3"})]),L("button",{class:"w-fit p-1 rounded th-core-bg-surface2 th-accent-text",onClick:t[5]||(t[5]=(...b)=>i.open_all&&i.open_all(...b)),title:"collapse all categories"},[te(m,{class:"sq-3"})])])]),L("section",lf,[i.root_node!=null?(V(),mt(R,{key:0,deep:!1,node:i.root_node,current_uri:i.current_uri},null,8,["node","current_uri"])):Ge("",!0)])])}const af=pe(Wu,[["render",cf]]),uf={data(){return{local_search_term:""}},mounted(){this.$nextTick(()=>{this.$refs.search_input.focus()})},components:{IconSearch:Ar},computed:{has_search_results(){return this.$M.data.has_search_result},search_results(){return this.$M.data.search_results}},methods:{run_search(){const e=this.local_search_term;e!=""&&this.$M.trigger_search(e)},close(){this.$M.close_search_modal()}}},ff={class:"ui-child-expand ui-parent-stack"},df={class:"ui-child-center-x top-4 md:top-16 w-[calc(100%-2rem)] md:w-1/2 h-[calc(100%-2rem)] md:h-1/2 ui-parent-col th-core-bg-surface2 th-core-text-base rounded-lg"},hf={class:"ui-row items-center h-16 px-4 border-b th-core-border-soft"},pf={class:"sq-4"},_f={class:"ui-row items-center"},mf={key:0,class:"ui-col ui-child-expand ui-scroll-y"},gf={key:1,class:"ui-col ui-child-expand ui-scroll-y"},yf=L("div",{class:"ui-row items-center px-4 min-h-16 max-h-16"}," no results ",-1),vf=[yf],xf=L("section",{class:"min-h-8 max-h-8 px-4 ui-row items-center border-t th-core-border-soft text-xs th-core-text-muted"},[L("span",{class:"flex-1 h-1"}),L("span",null,"powered by lunrjs")],-1);function wf(e,t,n,r,s,i){const o=de("IconSearch"),l=de("RouterLink");return V(),G("div",ff,[L("nav",df,[L("section",hf,[L("div",pf,[te(o)]),pn(L("input",{ref:"search_input",type:"text","onUpdate:modelValue":t[0]||(t[0]=c=>s.local_search_term=c),class:"flex-1 bg-transparent border-0 focus:ring-0",placeholder:"Search documentation",onKeypress:t[1]||(t[1]=lc((...c)=>i.run_search&&i.run_search(...c),["enter"]))},null,544),[[ic,s.local_search_term,void 0,{trim:!0}]]),L("div",_f,[L("button",{onClick:t[2]||(t[2]=(...c)=>i.close&&i.close(...c)),class:"th-core-bg-muted rounded px-2"}," esc ")])]),i.has_search_results&&i.search_results.length>0?(V(),G("section",mf,[(V(!0),G(Le,null,er(i.search_results,c=>(V(),mt(l,{to:{name:"pageview",params:{pagepath:c.ref.split("/")}},onClick:i.close,class:"ui-row items-center px-4 min-h-16 max-h-16 border-b th-core-border-soft hover:th-accent-text hover:th-core-bg-surface3"},{default:Rr(()=>[Cr(tt(c.ref),1)]),_:2},1032,["to","onClick"]))),256))])):(V(),G("section",gf,vf)),xf])])}const bf=pe(uf,[["render",wf]]),Ef={data(){return{}},components:{OnMobileHeader:La,ArticleFooter:Na,NavigationPanel:af,SearchModal:bf},mounted(){document.addEventListener("keydown",this.key_event_controller)},beforeUnmount(){document.removeEventListener("keydown",this.key_event_controller)},computed:{show_nav:{get(){return this.$M.uistate.show_nav},set(e){this.$M.uistate.show_nav=e}},show_search(){return this.$M.uistate.show_search},error_open(){return this.$M.uistate.error_open},error_msg(){return this.$M.uistate.error_msg},current_html(){return this.$M.data.current_html}},watch:{current_html(e,t){this.$refs.article_container.scrollTop=0}},methods:{key_event_controller(e){e.key=="k"&&e.ctrlKey&&(e.preventDefault(),this.show_search||this.$M.open_search_modal()),(e.keyCode==27||e.key=="Escape")&&this.show_search&&(e.preventDefault(),this.$M.close_search_modal())}}},Rf={class:"ui-spa-root ui-parent-stack font-sans th-core-bg-base th-core-text-base"},Pf={class:"ui-child-expand ui-parent-row"},Sf=L("div",{class:"show-when-desktop-block ui-nav-w pl-8 h-full"},null,-1),Cf={class:"ui-child-expand ui-parent-col"},$f={key:0,class:"py-2 px-4 bg-red-700 text-white"},If={ref:"article_container",class:"ui-child-expand ui-parent-col ui-scroll-y"},Of=L("div",{class:"min-h-8 w-full"},null,-1),Tf=L("div",{class:"min-h-16 w-full"},null,-1),kf={class:"show-when-mobile-block ui-child-expand bg-black opacity-75"},Af={class:"ui-child-expand bg-black/30 backdrop-blur-sm"};function Lf(e,t,n,r,s,i){const o=de("OnMobileHeader"),l=de("RouterView"),c=de("ArticleFooter"),a=de("NavigationPanel"),f=de("SearchModal");return V(),G("div",Rf,[L("main",Pf,[Sf,L("div",Cf,[te(o),i.error_open?(V(),G("div",$f,tt(i.error_msg),1)):Ge("",!0),L("section",If,[Of,te(l),Tf,te(c)],512)])]),pn(L("div",kf,null,512),[[Dn,i.show_nav]]),pn(te(a,{class:"absolute pin-tl ui-parent-col ui-nav-w h-full th-core-bg-base"},null,512),[[Dn,i.show_nav]]),pn(L("div",Af,null,512),[[Dn,i.show_search]]),i.show_search?(V(),mt(f,{key:0})):Ge("",!0)])}const Mf=pe(Ef,[["render",Lf]]),Ff={data(){return{}}},Qf={class:"grow px-4 pt-8 pb-16 md:w-[48rem] md:self-center md:pt-12 md:pb-24 th-core-bg-surface1 docd-article"},Nf=L("h1",{class:"text-2xl text-yellow-500"}," Hello from Home ",-1),jf=L("div",{class:"text-purple-300"}," This is a documentation page ",-1),Df=[Nf,jf];function Bf(e,t,n,r,s,i){return V(),G("article",Qf,Df)}const Hf=pe(Ff,[["render",Bf]]),Uf={data(){return{}},computed:{current_html(){return this.$M.data.current_html},current_raw_text(){return this.$M.data.current_raw_text},current_node(){return this.$M.data.current_node},last_modified(){return this.current_node==null?"":this.current_node.last_modified.split("T")[0]},article_view_mode(){return this.$M.uistate.article_view_mode},is_raw(){return this.article_view_mode=="raw"}},methods:{set_rendered(){this.$M.uistate.article_view_mode="rendered"},load_raw(){this.$M.load_raw_text()},on_article_click(e){const t=e.target.closest("a[data-docd-part]");t!=null&&(e.preventDefault(),this.$M.load_page_part(t.getAttribute("href")))},btn_class(e){return e?"th-accent-text":"th-core-text-muted hover:th-accent-text"}}},Vf={class:"grow ui-col px-4 pt-4 pb-12 md:w-[48rem] md:self-center th-core-bg-surface1 rounded-lg"},zf={class:"ui-row items-center mb-8 text-sm"},Kf={class:"th-core-text-muted"},qf=L("div",{class:"flex-1"},null,-1),Wf={class:"ui-row gap-x-2"},Gf=L("span",null,"|",-1),Jf=["innerHTML"],Yf={key:1,class:"whitespace-pre-wrap"};function Xf(e,t,n,r,s,i){return V(),G("div",Vf,[L("div",zf,[L("div",Kf," last modified: "+tt(this.last_modified),1),qf,L("div",Wf,[L("span",{class:vt(["cursor-pointer",i.btn_class(!i.is_raw)]),onClick:t[0]||(t[0]=(...o)=>i.set_rendered&&i.set_rendered(...o))}," rendered ",2),Gf,L("span",{class:vt(["cursor-pointer",i.btn_class(i.is_raw)]),onClick:t[1]||(t[1]=(...o)=>i.load_raw&&i.load_raw(...o))}," raw ",2)])]),i.article_view_mode=="rendered"?(V(),G("article",{key:0,class:"docd-article",innerHTML:i.current_html,onClick:t[2]||(t[2]=(...o)=>i.on_article_click&&i.on_article_click(...o))},null,8,Jf)):(V(),G("pre",Yf,tt(i.current_raw_text),1))])}const Zf=pe(Uf,[["render",Xf]]);function ed(){const e={root_uri:window.$ROOT_URI,name:window.$NAME,footer_text:window.$FOOTER,home_addr:window.$HOME_ADDR,live_reload_uri:window.$LIVE_RELOAD_URI};ke.mng=new ya(ke,e);const t=[{name:"home",path:`${e.root_uri}/`,component:Hf},{name:"pageview",path:`${e.root_uri}/view/:pagepath+`,component:Zf}];ke.router=ha({history:Hc(),routes:t}),ke.router.beforeEach((n,r)=>{const{name:s,params:i}=n;switch(s){case"home":break;case"pageview":ke.mng.load_page_view(s,i);break}}),ke.app=uc(Mf),ke.app.use(ke),ke.app.use(ke.router),ke.app.mount("#mount"),ke.mng.start(),window.$G===void 0?window.$G=ke:console.warn("window.$G already assigned.")}ed();
 //# sourceMappingURL=index-2387162f.js.map
@@ -2,12 +2,19 @@
 # SPDX-License-Indentifier: UNLICENSED
 
 from pathlib import Path
+from functools import lru_cache
+import re
 
-# Load the spa page template
+# The spa page template
 HERE = Path(__file__).parent
 SPA_SRC_SPA_TEMPLATE_FILE = (HERE/"html-templates/spa.html").resolve()
-assert(SPA_SRC_SPA_TEMPLATE_FILE.is_file())
-SPA_TEMPLATE = SPA_SRC_SPA_TEMPLATE_FILE.read_text()
+
+@lru_cache(maxsize=None)
+def load_spa_template():
+    # Read on first use rather than on import
+    if not SPA_SRC_SPA_TEMPLATE_FILE.is_file():
+        raise Exception(f"Missing the spa template: {SPA_SRC_SPA_TEMPLATE_FILE}")
+    return SPA_SRC_SPA_TEMPLATE_FILE.read_text()
 
 # The expected keys in the template
 SPA_CONFIG_KEYS = (
@@ -21,12 +28,15 @@ SPA_CONFIG_KEYS = (
     "__JS_FILE__"
 )
 
+# Matches any of the keys, so we can fill them all in one pass
+SPA_CONFIG_KEYS_PATTERN = re.compile("|".join( re.escape(k) for k in SPA_CONFIG_KEYS ))
+
 # Our render method
 def render_spa_html(config_dict, template_text=None):
     if template_text is None:
-        template_text = SPA_TEMPLATE
-    for k,v in config_dict.items():
+        template_text = load_spa_template()
+    for k in config_dict:
         assert ( k in SPA_CONFIG_KEYS )
-        template_text = template_text.replace(k,v)
-    return template_text
+    # Keys we weren't given are left in place for a later render
+    return SPA_CONFIG_KEYS_PATTERN.sub(lambda m: config_dict.get(m.group(0),m.group(0)),template_text)
 
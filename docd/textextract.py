@@ -0,0 +1,138 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Pulls the searchable text out of a rendered page.
+
+Indexing the raw source fills the index with markdown syntax, URLs and code
+punctuation. Instead we walk the rendered html and split it into the page
+title (its first `h1`), the rest of its headings, its prose and its code
+blocks. Code is reduced to its identifiers, and depending on the code mode
+is indexed in its own down-weighted field, folded into the prose or left out.
+"""
+
+# Python
+from html.parser import HTMLParser
+import re
+
+
+# How code blocks are indexed
+SEARCH_CODE_MODES = ("downweight","include","exclude")
+
+HEADING_TAGS = {"h1","h2","h3","h4","h5","h6"}
+# Tags whose text is never shown
+HIDDEN_TAGS = {"script","style","template"}
+# Tags that separate words, so their text isn't run together
+BLOCK_TAGS = {
+    "address","article","aside","blockquote","br","dd","details","div","dl","dt","figcaption",
+    "figure","footer","header","hr","li","main","nav","ol","p","pre","section","summary",
+    "table","tbody","td","tfoot","th","thead","tr","ul"
+} | HEADING_TAGS
+
+_URL = re.compile(r"\b[a-zA-Z][a-zA-Z0-9+.-]*://\S+|\bwww\.\S+")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]+")
+
+
+class _PageTextParser(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.headings = []
+        self.body = []
+        self.code = []
+        # Parts of the heading being read, if in one
+        self._heading = None
+        self._heading_tag = None
+        self._pre_depth = 0
+        self._hidden_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HIDDEN_TAGS:
+            self._hidden_depth += 1
+        elif tag == "pre":
+            self._pre_depth += 1
+        elif tag in HEADING_TAGS and self._heading is None:
+            self._heading = []
+            self._heading_tag = tag
+        if tag in BLOCK_TAGS:
+            self._space()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._space()
+
+    def handle_endtag(self, tag):
+        if tag in HIDDEN_TAGS:
+            self._hidden_depth = max(0,self._hidden_depth-1)
+        elif tag == "pre":
+            self._pre_depth = max(0,self._pre_depth-1)
+        elif tag == self._heading_tag:
+            text = " ".join("".join(self._heading).split())
+            if tag == "h1" and self.title is None:
+                self.title = text
+            elif len(text) > 0:
+                self.headings.append(text)
+            self._heading = None
+            self._heading_tag = None
+        if tag in BLOCK_TAGS:
+            self._space()
+
+    def handle_data(self, data):
+        if self._hidden_depth > 0:
+            return
+        if self._pre_depth > 0:
+            self.code.append(data)
+        elif self._heading is not None:
+            self._heading.append(data)
+        else:
+            self.body.append(data)
+
+    def _space(self):
+        if self._heading is not None:
+            self._heading.append(" ")
+        elif self._pre_depth > 0:
+            self.code.append("\n")
+        else:
+            self.body.append(" ")
+
+
+def code_identifiers(code):
+    # Only names are worth searching for in code, not its punctuation and literals
+    return " ".join(_IDENTIFIER.findall(code))
+
+
+def extract_page_text(html, code_mode="downweight"):
+    """
+    Split rendered html into a dict of `title`, `headings`, `body` and `code`
+    text. The title is None if the page has no `h1`.
+    """
+    if code_mode not in SEARCH_CODE_MODES:
+        raise Exception(f"Unknown search code mode: {code_mode}")
+    parser = _PageTextParser()
+    parser.feed(html)
+    parser.close()
+
+    body = " ".join(_URL.sub(" ","".join(parser.body)).split())
+    code = code_identifiers("".join(parser.code))
+    if code_mode == "include":
+        body = f"{body} {code}".strip()
+    if code_mode != "downweight":
+        code = ""
+    return {
+        "title": parser.title,
+        "headings": " ".join(parser.headings),
+        "body": body,
+        "code": code
+    }
+
+
+def extract_code_text(text, code_mode="downweight"):
+    # A whole source file is code, with no title or headings of its own
+    code = code_identifiers(text)
+    return {
+        "title": None,
+        "headings": "",
+        "body": code if code_mode == "include" else "",
+        "code": code if code_mode == "downweight" else ""
+    }
@@ -2,6 +2,8 @@
 # SPDX-License-Indentifier: UNLICENSED
 
 from pathlib import Path
+from contextlib import contextmanager
+import os
 import shutil
 import hashlib
 
@@ -35,3 +37,25 @@ def find_one_matching_file(directory, glob):
     if len(results) == 0:
         raise Exception(f"Found no results for {directory} => {glob}")
     return results[0]
+
+def decode_text(data, errors="strict"):
+    # Decode source bytes the way `Path.read_text()` would, including newline translation
+    text = data.decode("utf-8",errors=errors)
+    if "\r" in text:
+        text = text.replace("\r\n","\n").replace("\r","\n")
+    return text
+
+@contextmanager
+def atomic_open(filepath, mode="w"):
+    # Write to a temporary name and rename it over `filepath`, so a reader never sees
+    # a partial file and a hardlinked copy of the old file is left as it was
+    filepath = Path(filepath)
+    tmp = filepath.with_name(f".{filepath.name}.docd-tmp")
+    try:
+        with tmp.open(mode) as f:
+            yield f
+        os.replace(tmp,filepath)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
@@ -1,20 +1,158 @@
 # SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
 # SPDX-License-Indentifier: UNLICENSED
 
+import re
+import json
+import threading
+import hashlib
+from io import StringIO
 import markdown
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension
+try:
+    import pygments
+    from pygments.lexers import get_lexer_by_name
+    from pygments.formatters import get_formatter_by_name
+except ImportError:
+    pygments = None
+# Local
+from docd.codepage import split_source, code_page_plan, plain_code_html, too_large_html
 
-def make_html(str_src):
-    config = {
-        "output_format": "html5",
-        "extensions": [
-            "markdown.extensions.extra",
-            "markdown.extensions.fenced_code",
-            "markdown.extensions.codehilite"
-        ],
-        "extension_configs": {
-            "markdown.extensions.codehilite": {
-                "guess_lang": False
-            }
+# Bump when docd changes how it turns sources into html
+RENDERER_VERSION = 2
+
+MARKDOWN_CONFIG = {
+    "output_format": "html5",
+    "extensions": [
+        "markdown.extensions.extra",
+        "markdown.extensions.fenced_code",
+        "markdown.extensions.codehilite"
+    ],
+    "extension_configs": {
+        "markdown.extensions.codehilite": {
+            "guess_lang": False
         }
     }
-    return markdown.markdown(str_src,**config)
+}
+
+
+class MarkdownRenderer:
+    """
+    A warm renderer that keeps one `Markdown` converter and its pygments
+    lexers and formatters around between pages. Use one per thread.
+    """
+
+    def __init__(self):
+        # Keep our own copy of the config so we can hook the formatter
+        config = json.loads(json.dumps(MARKDOWN_CONFIG))
+        config["extension_configs"]["markdown.extensions.codehilite"]["pygments_formatter"] = self._get_formatter
+        self.md = markdown.Markdown(**config)
+
+        # Pull the codehilite settings, normalized the way codehilite does it
+        self._highlight_options = None
+        for ext in self.md.registeredExtensions:
+            if isinstance(ext,CodeHiliteExtension):
+                conf = ext.getConfigs()
+                self._use_pygments = pygments is not None and conf["use_pygments"]
+                conf.pop("pygments_formatter")
+                style = conf.pop("pygments_style","default")
+                self._highlight_options = CodeHilite("",style=style,**conf).options
+
+        # Caches keyed by language
+        self._lexers = {}
+        self._formatters = {}
+
+    def render(self, text, language):
+        if language == "markdown":
+            return self.render_markdown(text)
+        else:
+            return self.render_code(text,language)
+
+    def render_markdown(self, text):
+        self.md.reset()
+        return self.md.convert(text)
+
+    def render_code(self, text, language):
+        """
+        Highlight a whole source file directly, giving the same html as
+        wrapping it in a fenced block and running it through markdown.
+        """
+        if not self._use_pygments:
+            return self.render_markdown(f"```{language}\n{text}\n```")
+        return self._highlight(self._normalize_code(text),language)
+
+    def render_parts(self, text, language, limits=None):
+        """
+        Render a source as a list of html parts. Only code sources over the
+        `limits` (a CodePageLimits) are split, shown plain or left out.
+        """
+        if language == "markdown" or limits is None:
+            return [self.render(text,language)]
+        size = len(text.encode("utf-8"))
+        plan = code_page_plan(size,limits)
+        if plan == "too_large":
+            return [too_large_html(size)]
+        if plan == "highlight" and not (0 < limits.page_bytes < size):
+            return [self.render_code(text,language)]
+        parts = split_source(self._normalize_code(text),limits.page_bytes)
+        if plan == "plain" or not self._use_pygments:
+            return [ plain_code_html(e) for e in parts ]
+        return [ self._highlight(e,language) for e in parts ]
+
+    def _normalize_code(self, text):
+        # Normalize the source the same way markdown's preprocessor would
+        text = text.replace("\x02","").replace("\x03","")
+        text = text.replace("\r\n","\n").replace("\r","\n")
+        text = text.expandtabs(self.md.tab_length)
+        text = re.sub(r"(?<=\n) +\n","\n","\n"+text)[1:]
+        return text.strip("\n")
+
+    def _highlight(self, text, language):
+        # Format the token stream straight into a buffer
+        out = StringIO()
+        self._get_formatter(f"language-{language}").format(self._get_lexer(language).get_tokens(text),out)
+        return out.getvalue().strip()
+
+    def _get_lexer(self, language):
+        lexer = self._lexers.get(language)
+        if lexer is None:
+            try:
+                lexer = get_lexer_by_name(language or None,**self._highlight_options)
+            except ValueError:
+                lexer = get_lexer_by_name("text",**self._highlight_options)
+            self._lexers[language] = lexer
+        return lexer
+
+    def _get_formatter(self, lang_str=None, **options):
+        # Called by codehilite for each fenced block, and by us for whole files
+        if not options:
+            options = self._highlight_options
+        key = (lang_str,repr(sorted(options.items())))
+        formatter = self._formatters.get(key)
+        if formatter is None:
+            formatter = get_formatter_by_name("html",**options)
+            self._formatters[key] = formatter
+        return formatter
+
+
+# One renderer per worker thread or process, created on first use
+_LOCAL = threading.local()
+
+def get_renderer():
+    renderer = getattr(_LOCAL,"renderer",None)
+    if renderer is None:
+        renderer = _LOCAL.renderer = MarkdownRenderer()
+    return renderer
+
+def make_html(str_src):
+    return get_renderer().render_markdown(str_src)
+
+def renderer_fingerprint():
+    # Anything that can change the rendered html of an unchanged source
+    settings = {
+        "renderer_version": RENDERER_VERSION,
+        "markdown_version": markdown.__version__,
+        "pygments_version": None if pygments is None else pygments.__version__,
+        "markdown_config": MARKDOWN_CONFIG
+    }
+    raw = json.dumps(settings,sort_keys=True).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
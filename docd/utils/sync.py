@@ -0,0 +1,225 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Mirrors one directory into another, like `rsync -a [--delete]` but in process.
+
+Files are skipped when their size and mtime match. Files that are the same size
+but have a different mtime are hashed, and if they turn out the same only the
+mtime is fixed. Copies use a reflink or `copy_file_range` where the filesystem
+supports it (or optionally hardlinks), are run over a pool of threads and are
+written to a temporary name first so a reader never sees a partial file.
+"""
+
+# Python
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+import os
+import errno
+import shutil
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+# Local
+from docd.utils.filetools import file_sha256
+
+
+# ioctl to clone a file's extents on btrfs/xfs
+FICLONE = 0x40049409
+
+# Errors that mean "this kind of copy isn't possible here", so try the next kind
+_UNSUPPORTED = { errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY, errno.EPERM, errno.EBADF }
+
+
+@dataclass
+class SyncResult:
+    copied: int = 0
+    linked: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    bytes_copied: int = 0
+
+    def __str__(self):
+        return (f"{self.copied} copied ({self.bytes_copied} bytes), {self.linked} linked, "
+                f"{self.unchanged} unchanged, {self.removed} removed")
+
+
+#-- Copying -------------------------------------------------------------------#
+
+def _reflink(fsrc, fdst):
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(fdst.fileno(),FICLONE,fsrc.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def _copy_file_range(fsrc, fdst, size):
+    if not hasattr(os,"copy_file_range"):
+        return False
+    try:
+        remaining = size
+        while remaining > 0:
+            n = os.copy_file_range(fsrc.fileno(),fdst.fileno(),min(remaining,1<<30))
+            if n == 0:
+                break
+            remaining -= n
+        return True
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+        # Start over with a plain copy
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+        return False
+
+
+def copy_file(src, dst, hardlink=False):
+    """
+    Copy `src` over `dst` through a temporary file, keeping its mode and times.
+    Returns "linked" or "copied".
+    """
+    src,dst = Path(src),Path(dst)
+    tmp = dst.with_name(f".{dst.name}.docd-tmp")
+    if hardlink:
+        try:
+            if tmp.exists() or tmp.is_symlink():
+                tmp.unlink()
+            os.link(src,tmp)
+            os.replace(tmp,dst)
+            return "linked"
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+    size = src.stat().st_size
+    with src.open("rb") as fsrc, tmp.open("wb") as fdst:
+        if not _reflink(fsrc,fdst) and not _copy_file_range(fsrc,fdst,size):
+            shutil.copyfileobj(fsrc,fdst,1<<20)
+    shutil.copystat(src,tmp)
+    os.replace(tmp,dst)
+    return "copied"
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+#-- Sync ----------------------------------------------------------------------#
+
+def sync_directory(src_dir, dst_dir, delete=False, exclude=(), follow_symlinks=False, hardlink=False, threads=8, store=None,
+                   keep_suffixes=()):
+    """
+    Make `dst_dir` a mirror of `src_dir`. With `delete`, entries in `dst_dir`
+    that aren't in `src_dir` are removed, except those named for an entry in
+    `src_dir` plus one of `keep_suffixes`, like precompressed copies. Entries
+    whose name or relative path matches an `exclude` pattern are neither copied
+    nor deleted. Given an
+    ObjectStore, files are added to it and linked from there, unless they are
+    hardlinked to the source.
+    Returns a SyncResult.
+    """
+    src_dir,dst_dir = Path(src_dir),Path(dst_dir)
+    result = SyncResult()
+    tasks = []
+
+    def is_excluded(relpath):
+        name = relpath.rsplit("/",1)[-1]
+        return any( fnmatch(name,e) or fnmatch(relpath,e) for e in exclude )
+
+    # Walk both trees, deciding what to do without touching file contents
+    stack = [ (src_dir,dst_dir,"") ]
+    while stack:
+        src,dst,rel = stack.pop()
+        # Something other than a directory may be in the way
+        if rel and os.path.lexists(dst) and not (dst.is_dir() and not dst.is_symlink()):
+            _remove(dst)
+            result.removed += 1
+        dst.mkdir(parents=True,exist_ok=True)
+
+        with os.scandir(src) as it:
+            src_entries = { e.name:e for e in it if not is_excluded(rel+e.name) }
+        with os.scandir(dst) as it:
+            dst_entries = { e.name:e for e in it }
+
+        for name,e in sorted(src_entries.items()):
+            d = dst_entries.get(name)
+            dst_path = dst/name
+
+            # Links are recreated as links, unless we follow them
+            if e.is_symlink() and not follow_symlinks:
+                target = os.readlink(e.path)
+                if d is not None and d.is_symlink() and os.readlink(d.path) == target:
+                    result.unchanged += 1
+                else:
+                    tasks.append(("symlink",e.path,dst_path,target))
+                continue
+
+            if e.is_dir():
+                stack.append((Path(e.path),dst_path,f"{rel}{name}/"))
+                continue
+            if not e.is_file():
+                # Broken links, sockets and the like
+                continue
+
+            st = e.stat()
+            if d is not None and d.is_file(follow_symlinks=False):
+                dst_st = d.stat(follow_symlinks=False)
+                if dst_st.st_size == st.st_size:
+                    if dst_st.st_mtime_ns == st.st_mtime_ns:
+                        result.unchanged += 1
+                    else:
+                        tasks.append(("check",e.path,dst_path,st))
+                    continue
+            tasks.append(("copy",e.path,dst_path,st))
+
+        if delete:
+            for name,d in dst_entries.items():
+                if name in src_entries or is_excluded(rel+name):
+                    continue
+                if any( name.endswith(s) and name[:-len(s)] in src_entries for s in keep_suffixes ):
+                    continue
+                _remove(d.path)
+                result.removed += 1
+
+    # Then move the data over the thread pool
+    def run(task):
+        kind,src,dst,extra = task
+        if kind == "symlink":
+            if os.path.lexists(dst):
+                _remove(dst)
+            os.symlink(extra,dst)
+            return "copied",0
+        if kind == "check":
+            # Same size but a different mtime, so let the contents decide
+            if file_sha256(src) == file_sha256(dst):
+                # Other links to it, like the live file behind a staging copy,
+                # keep their times, so it gets a copy of its own first. Only an
+                # object in a store is retimed in place, since every path linked
+                # to it holds the same contents.
+                if store is None and os.stat(dst).st_nlink > 1:
+                    copy_file(dst,dst)
+                os.utime(dst,ns=(extra.st_atime_ns,extra.st_mtime_ns))
+                return "unchanged",0
+        if os.path.isdir(dst) and not os.path.islink(dst):
+            shutil.rmtree(dst)
+        if store is not None and not hardlink:
+            how = store.write_file(src,dst)
+        else:
+            how = copy_file(src,dst,hardlink=hardlink)
+        return how,(extra.st_size if how == "copied" else 0)
+
+    with ThreadPoolExecutor(max_workers=max(1,threads)) as executor:
+        for how,n_bytes in executor.map(run,tasks):
+            setattr(result,how,getattr(result,how)+1)
+            result.bytes_copied += n_bytes
+
+    return result
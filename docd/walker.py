@@ -0,0 +1,93 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Walks a source tree with `os.scandir`, yielding entries as it goes.
+
+The walk is iterative and depth first, in the same order as a recursive walk
+over sorted children. Each entry carries the stat data of its `DirEntry`, so
+nothing is stat'ed more than once.
+
+Skip patterns are globs. A pattern without a `/` is matched against entry
+names at any depth, and one with a `/` against the path from the root.
+A pattern ending in `/` only matches directories.
+"""
+
+# Python
+from collections import namedtuple
+import os
+import re
+import fnmatch
+
+
+# These are never part of the pages
+DEFAULT_SKIP_PATTERNS = (".git/","_output/","_media/")
+
+# `relpath` is relative to the root and uses `/`, with "." for the root itself
+SourceEntry = namedtuple("SourceEntry",("kind","relpath","name","depth","stat"))
+
+
+class SkipPatterns:
+
+    def __init__(self, patterns=DEFAULT_SKIP_PATTERNS):
+        self.patterns = tuple(patterns)
+        # One combined regex for each of names and paths, and directories and anything
+        groups = { (by_path,dirs_only):[] for by_path in (False,True) for dirs_only in (False,True) }
+        for pattern in self.patterns:
+            dirs_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            by_path = "/" in pattern
+            groups[(by_path,dirs_only)].append(fnmatch.translate(pattern.lstrip("/")))
+        self._regexes = { k:(re.compile("|".join(v)) if len(v) > 0 else None) for k,v in groups.items() }
+
+    def __repr__(self):
+        return f"SkipPatterns({self.patterns!r})"
+
+    def skips(self, relpath, name, is_dir):
+        for (by_path,dirs_only),regex in self._regexes.items():
+            if regex is None or (dirs_only and not is_dir):
+                continue
+            if regex.match(relpath if by_path else name):
+                return True
+        return False
+
+
+def _sorted_entries(dirpath):
+    with os.scandir(dirpath) as it:
+        return sorted(it,key=lambda e: e.name)
+
+
+def walk_source_tree(root, max_depth=100000, skip=None, include_files=True):
+    """
+    Yield a SourceEntry for the root, and then for every directory and file
+    under it down to `max_depth`. Entries that are neither a file nor a
+    directory, such as broken symlinks, are left out.
+    """
+    skip = SkipPatterns() if skip is None else skip
+    root = os.fspath(root)
+    yield SourceEntry("directory",".",os.path.basename(os.path.normpath(root)),0,os.stat(root))
+
+    # Each frame is (dirpath, relpath prefix for children, depth, remaining entries)
+    stack = [ (root,"",0,iter(_sorted_entries(root))) ]
+    while len(stack) > 0:
+        dirpath,prefix,depth,entries = stack[-1]
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                continue
+            if not is_dir and not (is_file and include_files):
+                continue
+            relpath = prefix+entry.name
+            if skip.skips(relpath,entry.name,is_dir):
+                continue
+            if is_file:
+                yield SourceEntry("file",relpath,entry.name,depth,entry.stat())
+            elif depth+1 <= max_depth:
+                yield SourceEntry("directory",relpath,entry.name,depth+1,entry.stat())
+                # Descend now, and pick up this directory's remaining entries after
+                stack.append((entry.path,relpath+"/",depth+1,iter(_sorted_entries(entry.path))))
+                break
+        else:
+            stack.pop()
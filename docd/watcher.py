@@ -0,0 +1,225 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+"""
+Watches directory trees for changes, using inotify where available and polling otherwise.
+
+Changes are collected and handed to the callback as one set of paths once
+things have been quiet for the debounce period, so saving many files at once
+(or an editor's write-rename dance) triggers a single update.
+"""
+
+# Python
+from pathlib import Path
+import os
+import errno
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+# Local
+from docd.walker import SkipPatterns
+
+
+class BaseWatcher:
+
+    def __init__(self, roots, callback, debounce=0.2, skip=None):
+        self.roots = [ Path(e) for e in roots if Path(e).is_dir() ]
+        self.callback = callback
+        self.debounce = debounce
+        # Patterns are matched relative to whichever root a path is under
+        self.skip = SkipPatterns() if skip is None else skip
+
+        self._loop = None
+        self._pending = set()
+        self._flush_handle = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+
+    def stop(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    def _notify(self, paths):
+        # Restart the quiet period on every new change
+        self._pending.update( str(e) for e in paths )
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._flush_handle = self._loop.call_later(self.debounce,self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        paths,self._pending = self._pending,set()
+        if len(paths) > 0:
+            result = self.callback(paths)
+            if asyncio.iscoroutine(result):
+                self._loop.create_task(result)
+
+    def _is_skipped(self, root, path, is_dir):
+        relpath = os.path.relpath(path,root).replace(os.sep,"/")
+        return self.skip.skips(relpath,os.path.basename(path),is_dir)
+
+    def _root_of(self, path):
+        for root in self.roots:
+            if path == str(root) or path.startswith(str(root)+os.sep):
+                return root
+        return None
+
+    def _walk_directories(self, root, top=None):
+        for dirpath,dirnames,filenames in os.walk(root if top is None else top):
+            dirnames[:] = [ e for e in dirnames if not self._is_skipped(root,os.path.join(dirpath,e),True) ]
+            filenames = [ e for e in filenames if not self._is_skipped(root,os.path.join(dirpath,e),False) ]
+            yield dirpath,filenames
+
+
+class PollingWatcher(BaseWatcher):
+    """
+    Compares stat snapshots of the trees every `interval` seconds.
+    """
+
+    def __init__(self, roots, callback, interval=0.5, **kwargs):
+        super().__init__(roots,callback,**kwargs)
+        self.interval = interval
+        self._snapshot = None
+        self._task = None
+
+    def _take_snapshot(self):
+        snapshot = {}
+        for root in self.roots:
+            for dirpath,filenames in self._walk_directories(root):
+                for name in filenames:
+                    path = os.path.join(dirpath,name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (st.st_mtime_ns,st.st_size)
+        return snapshot
+
+    def start(self):
+        super().start()
+        self._task = self._loop.create_task(self._run())
+
+    def stop(self):
+        super().stop()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        self._snapshot = await self._loop.run_in_executor(None,self._take_snapshot)
+        while True:
+            await asyncio.sleep(self.interval)
+            snapshot = await self._loop.run_in_executor(None,self._take_snapshot)
+            changed = { k for k,v in snapshot.items() if self._snapshot.get(k) != v }
+            changed.update( k for k in self._snapshot if k not in snapshot )
+            self._snapshot = snapshot
+            if len(changed) > 0:
+                self._notify(changed)
+
+
+class InotifyWatcher(BaseWatcher):
+    """
+    Linux inotify through libc, with a watch on every directory in the trees.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = ( IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                 | IN_CREATE | IN_DELETE | IN_DELETE_SELF )
+
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, roots, callback, **kwargs):
+        super().__init__(roots,callback,**kwargs)
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name,use_errno=True)
+        if not hasattr(self._libc,"inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK|self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(),"inotify_init1 failed")
+        self._paths_by_wd = {}
+        for root in self.roots:
+            self._add_tree(root)
+
+    def _add_tree(self, root, top=None):
+        for dirpath,_ in self._walk_directories(root,top=top):
+            wd = self._libc.inotify_add_watch(self._fd,os.fsencode(dirpath),self.WATCH_MASK)
+            if wd >= 0:
+                self._paths_by_wd[wd] = dirpath
+
+    def start(self):
+        super().start()
+        self._loop.add_reader(self._fd,self._read_events)
+
+    def stop(self):
+        super().stop()
+        if self._loop is not None:
+            self._loop.remove_reader(self._fd)
+        os.close(self._fd)
+
+    def _read_events(self):
+        try:
+            buffer = os.read(self._fd,64*1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return
+            raise
+
+        changed = set()
+        offset = 0
+        while offset < len(buffer):
+            wd,mask,cookie,length = self.EVENT_HEADER.unpack_from(buffer,offset)
+            offset += self.EVENT_HEADER.size
+            name = buffer[offset:offset+length].rstrip(b"\0")
+            offset += length
+
+            # If we lost events, call everything changed
+            if mask & self.IN_Q_OVERFLOW:
+                changed.update( str(e) for e in self.roots )
+                continue
+
+            dirpath = self._paths_by_wd.get(wd)
+            if dirpath is None:
+                continue
+            if mask & self.IN_IGNORED:
+                self._paths_by_wd.pop(wd,None)
+                continue
+            path = os.path.join(dirpath,os.fsdecode(name)) if name else dirpath
+
+            # Start watching new directories, and report what's inside them
+            root = self._root_of(path)
+            if root is not None and path != str(root) and self._is_skipped(root,path,bool(mask & self.IN_ISDIR)):
+                continue
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE|self.IN_MOVED_TO) and root is not None:
+                    self._add_tree(root,top=path)
+                    for sub_dirpath,filenames in self._walk_directories(root,top=path):
+                        changed.update( os.path.join(sub_dirpath,e) for e in filenames )
+            changed.add(path)
+
+        if len(changed) > 0:
+            self._notify(changed)
+
+
+def make_watcher(roots, callback, **kwargs):
+    # Prefer inotify, but polling works everywhere
+    try:
+        return InotifyWatcher(roots,callback,**kwargs)
+    except (OSError,AttributeError):
+        return PollingWatcher(roots,callback,**kwargs)
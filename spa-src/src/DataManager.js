@@ -14,10 +14,15 @@ export default class DataManager {
         // Our API URI Library
         const URIROOT = `${config.root_uri}/_resources`;
         this.API_URIS = {};
-        this.API_URIS.PAGE_DB_FILE =      `${URIROOT}/pages-database.json?h=${random_string()}`;
-        this.API_URIS.SEARCH_INDEX_FILE = `${URIROOT}/search/serialized-index.json?h=${random_string()}`;
-        this.API_URIS.PAGE_RENDERER_FILE = (PAGE_URI)=>`${URIROOT}/pages-html/${PAGE_URI}.html?h=${random_string()}`;
-        this.API_URIS.PAGE_RAW_FILE =      (PAGE_URI)=>`${URIROOT}/pages-txt/${PAGE_URI}.txt?h=${random_string()}`;
+        // Only the page database is always refetched, everything else is keyed
+        // by the content hashes it carries so browser and CDN caches can be reused
+        this.API_URIS.PAGE_DB_FILE =      ()=>`${URIROOT}/pages-database.json?h=${random_string()}`;
+        this.API_URIS.PAGE_DB_SHARD_FILE = (HASH)=>`${URIROOT}/pages-database/${HASH}.json`;
+        this.API_URIS.SEARCH_INDEX_FILE = (HASH)=>(HASH)?
+            `${URIROOT}/search/serialized-index-${HASH}.json`:
+            `${URIROOT}/search/serialized-index.json?h=${random_string()}`;
+        this.API_URIS.PAGE_RENDERER_FILE = (NODE)=>`${URIROOT}/pages-html/${NODE.uri}.html?h=${NODE.content_hash||random_string()}`;
+        this.API_URIS.PAGE_RAW_FILE =      (NODE)=>`${URIROOT}/pages-txt/${NODE.uri}.txt?h=${NODE.content_hash||random_string()}`;
 
         // Reactive uistate
         this._uistate = reactive({
@@ -40,7 +45,7 @@ export default class DataManager {
             root_node: null,
             nodes_by_uri: new Map(),
             directory_nodes_by_uri: new Map(),
-            orphaned_nodes: new Set(),
+            orphaned_nodes_by_parent_uri: new Map(),
             // Current data
             current_uri: "",
             current_html: "",
@@ -55,9 +60,17 @@ export default class DataManager {
         this._is_page_data_loaded = false;
         this._page_data_loaded_state_hold = null;
 
+        // A sharded page database only holds the top of the tree, and each
+        // directory's children are fetched the first time it is opened
+        this._is_page_database_sharded = false;
+        this._directory_loads = new Map();
+
         // Track if the search index is loaded
         this._is_search_index_loaded = false;
 
+        // The devserver tells us where to listen for changes
+        this._live_reload_uri = config.live_reload_uri||null;
+
         // Setup the theme
         this._setup_theme();
     }
@@ -72,6 +85,11 @@ export default class DataManager {
             const {name,params} = this._page_data_loaded_state_hold;
             this.load_page_view(name,params);
         }
+
+        // Listen for changes when run by the devserver
+        if(this._live_reload_uri){
+            this._connect_live_reload(false);
+        }
     }
 
     //-- Vue Hooks --------------------------------------------//
@@ -127,11 +145,24 @@ export default class DataManager {
         }
 
         toggle_all_directories(state){
+            // Opening everything would fetch every shard, so only open what we have
             for(const d of this._data.directory_nodes_by_uri.values()){
+                if(state && !d._is_loaded){
+                    continue; }
                 d._is_open = state;
             }
         }
 
+        set_directory_open(node,state){
+            node._is_open = state;
+            if(state && !node._is_loaded){
+                this.load_directory(node).catch(err=>{
+                    console.error("Error loading directory:",node.uri,err);
+                    this.set_error(`Failed to load ${node.display_name}`);
+                });
+            }
+        }
+
         open_search_modal(){
             this._uistate.show_search = true;
             this._data.has_search_result = false;
@@ -146,19 +177,58 @@ export default class DataManager {
     //-- Page Data --------------------------------------------//
 
         async _fetch_page_database(){
-            const resp = await window.fetch(this.API_URIS.PAGE_DB_FILE);
-            const objects = await resp.json();
+            const resp = await window.fetch(this.API_URIS.PAGE_DB_FILE());
+            this._process_page_database(await resp.json());
+        }
+
+        _process_page_database(db){
+            // The single file format is a plain list of every node
+            this._is_page_database_sharded = !Array.isArray(db);
+            const objects = (this._is_page_database_sharded)?db.nodes:db;
             objects.forEach(e=>this._process_node(e));
         }
 
+        async load_directory(node){
+            if(node._is_loaded){
+                return; }
+            // Share one fetch between everyone waiting on the same directory
+            let pending = this._directory_loads.get(node.children_hash);
+            if(pending==null){
+                pending = window.fetch(this.API_URIS.PAGE_DB_SHARD_FILE(node.children_hash))
+                    .then(resp=>resp.json())
+                    .finally(()=>this._directory_loads.delete(node.children_hash));
+                this._directory_loads.set(node.children_hash,pending);
+            }
+            const objects = await pending;
+            // The tree may have been reloaded while we waited
+            if(node._is_loaded || this._data.directory_nodes_by_uri.get(node.uri)!==node){
+                return; }
+            node._is_loaded = true;
+            objects.forEach(e=>this._process_node(e));
+        }
+
+        async _load_directories_to(uri){
+            // Load and open each directory above a page so it can be found and shown
+            const parts = uri.split("/");
+            for(let i=1; i<parts.length; i++){
+                const node = this._data.directory_nodes_by_uri.get(parts.slice(0,i).join("/"));
+                if(node==null){
+                    return; }
+                await this.load_directory(node);
+                node._is_open = true;
+            }
+        }
+
         _process_node(node){
             const uri = node.uri;
 
-            // If it's a directory, add containers for children
+            // If it's a directory, add containers for children.
+            // With shards, only the root comes with its children.
             if("directory" == node.kind){
                 node.files = [];
                 node.directories = [];
-                node._is_open = true;
+                node._is_loaded = !this._is_page_database_sharded || uri == ".";
+                node._is_open = node._is_loaded;
             }
 
             // Save the node by uri
@@ -170,7 +240,10 @@ export default class DataManager {
             if(node.parent_uri){
                 const parent = this._data.nodes_by_uri.get(node.parent_uri)||null;
                 if(parent==null){
-                    this._data.orphaned_nodes.add(node)
+                    const orphans = this._data.orphaned_nodes_by_parent_uri;
+                    if(!orphans.has(node.parent_uri)){
+                        orphans.set(node.parent_uri,[]); }
+                    orphans.get(node.parent_uri).push(node);
                 }else{
                     if("file" == node.kind){
                         parent.files.push(node);
@@ -185,18 +258,17 @@ export default class DataManager {
                 this._data.root_node = node;
             }
 
-            // Look for orphans that belong
+            // Adopt any orphans that belong to us
             if("directory" == node.kind){
-                for(const orphan of this._data.orphaned_nodes){
-                    if(orphan.parent_uri==node.uri){
-                        if("file" == orphan.kind){
-                            node.files.push(orphan);
-                        }else{
-                            node.directories.push(orphan);
-                        }
+                const orphans = this._data.orphaned_nodes_by_parent_uri.get(uri)||[];
+                for(const orphan of orphans){
+                    if("file" == orphan.kind){
+                        node.files.push(orphan);
+                    }else{
+                        node.directories.push(orphan);
                     }
-                    this._data.orphaned_nodes.delete(orphan)
                 }
+                this._data.orphaned_nodes_by_parent_uri.delete(uri);
             }
         }
 
@@ -224,13 +296,17 @@ export default class DataManager {
                 // Close error if open
                 this.clear_errors();
 
+                // Make sure the page's part of the tree is loaded
+                if(this._is_page_database_sharded){
+                    await this._load_directories_to(page_uri); }
+
                 // Find the page node and get the db_uri
                 const page_obj = this._data.nodes_by_uri.get(page_uri);
                 this._data.current_node = page_obj;
 
                 // Fetch and set info
                 this._data.current_uri = page_uri;
-                const resp = await window.fetch(this.API_URIS.PAGE_RENDERER_FILE(page_obj.uri));
+                const resp = await window.fetch(this.API_URIS.PAGE_RENDERER_FILE(page_obj));
                 const text = await resp.text();
                 this._data.current_html = text;
             }catch(err){
@@ -245,19 +321,117 @@ export default class DataManager {
             this._uistate.article_view_mode = "rendered";
         }
 
+        async load_page_part(part_url){
+            // A later part of a code page that was split for size
+            try {
+                const resp = await window.fetch(part_url);
+                this._data.current_html = await resp.text();
+                window.scrollTo(0,0);
+            }catch(err){
+                console.error("Error loading page part:",part_url,err);
+                this.set_error(`Failed to load ${part_url}`);
+            }
+        }
+
         async load_raw_text(){
             // Fetch and set info
-            const resp = await window.fetch(this.API_URIS.PAGE_RAW_FILE(this._data.current_node.uri));
+            const resp = await window.fetch(this.API_URIS.PAGE_RAW_FILE(this._data.current_node));
             const raw_text = await resp.text();
             this._data.current_raw_text = raw_text;
             this._uistate.article_view_mode = "raw";
         }
 
+    //-- Live Reload -------------------------------------------------------------------//
+
+        _connect_live_reload(is_reconnect){
+            const scheme = (window.location.protocol=="https:")?"wss":"ws";
+            const socket = new WebSocket(`${scheme}://${window.location.host}${this._live_reload_uri}`);
+            socket.onopen = ()=>{
+                // The devserver restarted, so anything could have changed
+                if(is_reconnect){
+                    window.location.reload(); }
+            };
+            socket.onmessage = (e)=>this._on_live_reload_message(JSON.parse(e.data));
+            socket.onclose = ()=>{
+                window.setTimeout(()=>this._connect_live_reload(true),1000);
+            };
+        }
+
+        async _on_live_reload_message(msg){
+            switch(msg.type){
+                case "reload":
+                    window.location.reload();
+                    break;
+                case "pages":
+                    // The tree and search index may have changed with the pages
+                    await this._reload_page_database();
+                    this._is_search_index_loaded = false;
+                    if(msg.uris.includes(this._data.current_uri)){
+                        await this._reload_current_page();
+                    }
+                    break;
+            }
+        }
+
+        async _reload_page_database(){
+            const resp = await window.fetch(this.API_URIS.PAGE_DB_FILE());
+            const db = await resp.json();
+
+            // Keep closed directories closed, and loaded directories loaded
+            const closed = new Set();
+            const loaded = [];
+            for(const [uri,node] of this._data.directory_nodes_by_uri){
+                if(!node._is_open){
+                    closed.add(uri); }
+                if(node._is_loaded && uri != "."){
+                    loaded.push(uri); }
+            }
+
+            this._data.nodes_by_uri.clear();
+            this._data.directory_nodes_by_uri.clear();
+            this._data.orphaned_nodes_by_parent_uri.clear();
+            this._process_page_database(db);
+            if(this._is_page_database_sharded){
+                // Parents before children, so each one is found when we get to it
+                loaded.sort((a,b)=>a.split("/").length-b.split("/").length);
+                for(const uri of loaded){
+                    const node = this._data.directory_nodes_by_uri.get(uri);
+                    if(node){
+                        await this.load_directory(node); }
+                }
+            }
+            for(const [uri,node] of this._data.directory_nodes_by_uri){
+                node._is_open = node._is_loaded && !closed.has(uri);
+            }
+            this._data.current_node = this._data.nodes_by_uri.get(this._data.current_uri)||null;
+        }
+
+        async _reload_current_page(){
+            const page_uri = this._data.current_uri;
+            const page_obj = this._data.current_node;
+            if(page_obj==null){
+                this.set_error(`${page_uri} was removed`);
+                return;
+            }
+            try {
+                const resp = await window.fetch(this.API_URIS.PAGE_RENDERER_FILE(page_obj));
+                this._data.current_html = await resp.text();
+                if(this._uistate.article_view_mode=="raw"){
+                    const resp = await window.fetch(this.API_URIS.PAGE_RAW_FILE(page_obj));
+                    this._data.current_raw_text = await resp.text();
+                }
+            }catch(err){
+                console.error("Error reloading page:",page_uri,err);
+                this.set_error(`Failed to reload ${page_uri}`);
+            }
+        }
+
     //-- Search System -------------------------------------------------------------------------//
 
         async load_search_system(){
             // could make a "search_available" uistate
-            const resp = await window.fetch(this.API_URIS.SEARCH_INDEX_FILE);
+            const root = this._data.root_node;
+            const resp = await window.fetch(this.API_URIS.SEARCH_INDEX_FILE(root?root.search_index_hash:null));
             const resp_obj = await resp.json();
             this.search_index = lunr.Index.load(resp_obj);
             this._is_search_index_loaded = true;
@@ -19,7 +19,8 @@ function main(){
         root_uri: window.$ROOT_URI,
         name: window.$NAME,
         footer_text: window.$FOOTER,
-        home_addr: window.$HOME_ADDR
+        home_addr: window.$HOME_ADDR,
+        live_reload_uri: window.$LIVE_RELOAD_URI
     }
 
     // Make a data manager
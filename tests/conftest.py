@@ -0,0 +1,29 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+from pathlib import Path
+import sys
+# Pytest
+import pytest
+
+# Run against this checkout, whether or not docd is installed
+sys.path.insert(0,str(Path(__file__).resolve().parent.parent))
+
+# Local
+from docd.benchmark import SyntheticRepoSpec, generate_synthetic_repo
+
+
+@pytest.fixture
+def synthetic_repo(tmp_path):
+    # A small generated docs repo, the same every time
+    repo_dir = tmp_path/"repo"
+    generate_synthetic_repo(repo_dir,SyntheticRepoSpec(pages=24,depth=2,fanout=2,page_bytes=600,media_files=3,media_bytes=2048))
+    return repo_dir
+
+
+@pytest.fixture
+def repo_context(synthetic_repo):
+    from docd.cli import DocdRunContext, set_repo_paths, load_config
+    ctx = set_repo_paths(DocdRunContext(),synthetic_repo)
+    return ctx,load_config(ctx.DOCS_CONFIG_FILEPATH)
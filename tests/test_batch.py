@@ -0,0 +1,29 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import shutil
+# Local
+from docd.batch import run_batch, read_repo_list, summary_lines
+
+
+def test_sites_share_the_render_cache_and_a_failure_stops_only_its_site(synthetic_repo, tmp_path):
+    twin = tmp_path/"twin"
+    shutil.copytree(synthetic_repo,twin)
+    list_file = tmp_path/"repos.txt"
+    list_file.write_text(f"# sites\n{tmp_path/'missing'}\n\n{twin}\n")
+    repo_dirs = read_repo_list([synthetic_repo],list_file=list_file)
+    assert repo_dirs == [synthetic_repo,tmp_path/"missing",twin]
+
+    results,cache = run_batch(repo_dirs)
+    first,missing,second = results
+    assert first.error is None and second.error is None
+    assert missing.error is not None and missing.pages is None
+    # The twin's pages all come from what the first site rendered
+    assert first.pages["rendered"] > 0
+    assert (second.pages["rendered"],second.pages["cached"]) == (0,first.pages["rendered"])
+    assert (twin/"_dist"/"index.html").is_file()
+
+    lines = summary_lines(results,cache,1.0)
+    assert lines[-2] == "Batch: 3 sites in 1.00s, 1 failed"
+    assert "FAILED" in lines[2]
@@ -0,0 +1,170 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+from pathlib import Path
+import os
+import json
+# Pytest
+import pytest
+# Local
+from docd.cli import build_all
+
+
+def _statuses(scheduler):
+    return { k:v.status for k,v in scheduler.results.items() }
+
+
+def test_build_all_then_an_unchanged_incremental_build_skips_every_stage(repo_context):
+    ctx,config = repo_context
+    scheduler,pages = build_all(ctx,config)
+    assert set(_statuses(scheduler).values()) == {"ran"}
+    assert pages["rendered"] > 0 and pages["failed"] == 0
+    db = json.loads((ctx.DOCS_DIST_DIRPATH/"_resources"/"pages-database.json").read_text())
+    assert any( e["kind"] == "file" for e in db )
+    # The build manifest is kept out of what gets published
+    assert (ctx.DOCS_DIST_DIRPATH/".docd-cache"/"build-manifest.json").is_file()
+    assert not list((ctx.DOCS_DIST_DIRPATH/"_resources").rglob("build-manifest.json*"))
+
+    scheduler,pages = build_all(ctx,config,incremental=True)
+    assert set(_statuses(scheduler).values()) == {"skipped"}
+    assert pages is None
+
+
+def test_a_full_build_fingerprints_the_sources_from_its_own_walk(repo_context, monkeypatch):
+    import docd.scheduler
+    ctx,config = repo_context
+    walked = []
+    tree_fingerprint = docd.scheduler.tree_fingerprint
+    def spy(root, *args, **kwargs):
+        walked.append(Path(root))
+        return tree_fingerprint(root,*args,**kwargs)
+    monkeypatch.setattr(docd.scheduler,"tree_fingerprint",spy)
+    build_all(ctx,config)
+    assert ctx.DOCS_DOCS_DIRPATH not in walked
+
+    # And it matches the fingerprint the next build checks against
+    scheduler,_ = build_all(ctx,config,incremental=True)
+    assert _statuses(scheduler)["pages"] == "skipped"
+    assert ctx.DOCS_DOCS_DIRPATH in walked
+
+
+def test_an_edited_source_only_reruns_the_stages_reading_it(repo_context):
+    ctx,config = repo_context
+    build_all(ctx,config)
+    source = next(ctx.DOCS_DOCS_DIRPATH.rglob("*.md"))
+    source.write_text(source.read_text()+"\nA new paragraph.\n")
+
+    scheduler,pages = build_all(ctx,config,incremental=True)
+    statuses = _statuses(scheduler)
+    assert (statuses["pages"],statuses["search"],statuses["compress"]) == ("ran","ran","ran")
+    assert (statuses["media"],statuses["spa"]) == ("skipped","skipped")
+    assert pages["rendered"] == 1
+
+
+def test_an_incremental_build_only_reads_the_changed_sources(repo_context, monkeypatch):
+    ctx,config = repo_context
+    build_all(ctx,config)
+    source = next(ctx.DOCS_DOCS_DIRPATH.rglob("*.md"))
+    source.write_text(source.read_text()+"\nA new paragraph.\n")
+
+    reads = []
+    read_bytes = Path.read_bytes
+    def spy(self):
+        if ctx.DOCS_DOCS_DIRPATH in self.parents:
+            reads.append(self)
+        return read_bytes(self)
+    monkeypatch.setattr(Path,"read_bytes",spy)
+    build_all(ctx,config,incremental=True)
+    assert reads == [source]
+
+
+def test_replacing_a_page_drops_its_stale_compressed_copies(repo_context):
+    from docd.publisher import Publisher
+    ctx,config = repo_context
+    build_all(ctx,config)
+    html_dir = ctx.DOCS_DIST_DIRPATH/"_resources"/"pages-html"
+    uncompressed = lambda: [ p for p in html_dir.rglob("*.html") if not p.with_name(p.name+".gz").exists() ]
+    assert uncompressed() == []
+
+    # A page build without the compress stage after it
+    source = next(ctx.DOCS_DOCS_DIRPATH.rglob("*.md"))
+    source.write_text(source.read_text()+"\nA new paragraph.\n")
+    pub = Publisher(ctx,config)
+    try:
+        pub.build_docs(incremental=True,media=False)
+    finally:
+        pub.close()
+    assert len(uncompressed()) == 1
+
+
+def test_a_media_sync_keeps_the_compressed_copies(repo_context):
+    ctx,config = repo_context
+    media_src = ctx.DOCS_DOCS_DIRPATH/"_media"
+    (media_src/"logo.svg").write_text("<svg>"+"<g/>"*200+"</svg>")
+    build_all(ctx,config)
+    compressed = ctx.DOCS_DIST_DIRPATH/"_resources"/"media"/"logo.svg.gz"
+    before = os.stat(compressed)
+
+    (media_src/"other.svg").write_text("<svg/>")
+    scheduler,_ = build_all(ctx,config,incremental=True)
+    assert _statuses(scheduler)["media"] == "ran"
+    assert os.stat(compressed).st_ino == before.st_ino
+
+
+def test_a_failed_build_leaves_the_live_dist_as_it_was(repo_context, monkeypatch):
+    from docd.publisher import Publisher
+    ctx,config = repo_context
+    build_all(ctx,config)
+    index = ctx.DOCS_DIST_DIRPATH/"index.html"
+    before = { p:os.stat(p).st_mtime_ns for p in ctx.DOCS_DIST_DIRPATH.rglob("*") if p.is_file() }
+
+    def fail(self, *args, **kwargs):
+        raise RuntimeError("search failed")
+    monkeypatch.setattr(Publisher,"build_search_index",fail)
+    with pytest.raises(RuntimeError,match="search failed"):
+        build_all(ctx,config)
+
+    after = { p:os.stat(p).st_mtime_ns for p in ctx.DOCS_DIST_DIRPATH.rglob("*") if p.is_file() }
+    assert after == before
+    assert index.is_file()
+    assert not ctx.DOCS_DIST_DIRPATH.with_name(f".{ctx.DOCS_DIST_DIRPATH.name}-staging").exists()
+
+
+def test_a_full_build_with_the_object_store_keeps_unchanged_inodes(repo_context):
+    ctx,config = repo_context
+    config.site.object_store = True
+    build_all(ctx,config)
+    pages = sorted((ctx.DOCS_DIST_DIRPATH/"_resources"/"pages-html").rglob("*.html"))
+    before = { p:os.stat(p) for p in pages }
+
+    # Not incremental, so every page is written again
+    build_all(ctx,config)
+    for p,st in before.items():
+        assert (os.stat(p).st_ino,os.stat(p).st_mtime_ns) == (st.st_ino,st.st_mtime_ns)
+
+
+def test_the_page_database_is_written_once_and_points_at_the_search_index(repo_context, monkeypatch):
+    from docd.publisher import Publisher
+    ctx,config = repo_context
+    writes = []
+    write_page_database = Publisher._write_page_database
+    def spy(self, *args, **kwargs):
+        writes.append(args)
+        return write_page_database(self,*args,**kwargs)
+    monkeypatch.setattr(Publisher,"_write_page_database",spy)
+    build_all(ctx,config)
+    assert len(writes) == 1
+
+    db_file = ctx.DOCS_DIST_DIRPATH/"_resources"/"pages-database.json"
+    db = json.loads(db_file.read_text())
+    index = next((ctx.DOCS_DIST_DIRPATH/"_resources"/"search").glob("serialized-index-*.json"))
+    assert db[0]["search_index_hash"] == index.stem[len("serialized-index-"):]
+
+    # A search build on its own keeps the pages' cache keys
+    pub = Publisher(ctx,config)
+    try:
+        pub.build_search_index()
+    finally:
+        pub.close()
+    assert json.loads(db_file.read_text()) == db
@@ -0,0 +1,36 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Local
+from docd.codepage import CodePageLimits, split_source, code_page_plan, plain_code_html, with_part_navigation
+
+
+def test_sources_split_at_line_breaks_into_parts_of_about_page_bytes():
+    text = "".join( f"line {n}\n" for n in range(100) )
+    parts = split_source(text,100)
+    assert "".join(parts) == text
+    assert all( len(e) <= 100 and e.endswith("\n") for e in parts )
+    assert len(parts) > 1
+    # A line too long to fit is kept whole, and a limit of 0 never splits
+    assert split_source("x"*50+"\nshort\n",10) == ["x"*50+"\n","short\n"]
+    assert split_source(text,0) == [text]
+
+
+def test_the_plan_follows_the_size_limits():
+    limits = CodePageLimits(page_bytes=10,highlight_max_bytes=100,max_bytes=1000)
+    assert code_page_plan(100,limits) == "highlight"
+    assert code_page_plan(101,limits) == "plain"
+    assert code_page_plan(1001,limits) == "too_large"
+    assert code_page_plan(10**9,CodePageLimits(0,0,0)) == "highlight"
+    assert plain_code_html("a < b") == '<div class="codehilite"><pre><span></span><code>a &lt; b</code></pre></div>'
+
+
+def test_parts_link_to_their_neighbours():
+    pages = with_part_navigation(["one","two","three"],lambda k: f"/p/{k}.html")
+    assert len(pages) == 3
+    assert 'href="/p/2.html" data-docd-part="2">next' in pages[0]
+    assert "previous" not in pages[0]
+    assert 'href="/p/1.html" data-docd-part="1">previous' in pages[1]
+    assert "Part 3 of 3" in pages[2] and "next" not in pages[2]
+    # A page in one part is left as it is
+    assert with_part_navigation(["only"],lambda k: "") == ["only"]
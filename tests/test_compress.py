@@ -0,0 +1,64 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import os
+import gzip
+# Local
+from docd.compress import precompress_directory, remove_compressed_copies, available_encodings
+
+
+def _n_encodings():
+    return len(available_encodings())
+
+
+def _tree(tmp_path):
+    root = tmp_path/"_resources"
+    (root/"sub").mkdir(parents=True)
+    (root/"a.html").write_text("<p>a</p>"*50)
+    (root/"sub"/"b.json").write_text("[1,2,3]")
+    (root/"c.png").write_bytes(b"\x89PNG")
+    return root
+
+
+def test_compressible_files_get_copies_with_their_mtime(tmp_path):
+    root = _tree(tmp_path)
+    assert precompress_directory(root) == (2*_n_encodings(),0,0)
+    assert gzip.decompress((root/"a.html.gz").read_bytes()) == (root/"a.html").read_bytes()
+    assert os.stat(root/"sub"/"b.json.gz").st_mtime_ns == os.stat(root/"sub"/"b.json").st_mtime_ns
+    assert not (root/"c.png.gz").exists()
+
+
+def test_current_copies_are_skipped_and_changed_ones_redone(tmp_path):
+    root = _tree(tmp_path)
+    precompress_directory(root)
+    assert precompress_directory(root) == (0,2*_n_encodings(),0)
+
+    (root/"a.html").write_text("<p>new</p>")
+    os.utime(root/"a.html",ns=(0,1_000_000_000))
+    assert precompress_directory(root) == (_n_encodings(),_n_encodings(),0)
+    assert gzip.decompress((root/"a.html.gz").read_bytes()) == b"<p>new</p>"
+
+
+def test_small_files_are_left_alone(tmp_path):
+    root = _tree(tmp_path)
+    assert precompress_directory(root,min_size=100) == (_n_encodings(),0,0)
+    assert not (root/"sub"/"b.json.gz").exists()
+
+
+def test_copies_whose_source_is_gone_are_removed(tmp_path):
+    root = _tree(tmp_path)
+    precompress_directory(root)
+    (root/"sub"/"b.json").unlink()
+    assert precompress_directory(root)[2] == _n_encodings()
+    assert sorted( p.name for p in (root/"sub").iterdir() ) == []
+
+
+def test_removing_the_copies_of_a_file_before_it_is_replaced(tmp_path):
+    root = _tree(tmp_path)
+    precompress_directory(root)
+    remove_compressed_copies(root/"a.html")
+    assert (root/"a.html").is_file()
+    assert not (root/"a.html.gz").exists() and not (root/"a.html.br").exists()
+    # Nothing to remove is fine too
+    remove_compressed_copies(root/"c.png")
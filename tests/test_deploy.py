@@ -0,0 +1,76 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import os
+import shutil
+# Pytest
+import pytest
+# Local
+from docd.deploy import DeployTarget, build_local_manifest, deploy_release, DEPLOY_MANIFEST_NAME
+
+pytestmark = pytest.mark.skipif(shutil.which("tar") is None,reason="release deploys need tar")
+
+
+def _dist(tmp_path):
+    dist = tmp_path/"_dist"
+    (dist/"_resources").mkdir(parents=True)
+    (dist/"index.html").write_text("index")
+    (dist/"_resources"/"a.html").write_text("a")
+    (dist/".docd-cache").mkdir()
+    (dist/".docd-cache"/"build-stages.json").write_text("{}")
+    return dist
+
+
+def _releases(target):
+    return sorted(os.listdir(target.releases_dir))
+
+
+def test_the_local_manifest_hashes_what_gets_deployed(tmp_path):
+    dist = _dist(tmp_path)
+    cache_file = tmp_path/"hashes.json"
+    manifest = build_local_manifest(dist,cache_file=cache_file)
+    assert sorted(manifest["files"]) == ["_resources/a.html","index.html"]
+    # The same again from the hash cache
+    assert build_local_manifest(dist,cache_file=cache_file) == manifest
+    (dist/"index.html").write_text("changed")
+    assert build_local_manifest(dist,cache_file=cache_file)["content_hash"] != manifest["content_hash"]
+
+
+def test_a_release_sends_only_changes_and_becomes_live(tmp_path):
+    dist = _dist(tmp_path)
+    target = DeployTarget(str(tmp_path/"site"/"docs"))
+    first = deploy_release(dist,target)
+    live = tmp_path/"site"/"docs"
+    assert os.path.islink(live)
+    assert (live/"index.html").read_text() == "index"
+    assert (live/DEPLOY_MANIFEST_NAME).is_file()
+    assert not (live/".docd-cache").exists()
+
+    # Nothing changed, so nothing new
+    assert deploy_release(dist,target) == first
+    assert _releases(target) == [first]
+
+    (dist/"_resources"/"a.html").unlink()
+    (dist/"_resources"/"b.html").write_text("b")
+    second = deploy_release(dist,target)
+    assert second != first
+    assert not (live/"_resources"/"a.html").exists()
+    assert (live/"_resources"/"b.html").read_text() == "b"
+    # Unchanged files are hardlinked from the last release
+    assert os.path.samefile(live/"index.html",os.path.join(target.releases_dir,first,"index.html"))
+
+
+def test_a_lower_keep_prunes_even_when_nothing_changed(tmp_path, monkeypatch):
+    dist = _dist(tmp_path)
+    target = DeployTarget(str(tmp_path/"site"/"docs"))
+    # Release ids are stamped to the second, so give each its own
+    stamps = iter(range(10))
+    monkeypatch.setattr("docd.deploy._make_release_id",lambda manifest: f"2026010{next(stamps)}-{manifest['content_hash']}")
+    for n in range(3):
+        (dist/"index.html").write_text(f"index {n}")
+        last = deploy_release(dist,target,keep=3)
+    assert len(_releases(target)) == 3
+
+    assert deploy_release(dist,target,keep=1) == last
+    assert _releases(target) == [last]
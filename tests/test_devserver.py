@@ -0,0 +1,96 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import os
+import asyncio
+# Pytest
+import pytest
+# Tornado
+import tornado.httpclient
+import tornado.httpserver
+import tornado.testing
+# Local
+import docd.devserver
+from docd.devserver import DevPageRenderer, DocdDevServer
+
+
+@pytest.fixture
+def renderer(repo_context):
+    from docd.publisher import Publisher
+    ctx,config = repo_context
+    pub = Publisher(ctx,config)
+    renderer = DevPageRenderer(pub)
+    yield renderer
+    renderer.executor.shutdown()
+    pub.close()
+
+
+def _markdown_page(renderer):
+    renderer._refresh_tree()
+    return next( e for e in renderer._nodes_by_uri.values() if e.source_path.endswith(".md") )
+
+
+def test_pages_render_on_demand_and_are_cached_until_the_source_changes(renderer, monkeypatch):
+    node = _markdown_page(renderer)
+    rendered = []
+    render_source_parts = docd.devserver.render_source_parts
+    def spy(*args):
+        rendered.append(args)
+        return render_source_parts(*args)
+    monkeypatch.setattr(docd.devserver,"render_source_parts",spy)
+
+    html,etag = renderer._load_page(node.uri,"html")
+    assert "<" in html and etag.startswith('"')
+    assert renderer._load_page(node.uri,"html") == (html,etag)
+    assert len(rendered) == 1
+
+    # A new mtime is a new cache key
+    source = renderer.publisher.SOURCE_ROOT/node.source_path
+    source.write_text(source.read_text()+"\nAn edit.\n")
+    st = source.stat()
+    os.utime(source,ns=(st.st_atime_ns,st.st_mtime_ns+1_000_000))
+    edited = renderer._load_page(node.uri,"html")
+    assert len(rendered) == 2
+    assert "An edit." in edited[0] and edited[1] != etag
+
+    # The raw text is served as the source's bytes, and unknown pages as None
+    assert renderer._load_page(node.uri,"txt")[0] == source.read_bytes()
+    assert renderer._load_page("no/such/page","html") is None
+
+
+def test_the_spa_shell_answers_a_matching_etag_with_a_304(tmp_path):
+    static = tmp_path/"static"
+    static.mkdir()
+    (static/"index-1.js").write_text("")
+    (static/"index-1.css").write_text("")
+    server = DocdDevServer(
+        SPA_TEMPLATE = "<html><head></head><body>__JS_FILE__ __CSS_FILE__</body></html>",
+        FILE_PATHS = dict(_resources=tmp_path/"_resources",static=static),
+        ROOT_URI = "/docs"
+    )
+
+    async def main():
+        sock,port = tornado.testing.bind_unused_port()
+        http_server = tornado.httpserver.HTTPServer(server)
+        http_server.add_sockets([sock])
+        client = tornado.httpclient.AsyncHTTPClient()
+        async def get(etag=None):
+            headers = {} if etag is None else {"If-None-Match":etag}
+            return await client.fetch(f"http://127.0.0.1:{port}/docs/some/page",headers=headers,raise_error=False)
+        try:
+            first = await get()
+            again = await get(first.headers["Etag"])
+            # A new bundle is a new shell
+            (static/"index-1.js").rename(static/"index-2.js")
+            os.utime(static,ns=(0,os.stat(static).st_mtime_ns+1_000_000))
+            rebuilt = await get(first.headers["Etag"])
+        finally:
+            http_server.stop()
+        return first,again,rebuilt
+
+    first,again,rebuilt = asyncio.run(main())
+    assert first.code == 200 and b"/docs/_resources/static/index-1.js" in first.body
+    assert b"$LIVE_RELOAD_URI" in first.body
+    assert (again.code,again.body) == (304,b"")
+    assert rebuilt.code == 200 and b"index-2.js" in rebuilt.body
@@ -0,0 +1,127 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import os
+import re
+# Local
+from docd.filtercheck import FilterCheckCache, make_trie_pattern, scan_text, scan_directory, _cache_key
+
+
+def _matcher(phrases, flags=re.IGNORECASE):
+    return re.compile(make_trie_pattern(phrases),flags)
+
+
+#-- Matching ------------------------------------------------------------------#
+
+def test_the_trie_matches_exactly_the_phrases():
+    phrases = ["cat","car","cart","dog"]
+    matcher = _matcher(phrases,0)
+    for phrase in phrases:
+        assert matcher.fullmatch(phrase)
+    for other in ["ca","carts","do","cat "]:
+        assert not matcher.fullmatch(other)
+    # The longest phrase at a position wins, like an alternation of them all
+    assert matcher.search("a cartwheel").group(0) == "cart"
+
+
+def test_phrases_are_literal_text():
+    matcher = _matcher(["a.b","(x)","c*"])
+    assert matcher.search("see a.b here")
+    assert not matcher.search("see axb here")
+    assert matcher.search("call (x) now")
+    assert not matcher.search("call x now")
+    assert not matcher.search("ccc")
+
+
+def test_case_is_ignored_unless_asked_for():
+    assert _matcher(["Secret"]).search("a SECRET word")
+    assert not _matcher(["Secret"],0).search("a SECRET word")
+    assert _matcher(["Secret"],0).search("a Secret word")
+
+
+def test_scan_text_gives_each_hit_line_once_with_its_number():
+    text = "one\ntwo secret secret\nthree\nsecret four\n\nfive"
+    assert scan_text(_matcher(["secret"]),text) == [[2,"two secret secret"],[4,"secret four"]]
+    assert scan_text(_matcher(["five"]),text) == [[6,"five"]]
+    assert scan_text(_matcher(["six"]),text) == []
+
+
+#-- Scanning and caching ------------------------------------------------------#
+
+def _docs(tmp_path):
+    docs = tmp_path/"docs"
+    (docs/"sub").mkdir(parents=True)
+    (docs/"a.md").write_text("# A\nnothing here\n")
+    (docs/"sub"/"b.md").write_text("# B\nthe Secret plan\n")
+    (docs/"c.bin").write_bytes(b"\0\1secret\2")
+    return docs
+
+
+def test_scan_directory_reports_only_files_with_hits(tmp_path):
+    docs = _docs(tmp_path)
+    matched = scan_directory(docs,["secret"])
+    assert sorted(matched) == ["c.bin","sub/b.md"]
+    assert matched["sub/b.md"]["lines"] == [[2,"the Secret plan"]]
+    assert not matched["sub/b.md"]["binary"]
+    assert matched["c.bin"]["binary"]
+    assert scan_directory(docs,["secret"],case_sensitive=True).keys() == {"c.bin"}
+
+
+def test_the_cache_skips_unchanged_files_while_the_phrases_hold(tmp_path, monkeypatch):
+    docs = _docs(tmp_path)
+    cache_file = tmp_path/"filter-check.json"
+    key = _cache_key(["secret"],False)
+    cache = FilterCheckCache.load(cache_file,key)
+    first = scan_directory(docs,["secret"],cache=cache)
+    cache.save()
+
+    # Nothing is read when every stat matches
+    scanned = []
+    def scan_batch(phrases, case_sensitive, batch):
+        scanned.extend(batch)
+        return []
+    monkeypatch.setattr("docd.filtercheck._scan_batch",scan_batch)
+    cache = FilterCheckCache.load(cache_file,key)
+    assert scan_directory(docs,["secret"],cache=cache) == first
+    assert scanned == []
+    monkeypatch.undo()
+
+    # Other phrases can't use the results
+    assert FilterCheckCache.load(cache_file,_cache_key(["plan"],False)).entries == {}
+    assert FilterCheckCache.load(cache_file,_cache_key(["secret"],True)).entries == {}
+
+
+def test_an_edited_file_is_scanned_again(tmp_path):
+    docs = _docs(tmp_path)
+    cache = FilterCheckCache(tmp_path/"filter-check.json",_cache_key(["secret"],False))
+    scan_directory(docs,["secret"],cache=cache)
+    (docs/"a.md").write_text("# A\nsecret after all\n")
+    matched = scan_directory(docs,["secret"],cache=cache)
+    assert matched["a.md"]["lines"] == [[2,"secret after all"]]
+
+
+def test_binary_files_are_scanned_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr("docd.filtercheck.SCAN_CHUNK_BYTES",16)
+    docs = tmp_path/"docs"
+    docs.mkdir()
+    # Each phrase runs over a chunk boundary
+    (docs/"i.bin").write_bytes(b"\0"+b"x"*12+b"secret"+b"y"*10+b"PLAN"+b"z"*40)
+    (docs/"j.bin").write_bytes(b"\0"+b"x"*100)
+    matched = scan_directory(docs,["secret","plan","absent"])
+    assert list(matched) == ["i.bin"]
+    assert matched["i.bin"]["binary"]
+    assert sorted( line for _,line in matched["i.bin"]["lines"] ) == ["PLAN","secret"]
+
+
+def test_a_new_mtime_alone_is_hashed_but_not_scanned(tmp_path, monkeypatch):
+    docs = _docs(tmp_path)
+    cache = FilterCheckCache(tmp_path/"filter-check.json",_cache_key(["secret"],False))
+    first = scan_directory(docs,["secret"],cache=cache)
+    st = (docs/"sub"/"b.md").stat()
+    os.utime(docs/"sub"/"b.md",ns=(st.st_atime_ns,st.st_mtime_ns+1))
+
+    monkeypatch.setattr("docd.filtercheck.scan_text",None)
+    matched = scan_directory(docs,["secret"],cache=cache)
+    assert { k:v["lines"] for k,v in matched.items() } == { k:v["lines"] for k,v in first.items() }
+    assert cache.entries["sub/b.md"]["mtime_ns"] == st.st_mtime_ns+1
@@ -0,0 +1,79 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import os
+# Local
+from docd.manifest import BuildManifest, content_hash
+
+
+def _setup(tmp_path):
+    source = tmp_path/"docs"/"a.md"
+    source.parent.mkdir()
+    source.write_text("# A\n")
+    dest = tmp_path/"_resources"
+    (dest/"pages-html").mkdir(parents=True)
+    (dest/"pages-html"/"a.html").write_text("<h1>A</h1>")
+    return source,dest
+
+
+def _record(manifest, source, renderer="r1", outputs=("pages-html/a.html",)):
+    return manifest.make_record("a",source,"a.md",renderer=renderer,outputs=outputs)
+
+
+def test_an_unchanged_source_is_current_after_a_reload(tmp_path):
+    source,dest = _setup(tmp_path)
+    manifest = BuildManifest(tmp_path/"manifest.json")
+    record,data = _record(manifest,source)
+    assert data == b"# A\n"
+    manifest.entries = { "a":record }
+    manifest.save()
+
+    manifest = BuildManifest.load(tmp_path/"manifest.json")
+    record,data = _record(manifest,source)
+    # The stat matched, so the source wasn't read again
+    assert data is None
+    assert manifest.is_current("a",record,dest)
+
+
+def test_changes_to_the_source_renderer_or_outputs_are_not_current(tmp_path):
+    source,dest = _setup(tmp_path)
+    manifest = BuildManifest(tmp_path/"manifest.json")
+    manifest.entries = { "a":_record(manifest,source)[0] }
+
+    assert not manifest.is_current("a",_record(manifest,source,renderer="r2")[0],dest)
+
+    (dest/"pages-html"/"a.html").unlink()
+    assert not manifest.is_current("a",_record(manifest,source)[0],dest)
+    (dest/"pages-html"/"a.html").write_text("<h1>A</h1>")
+
+    source.write_text("# B\n")
+    st = source.stat()
+    os.utime(source,ns=(st.st_atime_ns,st.st_mtime_ns+1))
+    record,data = _record(manifest,source)
+    assert data == b"# B\n"
+    assert not manifest.is_current("a",record,dest)
+
+
+def test_stale_outputs_are_those_nothing_produces_now(tmp_path):
+    manifest = BuildManifest(tmp_path/"manifest.json",entries={
+        "a": { "outputs":["pages-html/a.html","pages-txt/a.txt"] },
+        "b": { "outputs":["pages-html/b.html","pages-txt/b.txt","pages-html-parts/b/2.html"] }
+    })
+    new_entries = { "b": { "outputs":["pages-html/b.html","pages-txt/b.txt"] } }
+    assert manifest.stale_outputs(new_entries) == ["pages-html-parts/b/2.html","pages-html/a.html","pages-txt/a.txt"]
+
+
+def test_content_hash_follows_the_source_and_renderer():
+    a = content_hash({ "sha256":"00", "renderer":"r1" })
+    assert a == content_hash({ "sha256":"00", "renderer":"r1" })
+    assert a != content_hash({ "sha256":"00", "renderer":"r2" })
+    assert content_hash({ "sha256":None, "renderer":"r1" }) is None
+
+
+def test_an_unreadable_or_old_manifest_starts_empty(tmp_path):
+    filepath = tmp_path/"manifest.json"
+    filepath.write_text("{ not json")
+    assert BuildManifest.load(filepath).entries == {}
+    filepath.write_text('{"version":0,"pages":{"a":{}}}')
+    assert BuildManifest.load(filepath).entries == {}
@@ -0,0 +1,62 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import os
+import hashlib
+# Local
+from docd.objectstore import ObjectStore, OBJECTS_DIRNAME
+
+
+def _store(tmp_path):
+    dist = tmp_path/"_dist"
+    dist.mkdir()
+    return dist,ObjectStore(dist/OBJECTS_DIRNAME)
+
+
+def test_identical_outputs_share_one_object(tmp_path):
+    dist,store = _store(tmp_path)
+    assert store.write_bytes(dist/"a.html",b"same") == "linked"
+    assert store.write_bytes(dist/"sub"/"b.html",b"same") == "linked"
+    assert os.path.samefile(dist/"a.html",dist/"sub"/"b.html")
+    obj = store.object_path(hashlib.sha256(b"same").hexdigest())
+    assert os.path.samefile(obj,dist/"a.html")
+    assert (store.stats.written,store.stats.reused) == (1,1)
+
+
+def test_an_unchanged_path_keeps_its_inode_and_mtime(tmp_path):
+    dist,store = _store(tmp_path)
+    store.write_bytes(dist/"a.html",b"one")
+    before = os.stat(dist/"a.html")
+    assert store.write_bytes(dist/"a.html",b"one") == "unchanged"
+    after = os.stat(dist/"a.html")
+    assert (after.st_ino,after.st_mtime_ns) == (before.st_ino,before.st_mtime_ns)
+
+    store.write_bytes(dist/"a.html",b"two")
+    assert (dist/"a.html").read_bytes() == b"two"
+    assert os.stat(dist/"a.html").st_ino != before.st_ino
+
+
+def test_files_are_copied_in_never_linked(tmp_path):
+    dist,store = _store(tmp_path)
+    source = tmp_path/"source.png"
+    source.write_bytes(b"image")
+    store.write_file(source,dist/"media"/"i.png")
+    assert (dist/"media"/"i.png").read_bytes() == b"image"
+    assert not os.path.samefile(source,dist/"media"/"i.png")
+    # Editing the source in place can't change the object
+    with source.open("r+b") as f:
+        f.write(b"IMAGE")
+    assert (dist/"media"/"i.png").read_bytes() == b"image"
+
+
+def test_garbage_is_what_nothing_in_the_tree_links_to(tmp_path):
+    dist,store = _store(tmp_path)
+    store.write_bytes(dist/"a.html",b"keep")
+    store.write_bytes(dist/"b.html",b"drop")
+    # A link from outside the tree doesn't keep an object
+    os.link(dist/"b.html",tmp_path/"outside.html")
+    (dist/"b.html").unlink()
+    assert store.collect_garbage(dist) == 1
+    assert (dist/"a.html").read_bytes() == b"keep"
+    assert sorted( p.name for p in store.root.rglob("*") if p.is_file() ) == [hashlib.sha256(b"keep").hexdigest()[2:]]
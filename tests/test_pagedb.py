@@ -0,0 +1,81 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import json
+# Local
+from docd.nodetable import NodeTable
+from docd.pagedb import iter_single_database, shard_page_database, database_root_node
+
+
+MTIME_NS = 1_700_000_000_000_000_000
+
+
+def _table():
+    # A small tree, two directories deep
+    table = NodeTable()
+    table.append("directory",".",None,0,".","docs",None,MTIME_NS)
+    for n,uri in enumerate(("index","a","a/one","a/two","a/b","a/b/three","a/b/four","c","c/five")):
+        parent_uri = uri.rpartition("/")[0] or "."
+        depth = uri.count("/")
+        if uri in ("a","a/b","c"):
+            table.append("directory",uri,parent_uri,depth+1,uri,uri.rpartition("/")[2],None,MTIME_NS)
+        else:
+            node = table.append("file",uri,parent_uri,depth,f"{uri}.md",uri.rpartition("/")[2],".md",MTIME_NS)
+            # Some pages have a content hash and some don't
+            if n%2 == 0:
+                node.content_hash = f"{n:016x}"
+    return table
+
+
+def _unshard(index, shards):
+    # Rebuild the single file layout from the root index and its shards
+    nodes = []
+    def add(node):
+        children_hash = node.pop("children_hash",None)
+        nodes.append(node)
+        if children_hash is not None:
+            for child in json.loads(shards[children_hash]):
+                add(child)
+    root,*children = json.loads(index)["nodes"]
+    nodes.append(root)
+    for child in children:
+        add(child)
+    return nodes
+
+
+def test_row_json_matches_dumping_a_dict():
+    table = NodeTable()
+    table.append("directory",".",None,0,".","docs",None,1_700_000_000_123_456_789)
+    node = table.append("file","a/b \"c\"","a",2,"a/b \"c\".md","b \"c\"",".md",1_700_000_000_000_000_000)
+    node.content_hash = "00112233aabbccdd"
+    row = json.loads(node.to_json((("extra",[1,"x"]),)))
+    assert row["uri"] == 'a/b "c"'
+    assert row["parent_uri"] == "a"
+    assert row["content_hash"] == "00112233aabbccdd"
+    assert row["extra"] == [1,"x"]
+    assert node.to_json() == json.dumps({ k:v for k,v in row.items() if k != "extra" },separators=(",",":"))
+    assert table.find("a/b \"c\"").row == 1
+    assert table.find("missing") is None
+
+
+def test_sharded_database_matches_the_single_file():
+    table = _table()
+    extra = (("search_index_hash","abcd"),)
+    single = json.loads("".join(iter_single_database(table,extra)))
+    index,shards = shard_page_database(table,extra)
+    assert _unshard(index,shards) == single
+    assert database_root_node(single)["search_index_hash"] == "abcd"
+    assert database_root_node(json.loads(index))["search_index_hash"] == "abcd"
+
+
+def test_a_change_only_renames_the_shards_up_to_the_root():
+    table = _table()
+    _,before = shard_page_database(table)
+    deepest = max(( e for e in table if e.kind == "file" ),key=lambda e: e.depth)
+    deepest.content_hash = "ffffffffffffffff"
+    _,after = shard_page_database(table)
+    # One shard per directory from the page's parent up to the root's children
+    changed = set(before) - set(after)
+    assert len(changed) == deepest.depth
+    assert len(before) == len(after)
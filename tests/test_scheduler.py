@@ -0,0 +1,199 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import os
+# Pytest
+import pytest
+# Local
+from docd.scheduler import Stage, StageScheduler, stage_dependencies, staged_directory
+
+
+def _writer(root, relpath, content, calls=None, name=None):
+    # A stage body that writes one file and records that it ran
+    def run():
+        if calls is not None:
+            calls.append(name)
+        path = root/relpath
+        path.parent.mkdir(parents=True,exist_ok=True)
+        path.write_text(content)
+    return run
+
+
+def _stages(root, calls, keys):
+    return [
+        Stage("a",_writer(root,"a/out.txt","a",calls,"a"),outputs=("a",),key=lambda: keys["a"]),
+        Stage("b",_writer(root,"b/out.txt","b",calls,"b"),inputs=("a/out.txt",),outputs=("b",),key=lambda: keys["b"]),
+        Stage("c",_writer(root,"c.txt","c",calls,"c"),outputs=("c.txt",),key=lambda: keys["c"])
+    ]
+
+
+#-- Dependencies --------------------------------------------------------------#
+
+def test_dependencies_follow_paths_inside_and_above_outputs():
+    stages = [
+        Stage("pages",None,outputs=("_resources/pages-html",)),
+        Stage("search",None,inputs=("_resources/pages-html/a.html",)),
+        Stage("compress",None,inputs=("_resources",)),
+        Stage("spa",None,outputs=("index.html",))
+    ]
+    deps = stage_dependencies(stages)
+    assert deps == { "pages":set(), "search":{"pages"}, "compress":{"pages"}, "spa":set() }
+
+
+#-- Running -------------------------------------------------------------------#
+
+def test_stages_are_skipped_while_their_keys_are_unchanged(tmp_path):
+    stamp_file = tmp_path/"stamps.json"
+    keys = { "a":1, "b":1, "c":1 }
+
+    calls = []
+    StageScheduler(_stages(tmp_path,calls,keys),tmp_path,stamp_file=stamp_file).run()
+    assert sorted(calls) == ["a","b","c"]
+
+    calls = []
+    scheduler = StageScheduler(_stages(tmp_path,calls,keys),tmp_path,stamp_file=stamp_file)
+    results = scheduler.run()
+    assert calls == []
+    assert { k:v.status for k,v in results.items() } == { "a":"skipped", "b":"skipped", "c":"skipped" }
+
+
+def test_a_changed_key_reruns_the_stage_and_what_depends_on_it(tmp_path):
+    stamp_file = tmp_path/"stamps.json"
+    keys = { "a":1, "b":1, "c":1 }
+    StageScheduler(_stages(tmp_path,[],keys),tmp_path,stamp_file=stamp_file).run()
+
+    keys["a"] = 2
+    calls = []
+    results = StageScheduler(_stages(tmp_path,calls,keys),tmp_path,stamp_file=stamp_file).run()
+    assert sorted(calls) == ["a","b"]
+    assert results["c"].status == "skipped"
+
+
+def test_a_stage_with_missing_outputs_runs_again(tmp_path):
+    stamp_file = tmp_path/"stamps.json"
+    keys = { "a":1, "b":1, "c":1 }
+    StageScheduler(_stages(tmp_path,[],keys),tmp_path,stamp_file=stamp_file).run()
+
+    (tmp_path/"c.txt").unlink()
+    calls = []
+    StageScheduler(_stages(tmp_path,calls,keys),tmp_path,stamp_file=stamp_file).run()
+    assert calls == ["c"]
+
+
+def test_force_runs_every_stage(tmp_path):
+    stamp_file = tmp_path/"stamps.json"
+    keys = { "a":1, "b":1, "c":1 }
+    StageScheduler(_stages(tmp_path,[],keys),tmp_path,stamp_file=stamp_file).run()
+
+    calls = []
+    StageScheduler(_stages(tmp_path,calls,keys),tmp_path,stamp_file=stamp_file,force=True).run()
+    assert sorted(calls) == ["a","b","c"]
+
+
+def test_keys_are_only_taken_when_a_stage_could_be_skipped_or_once_it_ran(tmp_path):
+    stamp_file = tmp_path/"stamps.json"
+    events = []
+    def stage(name, inputs=()):
+        def run():
+            events.append(f"run {name}")
+            (tmp_path/name).write_text(name)
+        def key():
+            events.append(f"key {name}")
+            return 1
+        return Stage(name,run,inputs=inputs,outputs=(name,),key=key)
+    stages = lambda: [ stage("a"), stage("b",inputs=("a",)) ]
+
+    # Nothing is stamped yet, so each key is taken after its stage ran
+    StageScheduler(stages(),tmp_path,stamp_file=stamp_file).run()
+    assert events == ["run a","key a","run b","key b"]
+
+    # Once stamped, a key is taken to check for a skip and reused for the stamp
+    events.clear()
+    StageScheduler(stages(),tmp_path,stamp_file=stamp_file).run()
+    assert events == ["key a","key b"]
+
+    # A stage whose dependency ran can't be skipped, so its key waits for it to run
+    events.clear()
+    (tmp_path/"a").unlink()
+    StageScheduler(stages(),tmp_path,stamp_file=stamp_file).run()
+    assert events == ["run a","key a","run b","key b"]
+
+
+def test_a_failed_stage_raises_stops_its_dependents_and_saves_no_stamps(tmp_path):
+    stamp_file = tmp_path/"stamps.json"
+    calls = []
+    def fail():
+        calls.append("a")
+        raise RuntimeError("broken")
+    stages = [
+        Stage("a",fail,outputs=("a",),key=lambda: 1),
+        Stage("b",_writer(tmp_path,"b/out.txt","b",calls,"b"),inputs=("a",),outputs=("b",),key=lambda: 1)
+    ]
+    scheduler = StageScheduler(stages,tmp_path,stamp_file=stamp_file)
+    with pytest.raises(RuntimeError,match="broken"):
+        scheduler.run()
+    assert calls == ["a"]
+    assert scheduler.results["a"].status == "failed"
+    assert scheduler.results["b"].status == "pending"
+    assert not stamp_file.exists()
+
+
+def test_critical_path_follows_the_longest_chain(tmp_path):
+    keys = { "a":1, "b":1, "c":1 }
+    scheduler = StageScheduler(_stages(tmp_path,[],keys),tmp_path)
+    scheduler.run()
+    # Fix the times so the chain a -> b is the longest
+    for name,(start,end) in { "a":(0.0,1.0), "b":(1.0,3.0), "c":(0.0,2.5) }.items():
+        scheduler.results[name].start,scheduler.results[name].end = start,end
+    names,seconds = scheduler.critical_path()
+    assert names == ["a","b"]
+    assert seconds == pytest.approx(3.0)
+
+
+#-- Staging -------------------------------------------------------------------#
+
+def _make_target(tmp_path):
+    target = tmp_path/"_dist"
+    (target/"sub").mkdir(parents=True)
+    (target/"sub"/"page.html").write_text("old")
+    (target/"keep.txt").write_text("keep")
+    return target
+
+
+def test_staging_is_swapped_in_on_success(tmp_path):
+    target = _make_target(tmp_path)
+    with staged_directory(target) as staging:
+        assert (staging/"keep.txt").read_text() == "keep"
+        # Built by replacing, never writing over, the hardlinked files
+        (staging/"sub"/"page.html").unlink()
+        (staging/"sub"/"page.html").write_text("new")
+    assert (target/"sub"/"page.html").read_text() == "new"
+    assert (target/"keep.txt").read_text() == "keep"
+    assert not staging.exists()
+
+
+def test_staging_is_thrown_away_on_failure(tmp_path):
+    target = _make_target(tmp_path)
+    before = os.stat(target/"keep.txt")
+    with pytest.raises(RuntimeError):
+        with staged_directory(target) as staging:
+            (staging/"sub"/"page.html").unlink()
+            (staging/"sub"/"page.html").write_text("new")
+            (staging/"extra.txt").write_text("extra")
+            raise RuntimeError("build failed")
+    assert (target/"sub"/"page.html").read_text() == "old"
+    assert not (target/"extra.txt").exists()
+    assert os.stat(target/"keep.txt").st_mtime_ns == before.st_mtime_ns
+    assert not staging.exists()
+
+
+def test_staging_without_keep_starts_empty_but_for_the_seeds(tmp_path):
+    target = _make_target(tmp_path)
+    (target/".objects"/"ab").mkdir(parents=True)
+    (target/".objects"/"ab"/"cdef").write_text("object")
+    with staged_directory(target,keep=False,seed=(".objects",)) as staging:
+        assert sorted( e.name for e in staging.iterdir() ) == [".objects"]
+        assert os.path.samefile(staging/".objects"/"ab"/"cdef",target/".objects"/"ab"/"cdef")
+    assert not (target/"keep.txt").exists()
+    assert (target/".objects"/"ab"/"cdef").read_text() == "object"
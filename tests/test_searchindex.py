@@ -0,0 +1,57 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import json
+import random
+# Local
+from docd.renderpool import RenderPool
+from docd.searchindex import SearchAnalysisCache, build_search_index, verify_search_index
+
+
+WORDS = "docs build page index search render source tree cache table node shard query branch merge".split()
+
+
+def _documents(n=40, seed=0):
+    rng = random.Random(seed)
+    words = lambda k: " ".join( rng.choice(WORDS) for _ in range(k) )
+    return [ { "path":f"page-{i}", "title":words(3), "headings":words(5), "body":words(60), "code":words(8) }
+             for i in range(n) ]
+
+
+def _serialized(index):
+    index = dict(index)
+    index.pop("docd_index_version")
+    return json.dumps(index,sort_keys=True)
+
+
+def test_a_serial_build_matches_lunr(tmp_path):
+    documents = _documents()
+    index,n_analyzed = build_search_index(documents,SearchAnalysisCache(tmp_path/"cache.json"))
+    assert n_analyzed == len(documents)
+    assert verify_search_index(documents,index) == []
+
+
+def test_a_parallel_build_merges_into_the_serial_index(tmp_path):
+    documents = _documents()
+    serial,_ = build_search_index(documents,SearchAnalysisCache(tmp_path/"serial.json"))
+    with RenderPool(2) as pool:
+        parallel,_ = build_search_index(documents,SearchAnalysisCache(tmp_path/"parallel.json"),pool=pool)
+    assert _serialized(parallel) == _serialized(serial)
+
+
+def test_cached_analyses_give_the_same_index(tmp_path):
+    documents = _documents()
+    cache = SearchAnalysisCache(tmp_path/"cache.json")
+    first,_ = build_search_index(documents,cache)
+    cache.save()
+
+    # Change one document, and drop another
+    documents[3] = dict(documents[3],body="merge merge merge")
+    del documents[7]
+    cache = SearchAnalysisCache.load(tmp_path/"cache.json")
+    second,n_analyzed = build_search_index(documents,cache)
+    assert n_analyzed == 1
+    assert sorted(cache.entries) == sorted( e["path"] for e in documents )
+    assert verify_search_index(documents,second) == []
+    assert _serialized(second) != _serialized(first)
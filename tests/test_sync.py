@@ -0,0 +1,139 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import os
+# Local
+from docd.utils.sync import sync_directory
+
+
+def _write(path, content, mtime=None):
+    path.parent.mkdir(parents=True,exist_ok=True)
+    path.write_text(content)
+    if mtime is not None:
+        os.utime(path,(mtime,mtime))
+    return path
+
+
+def _tree(root):
+    return { p.relative_to(root).as_posix():p.read_text() for p in sorted(root.rglob("*")) if p.is_file() }
+
+
+def test_copies_a_new_tree(tmp_path):
+    src,dst = tmp_path/"src",tmp_path/"dst"
+    _write(src/"a.txt","a")
+    _write(src/"sub"/"b.txt","b")
+    result = sync_directory(src,dst)
+    assert _tree(dst) == _tree(src)
+    assert (result.copied,result.unchanged,result.removed) == (2,0,0)
+    assert os.stat(dst/"a.txt").st_mtime_ns == os.stat(src/"a.txt").st_mtime_ns
+
+
+def test_a_second_sync_leaves_everything_unchanged(tmp_path):
+    src,dst = tmp_path/"src",tmp_path/"dst"
+    _write(src/"a.txt","a")
+    _write(src/"sub"/"b.txt","b")
+    sync_directory(src,dst)
+    inode = os.stat(dst/"a.txt").st_ino
+    result = sync_directory(src,dst)
+    assert (result.copied,result.unchanged) == (0,2)
+    assert os.stat(dst/"a.txt").st_ino == inode
+
+
+def test_delete_removes_only_what_the_source_lacks(tmp_path):
+    src,dst = tmp_path/"src",tmp_path/"dst"
+    _write(src/"a.txt","a")
+    sync_directory(src,dst)
+    _write(dst/"stale.txt","stale")
+    _write(dst/"old"/"c.txt","c")
+    _write(dst/"kept.log","log")
+
+    assert sync_directory(src,dst).removed == 0
+    assert (dst/"stale.txt").exists()
+
+    result = sync_directory(src,dst,delete=True,exclude=("*.log",))
+    assert result.removed == 2
+    assert sorted(_tree(dst)) == ["a.txt","kept.log"]
+
+
+def test_delete_keeps_suffixed_copies_of_source_files(tmp_path):
+    src,dst = tmp_path/"src",tmp_path/"dst"
+    _write(src/"a.svg","a")
+    sync_directory(src,dst)
+    _write(dst/"a.svg.gz","compressed")
+    _write(dst/"gone.svg.gz","compressed")
+
+    result = sync_directory(src,dst,delete=True,keep_suffixes=(".gz",))
+    assert result.removed == 1
+    assert sorted(_tree(dst)) == ["a.svg","a.svg.gz"]
+
+
+def test_changed_contents_are_copied(tmp_path):
+    src,dst = tmp_path/"src",tmp_path/"dst"
+    _write(src/"a.txt","one",mtime=1_000_000)
+    sync_directory(src,dst)
+    _write(src/"a.txt","two",mtime=2_000_000)
+    result = sync_directory(src,dst)
+    assert result.copied == 1
+    assert (dst/"a.txt").read_text() == "two"
+
+
+def test_same_contents_with_a_new_mtime_only_fix_the_mtime(tmp_path):
+    src,dst = tmp_path/"src",tmp_path/"dst"
+    _write(src/"a.txt","same",mtime=1_000_000)
+    _write(dst/"a.txt","same",mtime=2_000_000)
+    result = sync_directory(src,dst)
+    assert (result.copied,result.unchanged) == (0,1)
+    assert os.stat(dst/"a.txt").st_mtime == 1_000_000
+
+
+def test_fixing_an_mtime_never_touches_other_links(tmp_path):
+    # Like a staging copy of _dist, where the destination is a hardlink to a live file
+    src,dst,live = tmp_path/"src",tmp_path/"dst",tmp_path/"live"
+    _write(src/"a.txt","same",mtime=1_000_000)
+    _write(live/"a.txt","same",mtime=2_000_000)
+    dst.mkdir()
+    os.link(live/"a.txt",dst/"a.txt")
+
+    result = sync_directory(src,dst)
+    assert result.unchanged == 1
+    assert os.stat(dst/"a.txt").st_mtime == 1_000_000
+    assert os.stat(live/"a.txt").st_mtime == 2_000_000
+    assert not os.path.samefile(dst/"a.txt",live/"a.txt")
+
+
+def test_a_store_sync_leaves_nothing_to_hash_next_time(tmp_path, monkeypatch):
+    from docd.objectstore import ObjectStore
+    src,dst = tmp_path/"src",tmp_path/"dst"
+    store = ObjectStore(tmp_path/"objects")
+    # Two sources share an object though their mtimes differ, and one is touched later
+    _write(src/"a.txt","same",mtime=1_000_000)
+    _write(src/"b.txt","other",mtime=1_000_000)
+    sync_directory(src,dst,store=store)
+    _write(src/"c.txt","other",mtime=1_000_000)
+    os.utime(src/"a.txt",(2_000_000,2_000_000))
+    assert sync_directory(src,dst,store=store).unchanged == 2
+    assert os.stat(dst/"a.txt").st_mtime == 2_000_000
+
+    hashed = []
+    monkeypatch.setattr("docd.utils.sync.file_sha256",lambda path: hashed.append(path))
+    result = sync_directory(src,dst,store=store)
+    assert (result.unchanged,hashed) == (3,[])
+    assert os.path.samefile(dst/"b.txt",dst/"c.txt")
+
+
+def test_hardlink_links_to_the_source(tmp_path):
+    src,dst = tmp_path/"src",tmp_path/"dst"
+    _write(src/"a.txt","a")
+    result = sync_directory(src,dst,hardlink=True)
+    assert result.linked == 1
+    assert os.path.samefile(src/"a.txt",dst/"a.txt")
+
+
+def test_symlinks_are_recreated_as_links(tmp_path):
+    src,dst = tmp_path/"src",tmp_path/"dst"
+    _write(src/"a.txt","a")
+    os.symlink("a.txt",src/"link.txt")
+    sync_directory(src,dst)
+    assert os.readlink(dst/"link.txt") == "a.txt"
+    assert sync_directory(src,dst).unchanged == 2
@@ -0,0 +1,41 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Pytest
+import pytest
+# Local
+from docd.textextract import extract_page_text, extract_code_text
+
+
+PAGE = """
+<h1>Getting <em>Started</em></h1>
+<p>Install it from <a href="https://example.com/x">https://example.com/x</a> first.</p>
+<h2>Usage</h2><ul><li>one</li><li>two</li></ul>
+<pre><code>def run_build(config): return config["jobs"] + 1</code></pre>
+<script>var hidden = 1;</script>
+"""
+
+
+def test_a_page_splits_into_title_headings_prose_and_code_names():
+    text = extract_page_text(PAGE)
+    assert text["title"] == "Getting Started"
+    assert text["headings"] == "Usage"
+    # URLs are dropped, and block tags keep words apart
+    assert text["body"] == "Install it from first. one two"
+    assert text["code"] == "def run_build config return config jobs"
+
+
+def test_the_code_mode_decides_where_code_goes():
+    include = extract_page_text(PAGE,code_mode="include")
+    assert include["body"].endswith("one two def run_build config return config jobs")
+    assert include["code"] == ""
+    exclude = extract_page_text(PAGE,code_mode="exclude")
+    assert "run_build" not in exclude["body"] and exclude["code"] == ""
+    with pytest.raises(Exception,match="Unknown search code mode"):
+        extract_page_text(PAGE,code_mode="loud")
+
+
+def test_a_source_file_is_all_code():
+    # Single letters are too common in code to be worth indexing
+    assert extract_code_text("x = add(a_b, 2)") == { "title":None, "headings":"", "body":"", "code":"add a_b" }
+    assert extract_code_text("x = add(a_b, 2)",code_mode="include")["body"] == "add a_b"
@@ -0,0 +1,66 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import os
+# Local
+from docd.walker import SkipPatterns, walk_source_tree
+
+
+def _touch(root, *relpaths):
+    for relpath in relpaths:
+        path = root/relpath
+        path.parent.mkdir(parents=True,exist_ok=True)
+        path.write_text(relpath)
+
+
+def _recursive_walk(root, prefix="", depth=0):
+    # What the walk should match: a recursive walk over sorted children
+    entries = []
+    for name in sorted(os.listdir(root/prefix if prefix else root)):
+        relpath = prefix+name
+        if (root/relpath).is_dir():
+            entries.append(("directory",relpath,depth+1))
+            entries += _recursive_walk(root,relpath+"/",depth+1)
+        else:
+            entries.append(("file",relpath,depth))
+    return entries
+
+
+def test_walk_matches_a_sorted_recursive_walk(tmp_path):
+    _touch(tmp_path,"b.md","a/z.md","a/b/c.md","a/b/a.py","c/d/e/f.md","a.md")
+    entries = list(walk_source_tree(tmp_path,skip=SkipPatterns(())))
+    assert entries[0].kind == "directory" and entries[0].relpath == "."
+    assert [ (e.kind,e.relpath,e.depth) for e in entries[1:] ] == _recursive_walk(tmp_path)
+    assert all( e.stat is not None for e in entries )
+
+
+def test_walk_stops_at_max_depth(tmp_path):
+    _touch(tmp_path,"a.md","x/b.md","x/y/c.md")
+    relpaths = [ e.relpath for e in walk_source_tree(tmp_path,max_depth=1,skip=SkipPatterns(())) ]
+    assert relpaths == [".","a.md","x","x/b.md"]
+
+
+def test_walk_without_files(tmp_path):
+    _touch(tmp_path,"a.md","x/b.md")
+    relpaths = [ e.relpath for e in walk_source_tree(tmp_path,skip=SkipPatterns(()),include_files=False) ]
+    assert relpaths == [".","x"]
+
+
+def test_default_skips_leave_out_git_output_and_media(tmp_path):
+    _touch(tmp_path,"a.md",".git/HEAD","_output/x.html","_media/i.png","sub/_media/j.png")
+    relpaths = [ e.relpath for e in walk_source_tree(tmp_path) ]
+    assert relpaths == [".","a.md","sub"]
+
+
+def test_skip_patterns_by_name_path_and_directory():
+    skip = SkipPatterns(("*.tmp","drafts/","notes/private/*"))
+    # Names match at any depth
+    assert skip.skips("a/b/c.tmp","c.tmp",False)
+    # A trailing slash only matches directories
+    assert skip.skips("x/drafts","drafts",True)
+    assert not skip.skips("x/drafts","drafts",False)
+    # A slash matches the path from the root
+    assert skip.skips("notes/private/a.md","a.md",False)
+    assert not skip.skips("other/notes/private/a.md","a.md",False)
+    assert not skip.skips("a/b/c.md","c.md",False)
@@ -0,0 +1,46 @@
+# SPDX-FileCopyRightText: Copyright (c) 2023-present Jeffrey LeBlanc
+# SPDX-License-Indentifier: UNLICENSED
+
+# Python
+import asyncio
+# Pytest
+import pytest
+# Local
+from docd.walker import SkipPatterns
+from docd.watcher import PollingWatcher, InotifyWatcher
+
+
+def _inotify_watcher(roots, callback, **kwargs):
+    try:
+        return InotifyWatcher(roots,callback,**kwargs)
+    except (OSError,AttributeError):
+        pytest.skip("inotify is not available")
+
+
+@pytest.mark.parametrize("make",[
+    lambda roots,callback,**kwargs: PollingWatcher(roots,callback,interval=0.02,**kwargs),
+    _inotify_watcher
+],ids=["polling","inotify"])
+def test_a_burst_of_changes_is_reported_once(tmp_path, make):
+    root = tmp_path/"docs"
+    (root/"skipped").mkdir(parents=True)
+    (root/"a.md").write_text("a")
+    batches = []
+
+    async def main():
+        watcher = make([root],batches.append,debounce=0.1,skip=SkipPatterns(("skipped",)))
+        watcher.start()
+        try:
+            # Let a polling watcher take its first snapshot
+            await asyncio.sleep(0.1)
+            (root/"a.md").write_text("changed")
+            (root/"b.md").write_text("b")
+            (root/"skipped"/"c.md").write_text("c")
+            await asyncio.sleep(0.6)
+        finally:
+            watcher.stop()
+
+    asyncio.run(main())
+    assert len(batches) == 1
+    assert batches[0] >= {str(root/"a.md"),str(root/"b.md")}
+    assert not any( "skipped" in e for e in batches[0] )